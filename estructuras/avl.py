@@ -2,7 +2,10 @@ import struct
 import os
 import re
 import json
+import threading
 from estructuras.point_class import Point  
+from estructuras.rwlock import latched
+from estructuras.zorder import spatial_key, zorder_ranges
 
 class AVLFile:
     def __init__(self, record_format="<i50sdii", index_attr=2, table_name="Productos", is_key=False):
@@ -10,6 +13,8 @@ class AVLFile:
         self.index_attr = index_attr  # El atributo a indexar (2 = nombre)
         self.table_name = table_name
         self.is_key = is_key  # Indica si el atributo es una clave (no permite duplicados)
+        # Los SELECT concurrentes comparten esta instancia (y su archivo de nodos)
+        self.latch = threading.RLock()
         
         # Cargar metadata de la tabla para obtener información de tipos
         self.table_metadata = self._load_table_metadata()
@@ -23,8 +28,13 @@ class AVLFile:
         # Asegurar que los directorios existan
         os.makedirs("indices", exist_ok=True)
         
+        # Los POINT se ordenan por código Morton (Z-order); usan un archivo propio
+        # para no mezclarse con índices creados con el orden por distancia al origen
+        self.is_spatial = self._get_attribute_type(index_attr) == 'POINT'
+        
         # Nombre del archivo de índice AVL
-        self.filename = f"indices/{table_name}_{index_attr}_avl.dat"
+        suffix = "zavl" if self.is_spatial else "avl"
+        self.filename = f"indices/{table_name}_{index_attr}_{suffix}.dat"
         
         # Formato de cabecera: root_index, header_index
         self.header_format = 'i i'
@@ -38,6 +48,36 @@ class AVLFile:
             with open(self.filename, 'wb') as f:
                 # Inicializar cabecera con root=0, header=-1 (lista vacía)
                 f.write(struct.pack(self.header_format, 0, -1))
+            
+            if self.is_spatial:
+                self._build_from_table()
+
+    def _build_from_table(self):
+        """
+        Inserta en un índice recién creado los registros activos que ya existan
+        en la tabla (p. ej. al migrar un índice POINT al orden Z).
+        """
+        tabla_filename = f"tablas/{self.table_name}.bin"
+        if not os.path.exists(tabla_filename):
+            return
+        
+        with open(tabla_filename, 'rb') as f:
+            f.seek(struct.calcsize("<i"))
+            data = f.read()
+        
+        usable = len(data) - len(data) % self.record_size
+        for record_num, values in enumerate(struct.iter_unpack(self.record_format, data[:usable]), 1):
+            if values[-1] == -2:
+                self.insert_record(record_num)
+
+    def _key(self, value):
+        """
+        Clave de orden de un valor del atributo indexado.
+        Los Point se ordenan por (código Morton, x, y); el resto por su propio valor.
+        """
+        if isinstance(value, Point):
+            return spatial_key(value)
+        return value
 
     def _load_table_metadata(self):
         """
@@ -65,7 +105,8 @@ class AVLFile:
         VERSIÓN MEJORADA con fallback robusto.
         
         Args:
-            attr_index (int): Índice del atributo (empezando desde 1)
+            attr_index (int): Índice real del atributo en el struct (empezando desde 1);
+                              los POINT ocupan dos posiciones
             
         Returns:
             str: Tipo de dato del atributo
@@ -76,9 +117,17 @@ class AVLFile:
         
         attributes = self.table_metadata['attributes']
         
-        # attr_index empieza desde 1, pero el array desde 0
-        if 1 <= attr_index <= len(attributes):
-            data_type = attributes[attr_index - 1]['data_type'].upper()
+        # Convertir la posición real en el struct al atributo lógico
+        real_position = 1
+        for attribute in attributes:
+            if real_position == attr_index:
+                data_type = attribute['data_type'].upper()
+                break
+            real_position += 2 if attribute['data_type'].upper() == 'POINT' else 1
+        else:
+            data_type = None
+        
+        if data_type is not None:
             
             # Normalizar tipos
             if data_type.startswith('VARCHAR') or data_type.startswith('CHAR'):
@@ -220,7 +269,9 @@ class AVLFile:
         if valor1 is None or valor2 is None:
             return 0  # En caso de error, considerarlos iguales
         
-        # Usar las operaciones sobrecargadas de Point si son objetos Point
+        valor1 = self._key(valor1)
+        valor2 = self._key(valor2)
+        
         try:
             if valor1 < valor2:
                 return -1
@@ -405,6 +456,7 @@ class AVLFile:
 
         return index
 
+    @latched
     def insert_record(self, clave):
         # Leer la cabecera para obtener el root_index actual
         header = self._read_header()
@@ -467,6 +519,7 @@ class AVLFile:
             
         return current_index
 
+    @latched
     def search(self, target_value):
         """
         Busca registros que tengan el valor específico en el atributo indexado.
@@ -481,7 +534,7 @@ class AVLFile:
         root_index = header['root']
         
         results = []
-        self._search_rec(root_index, target_value, results)
+        self._search_rec(root_index, self._key(target_value), results)
         record_numbers = [node['clave'] for node in results]
         return record_numbers
 
@@ -492,7 +545,7 @@ class AVLFile:
         
         Args:
             root_index: Índice del nodo actual
-            target_value: el valor del atributo a buscar (puede ser Point, etc.)
+            target_value: clave de orden del valor a buscar (ver _key)
             results: lista para acumular resultados
         """
         if root_index == 0:
@@ -504,6 +557,8 @@ class AVLFile:
         if current_value is None:
             return
         
+        current_value = self._key(current_value)
+        
         try:
             # Usar las operaciones sobrecargadas para comparar
             if target_value < current_value:
@@ -544,8 +599,15 @@ class AVLFile:
         Busca registros cuyos valores de atributo estén en el rango [min_value, max_value].
         VERSIÓN CON DEBUG para identificar problemas.
         """
+        return [record_num for record_num, _ in self.range_search_items(min_value, max_value)]
 
-        
+    @latched
+    def range_search_items(self, min_value, max_value):
+        """
+        Igual que range_search pero devuelve pares (número de registro, valor):
+        el valor ya se leyó al recorrer el árbol, así quien solo necesita el
+        atributo indexado no vuelve a leer el registro.
+        """
         header = self._read_header()
         root_index = header['root']
         
@@ -553,10 +615,82 @@ class AVLFile:
             return []
         
         results = []
-        self._range_search_rec(root_index, min_value, max_value, results)
-        record_numbers = [node['clave'] for node in results]
+        if self.is_spatial and isinstance(min_value, Point) and isinstance(max_value, Point):
+            # Rectángulo -> pocos intervalos de códigos Morton, cada uno un recorrido por rango
+            for z_min, z_max in zorder_ranges(min_value, max_value):
+                low = (z_min, float('-inf'), float('-inf'))
+                high = (z_max, float('inf'), float('inf'))
+                self._spatial_range_rec(root_index, low, high, min_value, max_value, results)
+        else:
+            self._range_search_rec(root_index, min_value, max_value, results)
         
-        return record_numbers
+        return results
+
+    @latched
+    def get_bounds(self):
+        """
+        Valores mínimo y máximo del atributo indexado: extremos izquierdo y
+        derecho del árbol, en O(log n) lecturas de nodo.
+        
+        Returns:
+            tuple: (min_value, max_value) o None si el índice está vacío
+        """
+        root_index = self._read_header()['root']
+        if root_index == 0:
+            return None
+        
+        extremes = []
+        for side in ('left', 'right'):
+            node = self._read_node(root_index)
+            while node[side] != 0:
+                node = self._read_node(node[side])
+            extremes.append(self.get_attribute_from_record_num(node['clave']))
+        
+        return tuple(extremes)
+
+    def iter_in_order(self, descending=False):
+        """
+        Recorre el índice en orden del atributo (o en orden inverso) y devuelve
+        los números de registro. Es un generador con pila explícita: obtener
+        los primeros k cuesta O(k + log n) lecturas de nodo y ninguna de la tabla.
+        """
+        first, second = ('right', 'left') if descending else ('left', 'right')
+        stack = []
+        index = self._read_header()['root']
+        
+        while stack or index != 0:
+            while index != 0:
+                node = self._read_node(index)
+                stack.append(node)
+                index = node[first]
+            node = stack.pop()
+            yield node['clave']
+            index = node[second]
+
+    def _spatial_range_rec(self, root_index, low, high, min_point, max_point, results):
+        """
+        Recorre solo los nodos cuya clave (z, x, y) cae en [low, high] y
+        agrega los que están dentro del rectángulo [min_point, max_point].
+        """
+        if root_index == 0:
+            return
+        
+        root_node = self._read_node(root_index)
+        current_value = self.get_attribute_from_record_num(root_node['clave'])
+        
+        if not isinstance(current_value, Point):
+            return
+        
+        current_key = self._key(current_value)
+        
+        if low < current_key:
+            self._spatial_range_rec(root_node['left'], low, high, min_point, max_point, results)
+        
+        if low <= current_key <= high and current_value.is_in_range(min_point, max_point):
+            results.append((root_node['clave'], current_value))
+        
+        if current_key <= high:
+            self._spatial_range_rec(root_node['right'], low, high, min_point, max_point, results)
 
     def _range_search_rec(self, root_index, min_value, max_value, results):
         """
@@ -580,7 +714,7 @@ class AVLFile:
                 self._range_search_rec(root_node['left'], min_value, max_value, results)
                 
                 if current_value.is_in_range(min_value, max_value):
-                    results.append(root_node)
+                    results.append((root_node['clave'], current_value))
                 
                 self._range_search_rec(root_node['right'], min_value, max_value, results)
                 
@@ -589,7 +723,7 @@ class AVLFile:
                     self._range_search_rec(root_node['left'], min_value, max_value, results)
 
                 if min_value <= current_value <= max_value:
-                    results.append(root_node)
+                    results.append((root_node['clave'], current_value))
 
                 if current_value <= max_value:
                     self._range_search_rec(root_node['right'], min_value, max_value, results)
@@ -604,7 +738,7 @@ class AVLFile:
                     self._range_search_rec(root_node['left'], min_value, max_value, results)
 
                 if min_str <= current_str <= max_str:
-                    results.append(root_node)
+                    results.append((root_node['clave'], current_value))
 
                 if current_str <= max_str:
                     self._range_search_rec(root_node['right'], min_value, max_value, results)
@@ -612,6 +746,7 @@ class AVLFile:
                 pass
 
 
+    @latched
     def delete_record(self, record_num):
         """
         Elimina un registro específico del índice AVL por su número de registro.
@@ -697,10 +832,13 @@ class AVLFile:
         if current_record_num == target_record_num and current_value == target_value:
             return self._remove_node(root_index)
         
-        if target_value < current_value:
+        target_key = self._key(target_value)
+        current_key = self._key(current_value)
+        
+        if target_key < current_key:
             root_node['left'] = self._delete_specific_record_rec(root_node['left'], target_record_num, target_value)
             self._write_node(root_index, root_node)
-        elif target_value > current_value:
+        elif target_key > current_key:
             root_node['right'] = self._delete_specific_record_rec(root_node['right'], target_record_num, target_value)
             self._write_node(root_index, root_node)
         else:
@@ -0,0 +1,104 @@
+# Los números de registro se agrupan por sus 16 bits altos (como en roaring bitmaps)
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+CHUNK_MASK = CHUNK_SIZE - 1
+
+# Posiciones de los bits en 1 de cada byte, para recorrer un bitmap byte a byte
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+
+class RecordBitmap:
+    """
+    Conjunto ordenado de números de registro.
+
+    Los números se agrupan por sus 16 bits altos y cada grupo se guarda como
+    un bitmap de 65536 bits en un int de Python. Unión, intersección y
+    diferencia operan grupo a grupo con operadores de bits (en C), sin tocar
+    cada elemento, y la iteración devuelve los números en orden ascendente.
+    """
+
+    __slots__ = ('chunks',)
+
+    def __init__(self, values=None):
+        self.chunks = {}
+        if values is not None:
+            self.update(values)
+
+    def add(self, value):
+        """Agrega un número de registro (entero no negativo)."""
+        high = value >> CHUNK_BITS
+        self.chunks[high] = self.chunks.get(high, 0) | (1 << (value & CHUNK_MASK))
+
+    def update(self, values):
+        """Agrega varios números de registro armando cada grupo en un buffer de bytes."""
+        buffers = {}
+        for value in values:
+            high = value >> CHUNK_BITS
+            buffer = buffers.get(high)
+            if buffer is None:
+                buffer = buffers[high] = bytearray(CHUNK_SIZE // 8)
+            low = value & CHUNK_MASK
+            buffer[low >> 3] |= 1 << (low & 7)
+
+        for high, buffer in buffers.items():
+            self.chunks[high] = self.chunks.get(high, 0) | int.from_bytes(buffer, 'little')
+
+    def __contains__(self, value):
+        return bool(self.chunks.get(value >> CHUNK_BITS, 0) >> (value & CHUNK_MASK) & 1)
+
+    def __len__(self):
+        return sum(word.bit_count() for word in self.chunks.values())
+
+    def __bool__(self):
+        return bool(self.chunks)
+
+    def __iter__(self):
+        for high in sorted(self.chunks):
+            word = self.chunks[high]
+            base = high << CHUNK_BITS
+            data = word.to_bytes((word.bit_length() + 7) // 8, 'little')
+            for position, byte in enumerate(data):
+                if byte:
+                    offset = base + (position << 3)
+                    for bit in _BYTE_BITS[byte]:
+                        yield offset + bit
+
+    def __eq__(self, other):
+        if not isinstance(other, RecordBitmap):
+            return NotImplemented
+        return self.chunks == other.chunks
+
+    def __and__(self, other):
+        result = RecordBitmap()
+        small, large = (self, other) if len(self.chunks) <= len(other.chunks) else (other, self)
+        for high, word in small.chunks.items():
+            common = word & large.chunks.get(high, 0)
+            if common:
+                result.chunks[high] = common
+        return result
+
+    def __or__(self, other):
+        result = RecordBitmap()
+        result.chunks = dict(self.chunks)
+        result |= other
+        return result
+
+    def __ior__(self, other):
+        for high, word in other.chunks.items():
+            self.chunks[high] = self.chunks.get(high, 0) | word
+        return self
+
+    def __sub__(self, other):
+        result = RecordBitmap()
+        for high, word in self.chunks.items():
+            rest = word & ~other.chunks.get(high, 0)
+            if rest:
+                result.chunks[high] = rest
+        return result
+
+    def to_list(self):
+        """Números de registro en orden ascendente."""
+        return list(self)
+
+    def __repr__(self):
+        return f"RecordBitmap({len(self)} registros)"
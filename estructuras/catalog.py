@@ -0,0 +1,75 @@
+import os
+import json
+from contextlib import contextmanager
+from estructuras.rwlock import ProcessSharedLock, fcntl
+
+
+class SharedCatalog:
+    """
+    Catálogo compartido entre procesos que sirven el mismo directorio de tablas.
+
+    catalog.json guarda una versión del catálogo (sube con cada CREATE TABLE)
+    y una versión por tabla (sube con cada escritura). Cada proceso compara
+    esas versiones con las últimas que vio para saber si debe recargar las
+    tablas o descartar cachés en memoria. Las actualizaciones se hacen con
+    flock exclusivo sobre catalog.lock y el archivo se reemplaza de forma
+    atómica, así los lectores nunca ven un JSON a medio escribir.
+    """
+
+    def __init__(self, base_dir):
+        if fcntl is None:
+            raise RuntimeError("El modo multiproceso requiere fcntl (Linux/macOS)")
+        os.makedirs(base_dir, exist_ok=True)
+        self.base_dir = base_dir
+        self.path = os.path.join(base_dir, 'catalog.json')
+        self.lock_path = os.path.join(base_dir, 'catalog.lock')
+
+    @contextmanager
+    def _exclusive(self):
+        with open(self.lock_path, 'a+') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read(self):
+        """Contenido del catálogo: {'version': int, 'tables': {tabla: versión}}."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'version': 0, 'tables': {}}
+
+    def _write(self, data):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def version(self):
+        return self.read()['version']
+
+    def table_version(self, table_name):
+        return self.read()['tables'].get(table_name, 0)
+
+    def bump_catalog(self):
+        """Registra un cambio de esquema (tabla nueva). Retorna la nueva versión."""
+        with self._exclusive():
+            data = self.read()
+            data['version'] += 1
+            self._write(data)
+            return data['version']
+
+    def bump_table(self, table_name):
+        """Registra una escritura en la tabla. Retorna la nueva versión de la tabla."""
+        with self._exclusive():
+            data = self.read()
+            data['tables'][table_name] = data['tables'].get(table_name, 0) + 1
+            self._write(data)
+            return data['tables'][table_name]
+
+    def table_lock(self, table_name, on_stale, on_sync):
+        """Lock de lectores/escritores de la tabla compartido con los demás procesos."""
+        lock_path = os.path.join(self.base_dir, f"{table_name}.lock")
+        return ProcessSharedLock(lock_path, self, table_name, on_stale, on_sync)
@@ -0,0 +1,160 @@
+import math
+from array import array
+
+# Radio medio de la Tierra (IUGG) en kilómetros
+EARTH_RADIUS_KM = 6371.0088
+
+EUCLIDEAN = 'euclidean'
+HAVERSINE = 'haversine'
+METRICS = (EUCLIDEAN, HAVERSINE)
+
+_MAX_LAT = math.pi / 2
+
+
+def normalize_metric(metric, default=EUCLIDEAN):
+    """
+    Normaliza el nombre de una métrica de distancia.
+
+    Args:
+        metric (str | None): Nombre de la métrica ('euclidean', 'haversine')
+        default (str): Métrica a usar si metric es None
+
+    Returns:
+        str: Nombre normalizado de la métrica
+
+    Raises:
+        ValueError: Si la métrica no está soportada
+    """
+    if metric is None:
+        return default
+    metric = str(metric).strip().strip("'\"").lower()
+    if metric not in METRICS:
+        raise ValueError(f"Métrica de distancia '{metric}' no soportada. Use: {', '.join(METRICS)}")
+    return metric
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Distancia de gran círculo entre dos coordenadas (en grados).
+
+    Returns:
+        float: Distancia en kilómetros
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    sin_dlat = math.sin((phi2 - phi1) * 0.5)
+    sin_dlon = math.sin(math.radians(lon2 - lon1) * 0.5)
+    h = sin_dlat * sin_dlat + math.cos(phi1) * math.cos(phi2) * sin_dlon * sin_dlon
+    return 2.0 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, h)))
+
+
+def distance(p1, p2, metric=EUCLIDEAN):
+    """
+    Distancia entre dos Points según la métrica indicada.
+    Para 'haversine' los puntos se interpretan como (lat, lon).
+    """
+    if metric == HAVERSINE:
+        return haversine(p1.x, p1.y, p2.x, p2.y)
+    return math.hypot(p1.x - p2.x, p1.y - p2.y)
+
+
+def geo_bounding_boxes(lat, lon, radius_km):
+    """
+    Rectángulos (lat_min, lon_min, lat_max, lon_max) que contienen el círculo
+    geodésico de radio radius_km alrededor de (lat, lon).
+
+    El ancho en longitud crece con 1/cos(lat): un radio fijo abarca más grados
+    de longitud cerca de los polos. Si el círculo contiene un polo se cubre
+    toda la longitud, y si cruza el antimeridiano se parte en dos rectángulos.
+
+    Returns:
+        list: Uno o dos rectángulos en grados
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    if angular >= math.pi:
+        return [(-90.0, -180.0, 90.0, 180.0)]
+
+    phi = math.radians(lat)
+    phi_min = phi - angular
+    phi_max = phi + angular
+
+    if phi_min <= -_MAX_LAT or phi_max >= _MAX_LAT:
+        return [(math.degrees(max(phi_min, -_MAX_LAT)), -180.0,
+                 math.degrees(min(phi_max, _MAX_LAT)), 180.0)]
+
+    dlon = math.degrees(math.asin(min(1.0, math.sin(angular) / math.cos(phi))))
+    lat_min = math.degrees(phi_min)
+    lat_max = math.degrees(phi_max)
+    lon_min = lon - dlon
+    lon_max = lon + dlon
+
+    if lon_min < -180.0:
+        return [(lat_min, lon_min + 360.0, lat_max, 180.0),
+                (lat_min, -180.0, lat_max, lon_max)]
+    if lon_max > 180.0:
+        return [(lat_min, lon_min, lat_max, 180.0),
+                (lat_min, -180.0, lat_max, lon_max - 360.0)]
+    return [(lat_min, lon_min, lat_max, lon_max)]
+
+
+def haversine_within(lat, lon, lats, lons, radius_km):
+    """
+    Filtro fino geodésico sobre buffers de coordenadas.
+
+    Compara directamente el término de la fórmula haversine contra
+    sin²(radio / 2R), sin asin ni sqrt por candidato, de modo que el costo
+    por punto es similar al de la distancia euclidiana al cuadrado.
+
+    Args:
+        lat, lon (float): Centro de la consulta en grados
+        lats, lons (array): Coordenadas de los candidatos en grados
+        radius_km (float): Radio de búsqueda
+
+    Returns:
+        list: Posiciones de los candidatos dentro del radio
+    """
+    half = min(radius_km / EARTH_RADIUS_KM, math.pi) * 0.5
+    threshold = math.sin(half) ** 2
+
+    to_rad = math.pi / 180.0
+    phi = lat * to_rad
+    lam = lon * to_rad
+    cos_phi = math.cos(phi)
+    sin = math.sin
+    cos = math.cos
+
+    matches = []
+    for i in range(len(lats)):
+        phi2 = lats[i] * to_rad
+        a = sin((phi2 - phi) * 0.5)
+        b = sin((lons[i] * to_rad - lam) * 0.5)
+        if a * a + cos_phi * cos(phi2) * b * b <= threshold:
+            matches.append(i)
+    return matches
+
+
+def haversine_many(lat, lon, lats, lons):
+    """
+    Distancias geodésicas (km) desde (lat, lon) a cada punto de los buffers.
+
+    Returns:
+        array: Distancias en kilómetros
+    """
+    to_rad = math.pi / 180.0
+    phi = lat * to_rad
+    lam = lon * to_rad
+    cos_phi = math.cos(phi)
+    sin = math.sin
+    cos = math.cos
+    asin = math.asin
+    sqrt = math.sqrt
+    diameter = 2.0 * EARTH_RADIUS_KM
+
+    distances = array('d', bytes(8 * len(lats)))
+    for i in range(len(lats)):
+        phi2 = lats[i] * to_rad
+        a = sin((phi2 - phi) * 0.5)
+        b = sin((lons[i] * to_rad - lam) * 0.5)
+        h = a * a + cos_phi * cos(phi2) * b * b
+        distances[i] = diameter * asin(sqrt(h if h < 1.0 else 1.0))
+    return distances
@@ -0,0 +1,698 @@
+import struct
+import os
+import sys
+import json
+import math
+import threading
+from array import array
+from estructuras.point_class import Point
+from estructuras.rwlock import latched
+from estructuras.distance import (
+    HAVERSINE, normalize_metric, distance, haversine, geo_bounding_boxes,
+    haversine_within, haversine_many
+)
+
+# Capacidad (entradas) de cada bucket de celda
+CELL_CAPACITY = 64
+# Lado de cada celda en unidades de coordenada (grados si la métrica es haversine);
+# se puede cambiar por columna con INDEX grid CELL <tamaño>
+DEFAULT_CELL_SIZE = 1.0
+
+_BUCKET_HEADER = struct.Struct('<ii')  # count, next
+_RECS_BYTES = 4 * CELL_CAPACITY
+_COORDS_BYTES = 8 * CELL_CAPACITY
+BUCKET_SIZE = _BUCKET_HEADER.size + _RECS_BYTES + 2 * _COORDS_BYTES
+
+
+class CellBucket:
+    """
+    Bucket de tamaño fijo de una celda, en formato columnar:
+    [count, next] [record_nums x CAP] [xs x CAP] [ys x CAP]
+    Las coordenadas se guardan junto al número de registro, así un recorrido
+    de celda no necesita leer la tabla y se decodifica con array.frombytes.
+    """
+
+    def __init__(self, records=None, xs=None, ys=None, next=-1):
+        self.records = records if records is not None else array('i')
+        self.xs = xs if xs is not None else array('d')
+        self.ys = ys if ys is not None else array('d')
+        self.next = next
+
+    def is_full(self):
+        return len(self.records) >= CELL_CAPACITY
+
+    def to_bytes(self):
+        count = len(self.records)
+        pad = CELL_CAPACITY - count
+        records = self.records + array('i', [-1] * pad)
+        xs = self.xs + array('d', bytes(8 * pad))
+        ys = self.ys + array('d', bytes(8 * pad))
+        if sys.byteorder == 'big':
+            for buf in (records, xs, ys):
+                buf.byteswap()
+        return _BUCKET_HEADER.pack(count, self.next) + records.tobytes() + xs.tobytes() + ys.tobytes()
+
+    @staticmethod
+    def from_bytes(data):
+        count, next_ptr = _BUCKET_HEADER.unpack_from(data)
+        offset = _BUCKET_HEADER.size
+        records = array('i')
+        records.frombytes(data[offset:offset + 4 * count])
+        offset += _RECS_BYTES
+        xs = array('d')
+        xs.frombytes(data[offset:offset + 8 * count])
+        offset += _COORDS_BYTES
+        ys = array('d')
+        ys.frombytes(data[offset:offset + 8 * count])
+        if sys.byteorder == 'big':
+            for buf in (records, xs, ys):
+                buf.byteswap()
+        return CellBucket(records, xs, ys, next_ptr)
+
+
+class GridFile:
+    """
+    Índice espacial de rejilla (grid file) en Python puro, sin dependencias nativas.
+    El plano se divide en celdas cuadradas de lado fijo; cada celda es una cadena
+    de buckets de tamaño fijo en indices/{tabla}_{attr}_grid.dat y el directorio
+    celda -> primer bucket se guarda en indices/{tabla}_{attr}_grid.json.
+
+    Implementa la misma interfaz espacial que RTreeFile (search, range_search,
+    range_search_radius, range_search_knn, búsquedas en lote y join por radio).
+    Es especialmente rápido para datos densos y uniformes.
+    """
+
+    def __init__(self, record_format="<i50sdii", index_attr=2, table_name="Productos", is_key=False,
+                 metric='euclidean', cell_size=DEFAULT_CELL_SIZE):
+        self.record_format = record_format
+        self.index_attr = index_attr
+        self.table_name = table_name
+        self.is_key = is_key
+        self.metric = normalize_metric(metric)
+        self.record_size = struct.calcsize(self.record_format)
+        # Los SELECT concurrentes comparten el directorio de celdas
+        self.latch = threading.RLock()
+
+        os.makedirs("indices", exist_ok=True)
+        self.index_filename = f"indices/{table_name}_{index_attr}_grid"
+        self.buckets_file = f"{self.index_filename}.dat"
+        self.directory_file = f"{self.index_filename}.json"
+
+        self.cell_size = float(cell_size)
+        self.cells = {}  # (cx, cy) -> id del primer bucket
+
+        if os.path.exists(self.directory_file) and os.path.exists(self.buckets_file):
+            self._load_directory()
+        else:
+            with open(self.buckets_file, 'wb'):
+                pass
+            self._save_directory()
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def _load_directory(self):
+        """Carga el tamaño de celda y el directorio de celdas."""
+        with open(self.directory_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.cell_size = float(data.get('cell_size', self.cell_size))
+        self.cells = {}
+        for key, bucket_id in data.get('cells', {}).items():
+            cx, cy = key.split(',')
+            self.cells[(int(cx), int(cy))] = bucket_id
+
+    @latched
+    def reload(self):
+        """Vuelve a leer el directorio de celdas (lo modificó otro proceso)."""
+        if os.path.exists(self.directory_file):
+            self._load_directory()
+
+    def _save_directory(self):
+        """Guarda el tamaño de celda y el directorio de celdas."""
+        data = {
+            'table_name': self.table_name,
+            'index_attr': self.index_attr,
+            'cell_size': self.cell_size,
+            'cells': {f"{cx},{cy}": bucket_id for (cx, cy), bucket_id in self.cells.items()}
+        }
+        with open(self.directory_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def read_bucket(self, bucket_id):
+        """Lee un bucket desde el archivo."""
+        with open(self.buckets_file, 'rb') as f:
+            f.seek(bucket_id * BUCKET_SIZE)
+            data = f.read(BUCKET_SIZE)
+        if len(data) < BUCKET_SIZE:
+            return CellBucket()
+        return CellBucket.from_bytes(data)
+
+    def write_bucket(self, bucket_id, bucket):
+        """Escribe un bucket en el archivo."""
+        with open(self.buckets_file, 'r+b') as f:
+            f.seek(bucket_id * BUCKET_SIZE)
+            f.write(bucket.to_bytes())
+
+    def _append_bucket(self, bucket):
+        """Agrega un bucket al final del archivo y retorna su id."""
+        with open(self.buckets_file, 'ab') as f:
+            bucket_id = f.tell() // BUCKET_SIZE
+            f.write(bucket.to_bytes())
+        return bucket_id
+
+    def _read_cell(self, cell):
+        """
+        Lee la cadena completa de buckets de una celda.
+
+        Returns:
+            tuple: (record_nums, xs, ys) como arrays contiguos
+        """
+        records = array('i')
+        xs = array('d')
+        ys = array('d')
+        bucket_id = self.cells.get(cell, -1)
+        if bucket_id == -1:
+            return records, xs, ys
+
+        with open(self.buckets_file, 'rb') as f:
+            while bucket_id != -1:
+                f.seek(bucket_id * BUCKET_SIZE)
+                bucket = CellBucket.from_bytes(f.read(BUCKET_SIZE))
+                records.extend(bucket.records)
+                xs.extend(bucket.xs)
+                ys.extend(bucket.ys)
+                bucket_id = bucket.next
+        return records, xs, ys
+
+    # ------------------------------------------------------------------
+    # Acceso a la tabla
+    # ------------------------------------------------------------------
+
+    def _cell_of(self, x, y):
+        size = self.cell_size
+        return (math.floor(x / size), math.floor(y / size))
+
+    def get_attribute_from_record_num(self, record_num):
+        """Obtiene el Point del atributo indexado leyendo el registro de la tabla."""
+        tabla_filename = f"tablas/{self.table_name}.bin"
+        tabla_header_size = struct.calcsize("<i")
+
+        try:
+            with open(tabla_filename, 'rb') as f:
+                f.seek(tabla_header_size + (record_num - 1) * self.record_size)
+                record_data = f.read(self.record_size)
+
+            if not record_data or len(record_data) < self.record_size:
+                return None
+
+            unpacked_data = struct.unpack(self.record_format, record_data)
+            current_index = self.index_attr - 1
+            if current_index < 0 or current_index + 1 >= len(unpacked_data):
+                return None
+
+            return Point(unpacked_data[current_index], unpacked_data[current_index + 1])
+
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            return None
+
+    # ------------------------------------------------------------------
+    # Inserción y eliminación
+    # ------------------------------------------------------------------
+
+    @latched
+    def insert_record(self, record_num):
+        """
+        Inserta un registro en la celda que contiene su punto.
+
+        Returns:
+            bool: True si se insertó correctamente
+        """
+        point = self.get_attribute_from_record_num(record_num)
+        if not isinstance(point, Point):
+            return False
+        return self._insert_entry(record_num, point.x, point.y)
+
+    def _insert_entry(self, record_num, x, y):
+        cell = self._cell_of(x, y)
+        bucket_id = self.cells.get(cell, -1)
+
+        if bucket_id == -1:
+            bucket = CellBucket(array('i', [record_num]), array('d', [x]), array('d', [y]))
+            self.cells[cell] = self._append_bucket(bucket)
+            self._save_directory()
+            return True
+
+        # Buscar el primer bucket de la cadena con espacio
+        while True:
+            bucket = self.read_bucket(bucket_id)
+            if not bucket.is_full():
+                bucket.records.append(record_num)
+                bucket.xs.append(x)
+                bucket.ys.append(y)
+                self.write_bucket(bucket_id, bucket)
+                return True
+            if bucket.next == -1:
+                new_id = self._append_bucket(
+                    CellBucket(array('i', [record_num]), array('d', [x]), array('d', [y]))
+                )
+                bucket.next = new_id
+                self.write_bucket(bucket_id, bucket)
+                return True
+            bucket_id = bucket.next
+
+    @latched
+    def delete_record(self, record_num):
+        """
+        Elimina un registro de su celda.
+
+        Returns:
+            int: record_num si se eliminó correctamente, None en caso contrario
+        """
+        point = self.get_attribute_from_record_num(record_num)
+        if not isinstance(point, Point):
+            return None
+
+        cell = self._cell_of(point.x, point.y)
+        bucket_id = self.cells.get(cell, -1)
+
+        while bucket_id != -1:
+            bucket = self.read_bucket(bucket_id)
+            for i, rec in enumerate(bucket.records):
+                if rec == record_num:
+                    # Rellenar el hueco con el último elemento del bucket
+                    last = len(bucket.records) - 1
+                    bucket.records[i] = bucket.records[last]
+                    bucket.xs[i] = bucket.xs[last]
+                    bucket.ys[i] = bucket.ys[last]
+                    del bucket.records[last], bucket.xs[last], bucket.ys[last]
+                    self.write_bucket(bucket_id, bucket)
+                    return record_num
+            bucket_id = bucket.next
+
+        return None
+
+    # ------------------------------------------------------------------
+    # Búsquedas
+    # ------------------------------------------------------------------
+
+    def _cells_in_rect(self, min_x, min_y, max_x, max_y):
+        """Celdas existentes que intersectan el rectángulo."""
+        cx0, cy0 = self._cell_of(min_x, min_y)
+        cx1, cy1 = self._cell_of(max_x, max_y)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            return [c for c in self.cells if cx0 <= c[0] <= cx1 and cy0 <= c[1] <= cy1]
+        return [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)
+                if (cx, cy) in self.cells]
+
+    @latched
+    def search(self, target_point):
+        """Busca registros en la posición exacta del punto."""
+        if not isinstance(target_point, Point):
+            return []
+        tx, ty = target_point.x, target_point.y
+        records, xs, ys = self._read_cell(self._cell_of(tx, ty))
+        return [records[i] for i in range(len(records))
+                if abs(xs[i] - tx) < 1e-10 and abs(ys[i] - ty) < 1e-10]
+
+    @latched
+    def range_search(self, min_point, max_point):
+        """Busca registros dentro del rectángulo [min_point, max_point]."""
+        if not isinstance(min_point, Point) or not isinstance(max_point, Point):
+            return []
+        min_x, min_y, max_x, max_y = min_point.x, min_point.y, max_point.x, max_point.y
+
+        results = []
+        for cell in self._cells_in_rect(min_x, min_y, max_x, max_y):
+            records, xs, ys = self._read_cell(cell)
+            results.extend(records[i] for i in range(len(records))
+                           if min_x <= xs[i] <= max_x and min_y <= ys[i] <= max_y)
+        return results
+
+    @latched
+    def range_search_radius(self, center_point, radius, metric=None):
+        """
+        Búsqueda por radio.
+
+        Args:
+            center_point (Point): Punto central de la búsqueda
+            radius (float): Radio de búsqueda
+            metric (str): Métrica de la consulta (por defecto la del índice)
+
+        Returns:
+            list: Lista de números de registro dentro del radio
+        """
+        if not isinstance(center_point, Point) or radius <= 0:
+            return []
+
+        cx, cy = center_point.x, center_point.y
+        if normalize_metric(metric, self.metric) == HAVERSINE:
+            return self._geo_radius_search(cx, cy, radius)
+
+        size = self.cell_size
+        r2 = radius * radius
+        results = []
+
+        for cell in self._cells_in_rect(cx - radius, cy - radius, cx + radius, cy + radius):
+            x0 = cell[0] * size
+            y0 = cell[1] * size
+            # Distancia mínima y máxima del centro a la celda
+            dx_near = max(x0 - cx, 0.0, cx - (x0 + size))
+            dy_near = max(y0 - cy, 0.0, cy - (y0 + size))
+            if dx_near * dx_near + dy_near * dy_near > r2:
+                continue
+
+            records, xs, ys = self._read_cell(cell)
+            dx_far = max(abs(cx - x0), abs(cx - (x0 + size)))
+            dy_far = max(abs(cy - y0), abs(cy - (y0 + size)))
+            if dx_far * dx_far + dy_far * dy_far <= r2:
+                # Celda completamente dentro del círculo
+                results.extend(records)
+                continue
+
+            for i in range(len(records)):
+                dx = xs[i] - cx
+                dy = ys[i] - cy
+                if dx * dx + dy * dy <= r2:
+                    results.append(records[i])
+
+        return results
+
+    def _geo_candidates(self, lat, lon, radius_km):
+        """Candidatos de las celdas que cubren el círculo geodésico."""
+        records = array('i')
+        lats = array('d')
+        lons = array('d')
+        for lat_min, lon_min, lat_max, lon_max in geo_bounding_boxes(lat, lon, radius_km):
+            for cell in self._cells_in_rect(lat_min, lon_min, lat_max, lon_max):
+                cell_records, xs, ys = self._read_cell(cell)
+                records.extend(cell_records)
+                lats.extend(xs)
+                lons.extend(ys)
+        return records, lats, lons
+
+    def _geo_radius_search(self, lat, lon, radius_km):
+        """Búsqueda por radio geodésico (km) alrededor de (lat, lon)."""
+        records, lats, lons = self._geo_candidates(lat, lon, radius_km)
+        return [records[i] for i in haversine_within(lat, lon, lats, lons, radius_km)]
+
+    def _cell_min_distance(self, cell, cx, cy):
+        """Distancia mínima del punto (cx, cy) a la celda."""
+        size = self.cell_size
+        x0 = cell[0] * size
+        y0 = cell[1] * size
+        dx = max(x0 - cx, 0.0, cx - (x0 + size))
+        dy = max(y0 - cy, 0.0, cy - (y0 + size))
+        return math.hypot(dx, dy)
+
+    def _planar_knn(self, cx, cy, k):
+        """
+        K vecinos euclidianos. Primero recorre anillos de celdas alrededor del
+        centro (tras visitar el anillo R, todo punto no visitado está a más de
+        R * cell_size); si los anillos ya probaron tantas celdas como celdas
+        ocupadas hay, sigue solo por las celdas ocupadas restantes en orden de
+        distancia mínima. Así el costo depende de la cantidad de celdas
+        ocupadas y no de la extensión de las coordenadas.
+        """
+        if not self.cells:
+            return []
+
+        center_cell = self._cell_of(cx, cy)
+        max_ring = max(max(abs(c[0] - center_cell[0]), abs(c[1] - center_cell[1]))
+                       for c in self.cells)
+
+        candidates = []
+
+        def visit(cell):
+            nonlocal candidates
+            records, xs, ys = self._read_cell(cell)
+            for i in range(len(records)):
+                candidates.append((records[i], math.hypot(xs[i] - cx, ys[i] - cy)))
+            if len(candidates) > k:
+                candidates.sort(key=lambda x: x[1])
+                candidates = candidates[:k]
+
+        def kth_distance():
+            if len(candidates) < k:
+                return math.inf
+            return max(distance for _, distance in candidates)
+
+        probes = 0
+        last_ring = -1
+        for ring in range(max_ring + 1):
+            if ring == 0:
+                ring_cells = [center_cell]
+            else:
+                if probes + 8 * ring > len(self.cells):
+                    break
+                ring_cells = []
+                for d in range(-ring, ring + 1):
+                    ring_cells.extend(((center_cell[0] + d, center_cell[1] - ring),
+                                       (center_cell[0] + d, center_cell[1] + ring)))
+                for d in range(-ring + 1, ring):
+                    ring_cells.extend(((center_cell[0] - ring, center_cell[1] + d),
+                                       (center_cell[0] + ring, center_cell[1] + d)))
+
+            probes += len(ring_cells)
+            for cell in ring_cells:
+                if cell in self.cells:
+                    visit(cell)
+            last_ring = ring
+
+            if kth_distance() <= ring * self.cell_size:
+                candidates.sort(key=lambda x: x[1])
+                return candidates
+
+        if last_ring < max_ring:
+            # Celdas ocupadas fuera de los anillos visitados, de la más cercana a la más lejana
+            remaining = sorted(
+                (self._cell_min_distance(cell, cx, cy), cell) for cell in self.cells
+                if max(abs(cell[0] - center_cell[0]), abs(cell[1] - center_cell[1])) > last_ring
+            )
+            for min_distance, cell in remaining:
+                if min_distance > kth_distance():
+                    break
+                visit(cell)
+
+        candidates.sort(key=lambda x: x[1])
+        return candidates[:k]
+
+    @latched
+    def range_search_knn(self, center_point, k, metric=None):
+        """
+        K vecinos más cercanos.
+
+        Returns:
+            list: Lista de tuplas (record_num, distance) ordenadas por distancia
+        """
+        if not isinstance(center_point, Point) or k <= 0:
+            return []
+
+        cx, cy = center_point.x, center_point.y
+        nearest = self._planar_knn(cx, cy, k)
+        if normalize_metric(metric, self.metric) != HAVERSINE or not nearest:
+            return nearest
+
+        # Cota geodésica a partir de los k vecinos planos (ver RTreeFile._geo_knn_search)
+        if len(nearest) < k:
+            records = array('i')
+            lats = array('d')
+            lons = array('d')
+            for record_num, _ in nearest:
+                point = self.get_attribute_from_record_num(record_num)
+                records.append(record_num)
+                lats.append(point.x)
+                lons.append(point.y)
+        else:
+            bound = 0.0
+            for record_num, _ in nearest:
+                point = self.get_attribute_from_record_num(record_num)
+                bound = max(bound, haversine(cx, cy, point.x, point.y))
+            bound = bound * (1 + 1e-9) + 1e-9
+            records, lats, lons = self._geo_candidates(cx, cy, bound)
+
+        distances = haversine_many(cx, cy, lats, lons)
+        return sorted(zip(records, distances), key=lambda x: x[1])[:k]
+
+    def range_search_knn_simple(self, center_point, k, metric=None):
+        """Versión de KNN que retorna solo los números de registro."""
+        return [record_num for record_num, _ in self.range_search_knn(center_point, k, metric)]
+
+    @latched
+    def batch_range_search_radius(self, center_points, radius, metric=None):
+        """
+        Búsqueda por radio para un lote de puntos.
+
+        Returns:
+            list: Una lista de números de registro por cada punto de consulta
+
+        Raises:
+            ValueError: Si se pasa una lista de radios de distinto largo que center_points
+        """
+        if isinstance(radius, (list, tuple)):
+            if len(radius) != len(center_points):
+                raise ValueError(f"Se recibieron {len(radius)} radios para {len(center_points)} puntos")
+            radii = [float(r) for r in radius]
+        else:
+            radii = [float(radius)] * len(center_points)
+        return [self.range_search_radius(center, r, metric) for center, r in zip(center_points, radii)]
+
+    @latched
+    def batch_range_search_knn(self, center_points, k, metric=None):
+        """
+        K vecinos más cercanos para un lote de puntos.
+
+        Returns:
+            list: Una lista de tuplas (record_num, distance) por cada punto
+        """
+        return [self.range_search_knn(center, k, metric) for center in center_points]
+
+    @latched
+    def get_all_entries(self):
+        """
+        Obtiene todos los registros indexados con su punto.
+
+        Returns:
+            list: Lista de tuplas (record_num, Point)
+        """
+        entries = []
+        for cell in self.cells:
+            records, xs, ys = self._read_cell(cell)
+            entries.extend((records[i], Point(xs[i], ys[i])) for i in range(len(records)))
+        return entries
+
+    def spatial_join_radius(self, other, radius, metric=None):
+        """
+        Join espacial por distancia: recorre el lado con menos registros y
+        sondea el índice del otro lado.
+
+        Returns:
+            list: Lista de tuplas (record_num_self, record_num_other, distance)
+        """
+        if radius <= 0:
+            return []
+
+        metric = normalize_metric(metric, self.metric)
+        own_entries = self.get_all_entries()
+        other_entries = other.get_all_entries()
+
+        if len(own_entries) <= len(other_entries):
+            outer_entries, inner_entries, inner_index, swapped = own_entries, other_entries, other, False
+        else:
+            outer_entries, inner_entries, inner_index, swapped = other_entries, own_entries, self, True
+
+        matches = inner_index.batch_range_search_radius([p for _, p in outer_entries], radius, metric)
+
+        # Los puntos del lado interno ya se leyeron con get_all_entries
+        inner_points = dict(inner_entries)
+
+        pairs = []
+        for (outer_num, outer_point), inner_nums in zip(outer_entries, matches):
+            for inner_num in inner_nums:
+                dist = distance(outer_point, inner_points[inner_num], metric)
+                pairs.append((inner_num, outer_num, dist) if swapped else (outer_num, inner_num, dist))
+
+        pairs.sort(key=lambda p: (p[0], p[2]))
+        return pairs
+
+    # ------------------------------------------------------------------
+    # Mantenimiento
+    # ------------------------------------------------------------------
+
+    @latched
+    def rebuild_index(self):
+        """Reconstruye el índice desde cero leyendo la tabla en una sola pasada."""
+        try:
+            tabla_filename = f"tablas/{self.table_name}.bin"
+            with open(tabla_filename, 'rb') as f:
+                f.seek(struct.calcsize("<i"))
+                data = f.read()
+
+            with open(self.buckets_file, 'wb'):
+                pass
+            self.cells = {}
+
+            # Agrupar por celda en memoria y escribir cada cadena de una vez
+            grouped = {}
+            usable = len(data) - len(data) % self.record_size
+            x_pos = self.index_attr - 1
+            for record_num, values in enumerate(struct.iter_unpack(self.record_format, data[:usable]), 1):
+                if values[-1] != -2:
+                    continue
+                x, y = float(values[x_pos]), float(values[x_pos + 1])
+                grouped.setdefault(self._cell_of(x, y), []).append((record_num, x, y))
+
+            for cell, entries in grouped.items():
+                next_id = -1
+                chunks = [entries[i:i + CELL_CAPACITY] for i in range(0, len(entries), CELL_CAPACITY)]
+                for chunk in reversed(chunks):
+                    bucket = CellBucket(array('i', [e[0] for e in chunk]),
+                                        array('d', [e[1] for e in chunk]),
+                                        array('d', [e[2] for e in chunk]), next_id)
+                    next_id = self._append_bucket(bucket)
+                self.cells[cell] = next_id
+
+            self._save_directory()
+            return True
+
+        except FileNotFoundError:
+            return False
+
+    @latched
+    def get_bounds(self):
+        """
+        Rectángulo cubierto por las celdas ocupadas de la rejilla.
+
+        Returns:
+            tuple: (min_x, min_y, max_x, max_y) o None si no hay celdas
+        """
+        if not self.cells:
+            return None
+        cxs = [cx for cx, _ in self.cells]
+        cys = [cy for _, cy in self.cells]
+        size = self.cell_size
+        return (min(cxs) * size, min(cys) * size, (max(cxs) + 1) * size, (max(cys) + 1) * size)
+
+    @latched
+    def get_stats(self):
+        """
+        Obtiene estadísticas del índice de rejilla.
+
+        Returns:
+            dict: Estadísticas del índice
+        """
+        total_records = 0
+        for cell in self.cells:
+            total_records += len(self._read_cell(cell)[0])
+
+        return {
+            'total_records': total_records,
+            'cells': len(self.cells),
+            'cell_size': self.cell_size,
+            'bucket_capacity': CELL_CAPACITY,
+            'index_files': {
+                'dat': self.buckets_file,
+                'directory': self.directory_file
+            },
+            'table_name': self.table_name,
+            'indexed_attribute': self.index_attr,
+            'index_type': 'Grid File',
+            'metric': self.metric,
+            'operations_supported': [
+                'exact_search', 'range_search',
+                'radius_search', 'knn_search',
+                'batch_radius_search', 'batch_knn_search', 'spatial_join'
+            ]
+        }
+
+    @latched
+    def finalize(self):
+        """Guarda el directorio de celdas."""
+        self._save_directory()
+        return True
+
+    def close(self):
+        """Alias para finalize() - compatibilidad"""
+        return self.finalize()
@@ -2,7 +2,10 @@ import struct
 import os
 import re
 import json
+import threading
 from estructuras.point_class import Point   
+from estructuras.rwlock import latched
+from estructuras.zorder import spatial_hash
 
 FB = 5
 D = 5    
@@ -58,14 +61,21 @@ class ExtendibleHashFile:
         # Configuración estándar del hash
         self.bucket_size = struct.calcsize(f'{FB + 1}i')
         self.index = []  # esto se cargará desde hash_index.dat
+        # Los SELECT concurrentes comparten esta instancia: search recarga el directorio
+        self.latch = threading.RLock()
         
         # Asegurar que los directorios existan
         os.makedirs("tablas", exist_ok=True)
         os.makedirs("indices", exist_ok=True)
         
+        # Los POINT se reparten por código Morton; usan archivos propios para no
+        # mezclarse con índices creados con el hash por distancia al origen
+        self.is_spatial = self._get_attribute_type(index_attr) == 'POINT'
+        prefix = "z" if self.is_spatial else ""
+        
         # Nombres de archivos de índice
-        self.index_file = f"indices/{table_name}_{index_attr}_index.dat"
-        self.buckets_file = f"indices/{table_name}_{index_attr}_buckets.dat"
+        self.index_file = f"indices/{table_name}_{index_attr}_{prefix}index.dat"
+        self.buckets_file = f"indices/{table_name}_{index_attr}_{prefix}buckets.dat"
         
         self.init_files()
 
@@ -94,7 +104,8 @@ class ExtendibleHashFile:
         Obtiene el tipo de dato del atributo según los metadatos.
         
         Args:
-            attr_index (int): Índice del atributo (empezando desde 1)
+            attr_index (int): Índice real del atributo en el struct (empezando desde 1);
+                              los POINT ocupan dos posiciones
             
         Returns:
             str: Tipo de dato del atributo
@@ -102,11 +113,13 @@ class ExtendibleHashFile:
         if not self.table_metadata or 'attributes' not in self.table_metadata:
             return 'UNKNOWN'
         
-        attributes = self.table_metadata['attributes']
-        
-        # attr_index empieza desde 1, pero el array desde 0
-        if 1 <= attr_index <= len(attributes):
-            return attributes[attr_index - 1]['data_type'].upper()
+        # Convertir la posición real en el struct al atributo lógico
+        real_position = 1
+        for attribute in self.table_metadata['attributes']:
+            data_type = attribute['data_type'].upper()
+            if real_position == attr_index:
+                return data_type
+            real_position += 2 if data_type == 'POINT' else 1
         
         return 'UNKNOWN'
     
@@ -175,12 +188,17 @@ class ExtendibleHashFile:
                 current_index = self.index_attr - 1 
                 raw_value = unpacked_data[current_index]
                 
-                # DETECCIÓN INTELIGENTE DE TIPOS:
+                # DETECCIÓN DE TIPOS: por metadatos si existen; si no, dos números
+                # consecutivos se interpretan como POINT
+                if self.table_metadata and 'attributes' in self.table_metadata:
+                    es_point = self.is_spatial
+                else:
+                    es_point = (current_index + 1 < len(unpacked_data) and 
+                                isinstance(raw_value, (int, float)) and
+                                isinstance(unpacked_data[current_index + 1], (int, float)))
                 
-                # CASO 1: POINT - Dos números consecutivos
-                if (current_index + 1 < len(unpacked_data) and 
-                    isinstance(raw_value, (int, float)) and
-                    isinstance(unpacked_data[current_index + 1], (int, float))):
+                # CASO 1: POINT
+                if es_point:
                     
                     x_value = float(raw_value)
                     y_value = float(unpacked_data[current_index + 1])
@@ -210,8 +228,7 @@ class ExtendibleHashFile:
         
         if attribute_type == 'POINT':
             if isinstance(value, Point):
-                distance = value.distance_to_origin()
-                hash_val = int(distance * 1000) % (2 ** D)
+                hash_val = spatial_hash(value, D)
             else:
                 hash_val = 0
         else:
@@ -249,15 +266,36 @@ class ExtendibleHashFile:
                 f.write(Bucket().to_bytes())
                 
         self.load_index()
+        
+        if self.is_spatial:
+            self._build_from_table()
+
+    def _build_from_table(self):
+        """
+        Inserta en un índice recién creado los registros activos que ya existan
+        en la tabla (p. ej. al migrar un índice POINT al hash por código Morton).
+        """
+        if not os.path.exists(self.filename):
+            return
+        
+        with open(self.filename, 'rb') as f:
+            f.seek(self.header_size)
+            data = f.read()
+        
+        usable = len(data) - len(data) % self.record_size
+        for record_num, values in enumerate(struct.iter_unpack(self.record_format, data[:usable]), 1):
+            if values[-1] == -2:
+                self.insert_record(record_num)
 
     def load_index(self):
-        """Carga el índice desde el archivo."""
-        self.index = []
+        """Carga el índice desde el archivo (el directorio se reemplaza de una sola vez)."""
+        index = []
         with open(self.index_file, "r") as f:
             for line in f:
                 if line.strip():
                     prefix, bucket = line.strip().split()
-                    self.index.append(HashIndexEntry(prefix, int(bucket)))
+                    index.append(HashIndexEntry(prefix, int(bucket)))
+        self.index = index
 
     def save_index(self):
         """Guarda el índice en el archivo."""
@@ -265,6 +303,7 @@ class ExtendibleHashFile:
             for entry in self.index:
                 f.write(f"{entry.prefix} {entry.bucket_id}\n")
 
+    @latched
     def insert_record(self, record_num):
         """
         Inserta un número de registro en el índice hash.
@@ -399,6 +438,7 @@ class ExtendibleHashFile:
                 self.write_bucket(bucket_id, bucket)
                 self.write_bucket(overflow_id, Bucket([record_num]))
 
+    @latched
     def search(self, search_value):
         """
         Busca registros que coincidan con el valor de búsqueda en el atributo indexado.
@@ -476,6 +516,7 @@ class ExtendibleHashFile:
         
         return error_response
 
+    @latched
     def delete_record(self, record_num):
         """
         Elimina un registro específico del índice hash.
@@ -1,12 +1,21 @@
 import math
+from array import array
 
 class Point:
-  
+    """
+    Punto 2D. Usa __slots__ para no crear un __dict__ por instancia y guarda
+    la norma (distancia al origen) la primera vez que se calcula, ya que las
+    comparaciones (<, <=, ...) la usan en cada llamada.
+    Los Points se tratan como inmutables: x e y no se modifican tras crearlos.
+    """
+
+    __slots__ = ('x', 'y', '_norm')
     
     def __init__(self, x=0.0, y=0.0):
       
         self.x = float(x)
         self.y = float(y)
+        self._norm = None
     
     def __str__(self):
         """Representación como string del punto."""
@@ -83,7 +92,10 @@ class Point:
     
     def distance_to_origin(self):
         """Calcula la distancia del punto al origen (0, 0)."""
-        return math.sqrt(self.x ** 2 + self.y ** 2)
+        norm = self._norm
+        if norm is None:
+            norm = self._norm = math.hypot(self.x, self.y)
+        return norm
     
     def distance_to(self, other):
         """Calcula la distancia euclidiana a otro punto."""
@@ -178,4 +190,89 @@ class Point:
         if not isinstance(center, Point):
             raise TypeError("Se requiere un objeto Point para center")
         
-        return self.distance_to(center) <= radius
\ No newline at end of file
+        return self.distance_to(center) <= radius
+
+
+class PointArray:
+    """
+    Columna de puntos almacenada en dos buffers contiguos de float64 (x e y).
+    Permite operar sobre coordenadas en bloque sin crear un objeto Point por
+    valor; los Points solo se materializan al indexar o iterar.
+    """
+
+    __slots__ = ('xs', 'ys')
+
+    def __init__(self, xs=None, ys=None):
+        self.xs = array('d', xs if xs is not None else [])
+        self.ys = array('d', ys if ys is not None else [])
+        if len(self.xs) != len(self.ys):
+            raise ValueError("Los buffers de coordenadas deben tener la misma longitud")
+
+    @classmethod
+    def from_points(cls, points):
+        """Crea un PointArray a partir de un iterable de Points."""
+        result = cls()
+        for point in points:
+            result.xs.append(point.x)
+            result.ys.append(point.y)
+        return result
+
+    def append(self, x, y=None):
+        """Agrega un punto, como Point o como par de coordenadas."""
+        if y is None:
+            x, y = x.x, x.y
+        self.xs.append(x)
+        self.ys.append(y)
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __getitem__(self, i):
+        return Point(self.xs[i], self.ys[i])
+
+    def __iter__(self):
+        for x, y in zip(self.xs, self.ys):
+            yield Point(x, y)
+
+    def __repr__(self):
+        return f"PointArray({len(self)} puntos)"
+
+    def coords(self, i):
+        """Retorna la tupla (x, y) de la posición i sin crear un Point."""
+        return self.xs[i], self.ys[i]
+
+    def bounds(self):
+        """
+        Rectángulo mínimo que contiene a todos los puntos.
+
+        Returns:
+            tuple: (min_x, min_y, max_x, max_y) o None si está vacío
+        """
+        if not self.xs:
+            return None
+        return min(self.xs), min(self.ys), max(self.xs), max(self.ys)
+
+    def distances_to(self, center):
+        """
+        Distancias euclidianas desde center a cada punto.
+
+        Returns:
+            array: Buffer float64 con una distancia por punto
+        """
+        cx, cy = center.x, center.y
+        hypot = math.hypot
+        return array('d', [hypot(x - cx, y - cy) for x, y in zip(self.xs, self.ys)])
+
+    def within_radius(self, center, radius):
+        """Posiciones de los puntos a distancia <= radius de center."""
+        cx, cy = center.x, center.y
+        r2 = radius * radius
+        return [i for i, (x, y) in enumerate(zip(self.xs, self.ys))
+                if (x - cx) * (x - cx) + (y - cy) * (y - cy) <= r2]
+
+    def within_rect(self, min_point, max_point):
+        """Posiciones de los puntos dentro del rectángulo [min_point, max_point]."""
+        min_x, min_y = min_point.x, min_point.y
+        max_x, max_y = max_point.x, max_point.y
+        return [i for i, (x, y) in enumerate(zip(self.xs, self.ys))
+                if min_x <= x <= max_x and min_y <= y <= max_y]
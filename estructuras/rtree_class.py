@@ -3,8 +3,15 @@ import os
 import json
 import math
 import pickle
+import threading
+from array import array
 from rtree import index  
 from estructuras.point_class import Point
+from estructuras.rwlock import latched
+from estructuras.distance import (
+    HAVERSINE, normalize_metric, distance, haversine, geo_bounding_boxes,
+    haversine_within, haversine_many
+)
 
 class RTreeFile:
     """
@@ -15,13 +22,20 @@ class RTreeFile:
     1. rangeSearch(point, radio) - Búsqueda por radio
     2. rangeSearch(point, k) - K vecinos más cercanos  
     3. Búsquedas rectangulares tradicionales
+
+    La métrica de distancia puede ser 'euclidean' (plano) o 'haversine'
+    (puntos (lat, lon) en grados, radios y distancias en kilómetros).
     """
     
-    def __init__(self, record_format="<i50sdii", index_attr=2, table_name="Productos", is_key=False):
+    def __init__(self, record_format="<i50sdii", index_attr=2, table_name="Productos", is_key=False,
+                 metric='euclidean'):
         self.record_format = record_format
         self.index_attr = index_attr  # El atributo a indexar (debe ser Point)
         self.table_name = table_name
         self.is_key = is_key  # Para Points normalmente False
+        self.metric = normalize_metric(metric)
+        # libspatialindex no admite consultas concurrentes sobre el mismo índice
+        self.latch = threading.RLock()
         
         # Cargar metadata de la tabla
         self.table_metadata = self._load_table_metadata()
@@ -50,6 +64,7 @@ class RTreeFile:
         self.id_to_point = {}
         
         # Inicializar el índice RTree
+        self.properties = p
         self._initialize_rtree(p)
         
         print(f"📍 RTree inicializado: {self.index_filename}")
@@ -67,7 +82,9 @@ class RTreeFile:
                 self.id_to_point = {}
                 
         except Exception as e:
-            # Crear índice en memoria como respaldo
+            # Crear índice en memoria como respaldo (no persiste entre reinicios)
+            print(f"Advertencia: no se pudo abrir el R-Tree en disco ({e}); "
+                  f"se usará un índice en memoria. Considere INDEX grid para {self.table_name}.")
             self.rtree_index = index.Index(properties=properties)
             self.id_to_point = {}
 
@@ -181,6 +198,7 @@ class RTreeFile:
         except Exception as e:
             return None
 
+    @latched
     def insert_record(self, record_num):
         """
         Inserta un registro en el R-Tree.
@@ -213,6 +231,7 @@ class RTreeFile:
             print(f"Error al insertar en RTree: {e}")
             return False
 
+    @latched
     def delete_record(self, record_num):
         """
         Elimina un registro del R-Tree.
@@ -246,6 +265,7 @@ class RTreeFile:
             print(f"Error al eliminar del RTree: {e}")
             return None
 
+    @latched
     def search(self, target_point):
         """
         Busca registros en la posición exacta del punto.
@@ -279,6 +299,7 @@ class RTreeFile:
         except Exception as e:
             return []
 
+    @latched
     def range_search(self, min_point, max_point):
         """
         Busca registros en un rango rectangular.
@@ -313,7 +334,8 @@ class RTreeFile:
         except Exception as e:
             return []
 
-    def range_search_radius(self, center_point, radius):
+    @latched
+    def range_search_radius(self, center_point, radius, metric=None):
         """
         OPERACIÓN REQUERIDA 1: Búsqueda por rango con radio.
         rangeSearch(point, radio) - Búsqueda por radio
@@ -321,6 +343,7 @@ class RTreeFile:
         Args:
             center_point (Point): Punto central de la búsqueda
             radius (float): Radio de búsqueda
+            metric (str): Métrica de la consulta (por defecto la del índice)
             
         Returns:
             list: Lista de números de registro dentro del radio
@@ -332,6 +355,9 @@ class RTreeFile:
             if radius <= 0:
                 return []
             
+            if normalize_metric(metric, self.metric) == HAVERSINE:
+                return self._geo_radius_search(center_point.x, center_point.y, radius)
+            
             # Crear bounding box que contiene el círculo
             bbox = (
                 center_point.x - radius,
@@ -361,7 +387,8 @@ class RTreeFile:
         except Exception as e:
             return []
 
-    def range_search_knn(self, center_point, k):
+    @latched
+    def range_search_knn(self, center_point, k, metric=None):
         """
         🌟 OPERACIÓN REQUERIDA 2: Búsqueda de K vecinos más cercanos.
         rangeSearch(point, k) - K vecinos más cercanos
@@ -369,6 +396,7 @@ class RTreeFile:
         Args:
             center_point (Point): Punto central de la búsqueda
             k (int): Número de vecinos más cercanos a buscar
+            metric (str): Métrica de la consulta (por defecto la del índice)
             
         Returns:
             list: Lista de tuplas (record_num, distance) ordenadas por distancia
@@ -380,6 +408,9 @@ class RTreeFile:
             if k <= 0:
                 return []
             
+            if normalize_metric(metric, self.metric) == HAVERSINE:
+                return self._geo_knn_search(center_point.x, center_point.y, k)
+            
             # Punto como coordenadas para la búsqueda KNN
             point_coords = (center_point.x, center_point.y)
             
@@ -408,20 +439,277 @@ class RTreeFile:
         except Exception as e:
             return []
 
-    def range_search_knn_simple(self, center_point, k):
+    @latched
+    def range_search_knn_simple(self, center_point, k, metric=None):
         """
         Versión simplificada de KNN que retorna solo los IDs de registro.
         
         Args:
             center_point (Point): Punto central de la búsqueda
             k (int): Número de vecinos más cercanos
+            metric (str): Métrica de la consulta (por defecto la del índice)
             
         Returns:
             list: Lista de números de registro ordenados por distancia
         """
-        knn_results = self.range_search_knn(center_point, k)
+        knn_results = self.range_search_knn(center_point, k, metric)
         return [record_num for record_num, distance in knn_results]
 
+    def _geo_candidates(self, lat, lon, radius_km):
+        """
+        Filtro grueso geodésico: candidatos dentro de los rectángulos que
+        contienen el círculo, con sus coordenadas copiadas a buffers contiguos.
+
+        Returns:
+            tuple: (record_nums, lats, lons)
+        """
+        intersection = self.rtree_index.intersection
+        cache = self.id_to_point
+        get_point = self.get_attribute_from_record_num
+
+        record_nums = []
+        lats = array('d')
+        lons = array('d')
+        for bbox in geo_bounding_boxes(lat, lon, radius_km):
+            for record_num in intersection(bbox):
+                point = cache.get(record_num) or get_point(record_num)
+                if point is None:
+                    continue
+                record_nums.append(record_num)
+                lats.append(point.x)
+                lons.append(point.y)
+        return record_nums, lats, lons
+
+    def _geo_radius_search(self, lat, lon, radius_km):
+        """Búsqueda por radio geodésico (km) alrededor de (lat, lon)."""
+        record_nums, lats, lons = self._geo_candidates(lat, lon, radius_km)
+        return [record_nums[i] for i in haversine_within(lat, lon, lats, lons, radius_km)]
+
+    def _geo_knn_search(self, lat, lon, k):
+        """
+        K vecinos más cercanos por distancia geodésica.
+        Los k vecinos planos dan una cota superior de la k-ésima distancia real;
+        una búsqueda por radio con esa cota contiene a los k vecinos correctos.
+
+        Returns:
+            list: Lista de tuplas (record_num, distancia_km) ordenadas por distancia
+        """
+        cache = self.id_to_point
+        get_point = self.get_attribute_from_record_num
+
+        nearest_ids = list(self.rtree_index.nearest((lat, lon), k))
+        if not nearest_ids:
+            return []
+
+        if len(nearest_ids) < k:
+            # El índice tiene menos de k puntos: todos son vecinos
+            record_nums = []
+            lats = array('d')
+            lons = array('d')
+            for record_num in nearest_ids:
+                point = cache.get(record_num) or get_point(record_num)
+                if point is None:
+                    continue
+                record_nums.append(record_num)
+                lats.append(point.x)
+                lons.append(point.y)
+        else:
+            bound = 0.0
+            for record_num in nearest_ids:
+                point = cache.get(record_num) or get_point(record_num)
+                if point is not None:
+                    bound = max(bound, haversine(lat, lon, point.x, point.y))
+            # Margen para no perder el punto que está justo en la cota
+            bound = bound * (1 + 1e-9) + 1e-9
+            record_nums, lats, lons = self._geo_candidates(lat, lon, bound)
+
+        distances = haversine_many(lat, lon, lats, lons)
+        results = sorted(zip(record_nums, distances), key=lambda x: x[1])
+        return results[:k]
+
+    def _spatial_order(self, center_points):
+        """
+        Orden de procesamiento de un lote de consultas: por coordenadas (x, y),
+        para que consultas vecinas reutilicen los mismos nodos del árbol.
+        """
+        return sorted(range(len(center_points)),
+                      key=lambda i: (center_points[i].x, center_points[i].y))
+
+    @latched
+    def batch_range_search_radius(self, center_points, radius, metric=None):
+        """
+        Búsqueda por radio para un lote de puntos en una sola llamada.
+        Index nested-loop: cada punto sondea el R-Tree, pero el costo por
+        consulta (validaciones, lookups de métodos, sqrt) se paga una sola vez.
+
+        Args:
+            center_points (list): Lista de Points de consulta
+            radius (float | list): Radio común o un radio por cada punto
+            metric (str): Métrica de la consulta (por defecto la del índice)
+
+        Returns:
+            list: Una lista de números de registro por cada punto de consulta,
+                  en el mismo orden que center_points
+
+        Raises:
+            ValueError: Si se pasa una lista de radios de distinto largo que center_points
+        """
+        if isinstance(radius, (list, tuple)) and len(radius) != len(center_points):
+            raise ValueError(f"Se recibieron {len(radius)} radios para {len(center_points)} puntos")
+
+        if isinstance(radius, (list, tuple)):
+            radii = [float(r) for r in radius]
+        else:
+            radii = [float(radius)] * len(center_points)
+
+        results = [[] for _ in center_points]
+
+        if normalize_metric(metric, self.metric) == HAVERSINE:
+            for i in self._spatial_order(center_points):
+                center = center_points[i]
+                if isinstance(center, Point) and radii[i] > 0:
+                    results[i] = self._geo_radius_search(center.x, center.y, radii[i])
+            return results
+
+        # Referencias locales para el bucle caliente
+        intersection = self.rtree_index.intersection
+        cache = self.id_to_point
+        get_point = self.get_attribute_from_record_num
+
+        for i in self._spatial_order(center_points):
+            center = center_points[i]
+            r = radii[i]
+            if not isinstance(center, Point) or r <= 0:
+                continue
+
+            cx, cy = center.x, center.y
+            r2 = r * r
+            matches = results[i]
+
+            for record_num in intersection((cx - r, cy - r, cx + r, cy + r)):
+                point = cache.get(record_num) or get_point(record_num)
+                if point is None:
+                    continue
+                dx = point.x - cx
+                dy = point.y - cy
+                if dx * dx + dy * dy <= r2:
+                    matches.append(record_num)
+
+        return results
+
+    @latched
+    def batch_range_search_knn(self, center_points, k, metric=None):
+        """
+        K vecinos más cercanos para un lote de puntos en una sola llamada.
+
+        Args:
+            center_points (list): Lista de Points de consulta
+            k (int): Número de vecinos por punto
+            metric (str): Métrica de la consulta (por defecto la del índice)
+
+        Returns:
+            list: Una lista de tuplas (record_num, distance) por cada punto,
+                  en el mismo orden que center_points
+        """
+        if k <= 0:
+            return [[] for _ in center_points]
+
+        results = [[] for _ in center_points]
+
+        if normalize_metric(metric, self.metric) == HAVERSINE:
+            for i in self._spatial_order(center_points):
+                center = center_points[i]
+                if isinstance(center, Point):
+                    results[i] = self._geo_knn_search(center.x, center.y, k)
+            return results
+
+        nearest = self.rtree_index.nearest
+        cache = self.id_to_point
+        get_point = self.get_attribute_from_record_num
+
+        for i in self._spatial_order(center_points):
+            center = center_points[i]
+            if not isinstance(center, Point):
+                continue
+
+            cx, cy = center.x, center.y
+            neighbors = []
+            for record_num in nearest((cx, cy), k):
+                point = cache.get(record_num) or get_point(record_num)
+                if point is None:
+                    continue
+                neighbors.append((record_num, math.hypot(point.x - cx, point.y - cy)))
+
+            # nearest() puede devolver más de k elementos si hay empates
+            neighbors.sort(key=lambda x: x[1])
+            results[i] = neighbors[:k]
+
+        return results
+
+    @latched
+    def get_all_entries(self):
+        """
+        Obtiene todos los registros indexados con su punto.
+
+        Returns:
+            list: Lista de tuplas (record_num, Point)
+        """
+        if len(self.rtree_index) == 0:
+            return []
+
+        entries = []
+        for record_num in self.rtree_index.intersection(self.rtree_index.bounds):
+            point = self.id_to_point.get(record_num) or self.get_attribute_from_record_num(record_num)
+            if point is not None:
+                entries.append((record_num, point))
+        return entries
+
+    def spatial_join_radius(self, other, radius, metric=None):
+        """
+        Join espacial por distancia entre este índice y otro índice espacial.
+        Recorre el lado con menos registros y sondea el índice del otro lado
+        con búsquedas por radio en lote (index nested-loop join).
+
+        Args:
+            other (RTreeFile): Índice espacial de la otra tabla
+            radius (float): Distancia máxima entre los puntos de cada par
+            metric (str): Métrica del join (por defecto la de este índice)
+
+        Returns:
+            list: Lista de tuplas (record_num_self, record_num_other, distance)
+        """
+        if radius <= 0:
+            return []
+
+        metric = normalize_metric(metric, self.metric)
+        own_entries = self.get_all_entries()
+        other_entries = other.get_all_entries()
+
+        # El lado pequeño dirige el join, el grande se sondea por índice
+        if len(own_entries) <= len(other_entries):
+            outer_entries, inner_entries, inner_index, swapped = own_entries, other_entries, other, False
+        else:
+            outer_entries, inner_entries, inner_index, swapped = other_entries, own_entries, self, True
+
+        outer_points = [point for _, point in outer_entries]
+        matches = inner_index.batch_range_search_radius(outer_points, radius, metric)
+
+        # Los puntos del lado interno ya se leyeron con get_all_entries
+        inner_points = dict(inner_entries)
+
+        pairs = []
+        for (outer_num, outer_point), inner_nums in zip(outer_entries, matches):
+            for inner_num in inner_nums:
+                dist = distance(outer_point, inner_points[inner_num], metric)
+                if swapped:
+                    pairs.append((inner_num, outer_num, dist))
+                else:
+                    pairs.append((outer_num, inner_num, dist))
+
+        pairs.sort(key=lambda p: (p[0], p[2]))
+        return pairs
+
+    @latched
     def finalize(self):
         """
         Finaliza el índice guardando metadatos y cerrando archivos.
@@ -440,6 +728,7 @@ class RTreeFile:
         except Exception as e:
             return False
 
+    @latched
     def close(self):
         """Alias para finalize() - compatibilidad"""
         return self.finalize()
@@ -452,6 +741,35 @@ class RTreeFile:
         except:
             pass
 
+    @latched
+    def get_bounds(self):
+        """
+        Rectángulo que contiene todos los puntos indexados (MBR de la raíz).
+        
+        Returns:
+            tuple: (min_x, min_y, max_x, max_y) o None si el índice está vacío
+        """
+        try:
+            min_x, min_y, max_x, max_y = self.rtree_index.bounds
+        except Exception:
+            return None
+        if min_x > max_x or min_y > max_y:
+            return None
+        return (min_x, min_y, max_x, max_y)
+
+    @latched
+    def sync(self):
+        """Escribe en disco el índice y el mapeo ID->Point (para que otros procesos los vean)."""
+        self.rtree_index.flush()
+        self._save_metadata()
+
+    @latched
+    def reload(self):
+        """Vuelve a abrir el índice desde disco, descartando lo que había en memoria."""
+        self.rtree_index.close()
+        self._initialize_rtree(self.properties)
+
+    @latched
     def get_stats(self):
         """
         Obtiene estadísticas del índice RTree.
@@ -491,9 +809,11 @@ class RTreeFile:
                 'table_name': self.table_name,
                 'indexed_attribute': self.index_attr,
                 'index_type': 'R-Tree (R* variant)',
+                'metric': self.metric,
                 'operations_supported': [
                     'exact_search', 'range_search', 
-                    'radius_search', 'knn_search'
+                    'radius_search', 'knn_search',
+                    'batch_radius_search', 'batch_knn_search', 'spatial_join'
                 ]
             }
             
@@ -502,6 +822,7 @@ class RTreeFile:
         except Exception as e:
             return {'error': str(e)}
 
+    @latched
     def rebuild_index(self):
         """
         Reconstruye el índice desde cero leyendo todos los registros de la tabla.
@@ -516,33 +837,29 @@ class RTreeFile:
             tabla_header_format = "<i"
             tabla_header_size = struct.calcsize(tabla_header_format)
             
+            # Lectura secuencial única: las coordenadas se toman directamente
+            # de las tuplas desempaquetadas, sin volver a abrir el archivo por registro
             with open(tabla_filename, 'rb') as f:
-                # Determinar número de registros
-                file_size = os.path.getsize(tabla_filename)
-                num_records = (file_size - tabla_header_size) // self.record_size
-                
-                rebuilt_count = 0
-                
-                # Insertar cada registro válido en el índice
-                for record_num in range(1, num_records + 1):
-                    # Leer registro para verificar que existe y no está eliminado
-                    position = tabla_header_size + (record_num - 1) * self.record_size
-                    f.seek(position)
-                    record_data = f.read(self.record_size)
-                    
-                    if record_data and len(record_data) == self.record_size:
-                        # Verificar que no esté eliminado (next != -2)
-                        unpacked = struct.unpack(self.record_format, record_data)
-                        next_value = unpacked[-1]  # Último valor es 'next'
-                        
-                        if next_value == -2:  # Registro activo
-                            if self.insert_record(record_num):
-                                rebuilt_count += 1
-                
-                # Guardar metadatos
-                self._save_metadata()
-                
-                return True
+                f.seek(tabla_header_size)
+                data = f.read()
+
+            usable = len(data) - len(data) % self.record_size
+            x_pos = self.index_attr - 1
+            insert = self.rtree_index.insert
+
+            for record_num, values in enumerate(struct.iter_unpack(self.record_format, data[:usable]), 1):
+                # Solo registros activos (next == -2)
+                if values[-1] != -2:
+                    continue
+                x = float(values[x_pos])
+                y = float(values[x_pos + 1])
+                insert(record_num, (x, y, x, y))
+                self.id_to_point[record_num] = Point(x, y)
+
+            # Guardar metadatos
+            self._save_metadata()
+
+            return True
                 
         except FileNotFoundError:
             return False
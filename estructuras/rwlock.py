@@ -0,0 +1,214 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin locks de archivo entre procesos
+    fcntl = None
+
+
+class ReadWriteLock:
+    """
+    Lock de lectores/escritores reentrante con preferencia a escritores.
+
+    Varios hilos pueden leer a la vez; un escritor espera a que salgan los
+    lectores y, mientras espera, no entran lectores nuevos. Un hilo que ya
+    tiene el lock (de lectura o de escritura) puede volver a tomarlo, y el
+    escritor puede además leer. Pasar de lectura a escritura no está
+    permitido porque dos hilos haciéndolo a la vez se bloquearían entre sí.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    def _read_depth(self):
+        return getattr(self._local, 'depth', 0)
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        depth = self._read_depth()
+        if self._writer == me or depth:
+            # Reentrada: no se espera a los escritores en cola
+            self._local.depth = depth + 1
+            return
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        self._local.depth = 1
+
+    def release_read(self):
+        depth = self._read_depth()
+        if depth <= 0:
+            raise RuntimeError("release_read sin acquire_read")
+        self._local.depth = depth - 1
+        if depth == 1 and self._writer != threading.get_ident():
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if self._read_depth():
+                raise RuntimeError("No se puede pasar de lectura a escritura")
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("release_write desde un hilo que no es el escritor")
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class ProcessSharedLock(ReadWriteLock):
+    """
+    ReadWriteLock que además coordina procesos con flock sobre un archivo.
+
+    El primer lector del proceso toma el archivo en modo compartido y el
+    último lo suelta; el escritor lo toma en modo exclusivo. Al entrar se
+    compara la versión de la tabla en el catálogo con la última vista: si
+    otro proceso la modificó se llama a on_stale para descartar los cachés
+    en memoria. Al salir, el escritor llama a on_sync (persistir lo que
+    quedó en memoria) y sube la versión.
+    """
+
+    def __init__(self, lock_path, catalog, table_name, on_stale, on_sync):
+        if fcntl is None:
+            raise RuntimeError("El modo multiproceso requiere fcntl (Linux/macOS)")
+        super().__init__()
+        self.catalog = catalog
+        self.table_name = table_name
+        self.on_stale = on_stale
+        self.on_sync = on_sync
+        self.seen_version = catalog.table_version(table_name)
+        self._file = open(lock_path, 'a+')
+        # Lectores del proceso que tienen el archivo tomado en modo compartido
+        self._file_mutex = threading.Lock()
+        self._file_readers = 0
+
+    def _refresh(self):
+        version = self.catalog.table_version(self.table_name)
+        if version != self.seen_version:
+            self.on_stale()
+            self.seen_version = version
+
+    def _enter_shared(self):
+        with self._file_mutex:
+            if self._file_readers == 0:
+                fcntl.flock(self._file, fcntl.LOCK_SH)
+                try:
+                    self._refresh()
+                except Exception:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+                    raise
+            self._file_readers += 1
+
+    def _leave_shared(self):
+        with self._file_mutex:
+            self._file_readers -= 1
+            if self._file_readers == 0:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def acquire_read(self):
+        outermost = not self._read_depth() and self._writer != threading.get_ident()
+        super().acquire_read()
+        if outermost:
+            try:
+                self._enter_shared()
+            except Exception:
+                super().release_read()
+                raise
+
+    def release_read(self):
+        # El archivo se suelta antes que el lock del proceso: cuando un escritor
+        # del mismo proceso entra, ningún lector tiene el archivo tomado
+        if self._read_depth() == 1 and self._writer != threading.get_ident():
+            self._leave_shared()
+        super().release_read()
+
+    def acquire_write(self):
+        super().acquire_write()
+        if self._write_depth == 1:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+                self._refresh()
+            except Exception:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+                super().release_write()
+                raise
+
+    def release_write(self):
+        if self._write_depth == 1 and self._writer == threading.get_ident():
+            try:
+                self.on_sync()
+                self.seen_version = self.catalog.bump_table(self.table_name)
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+        super().release_write()
+
+    def close(self):
+        self._file.close()
+
+
+def read_locked(method):
+    """Ejecuta el método con self.lock tomado en modo lectura."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def write_locked(method):
+    """Ejecuta el método con self.lock tomado en modo escritura."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def latched(method):
+    """Ejecuta el método con self.latch (un threading.RLock del índice) tomado."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.latch:
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,190 @@
+import math
+import hashlib
+from bisect import bisect_right
+
+# Precisión del HyperLogLog: 2^11 registros (~2.3% de error estándar)
+HLL_PRECISION = 11
+HISTOGRAM_BUCKETS = 32
+SPATIAL_GRID_SIZE = 16
+
+
+class HyperLogLog:
+    """
+    Estimador de cantidad de valores distintos (NDV) en memoria constante.
+
+    Cada valor se resume con un hash de 64 bits: los primeros bits eligen un
+    registro y en él se guarda la posición del primer bit 1 del resto. El
+    hash es estable entre procesos para poder persistir los registros.
+    """
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+
+    @staticmethod
+    def _hash(value):
+        digest = hashlib.blake2b(repr(value).encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+
+    def add(self, value):
+        """Agrega un valor al sketch."""
+        h = self._hash(value)
+        index = h & (self.m - 1)
+        rest = h >> self.precision
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        """Cantidad estimada de valores distintos."""
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Corrección para cardinalidades pequeñas (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other):
+        """Combina otro sketch de la misma precisión (unión de conjuntos)."""
+        if other.precision != self.precision:
+            raise ValueError("Los HyperLogLog deben tener la misma precisión")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def to_dict(self):
+        return {'precision': self.precision, 'registers': self.registers.hex()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['precision'], bytes.fromhex(data['registers']))
+
+
+def equi_depth_histogram(sorted_values, buckets=HISTOGRAM_BUCKETS):
+    """
+    Histograma de igual profundidad: cada bucket tiene aproximadamente la
+    misma cantidad de valores y sus límites son cuantiles de la columna.
+
+    Args:
+        sorted_values (list): Valores numéricos ordenados
+        buckets (int): Cantidad máxima de buckets
+
+    Returns:
+        dict: {'bounds': [b0, ..., bk], 'counts': [c1, ..., ck]} o None si no hay valores
+    """
+    n = len(sorted_values)
+    if n == 0:
+        return None
+    k = min(buckets, n)
+    bounds = [sorted_values[i * n // k] for i in range(k)] + [sorted_values[-1]]
+    counts = [(i + 1) * n // k - i * n // k for i in range(k)]
+    return {'bounds': bounds, 'counts': counts}
+
+
+def histogram_add(histogram, value):
+    """Cuenta un valor nuevo en su bucket, extendiendo los extremos si hace falta."""
+    bounds = histogram['bounds']
+    if value < bounds[0]:
+        bounds[0] = value
+    elif value > bounds[-1]:
+        bounds[-1] = value
+    bucket = min(max(bisect_right(bounds, value) - 1, 0), len(histogram['counts']) - 1)
+    histogram['counts'][bucket] += 1
+
+
+def histogram_range_fraction(histogram, low, high):
+    """
+    Fracción estimada de valores en [low, high], interpolando linealmente
+    dentro de cada bucket.
+    """
+    bounds = histogram['bounds']
+    counts = histogram['counts']
+    total = sum(counts)
+    if total == 0 or high < low:
+        return 0.0
+
+    selected = 0.0
+    for i, count in enumerate(counts):
+        lo, hi = bounds[i], bounds[i + 1]
+        if high < lo or low > hi:
+            continue
+        if hi == lo:
+            selected += count
+        else:
+            overlap = min(high, hi) - max(low, lo)
+            selected += count * max(0.0, overlap) / (hi - lo)
+    return min(1.0, selected / total)
+
+
+def spatial_histogram(xs, ys, size=SPATIAL_GRID_SIZE):
+    """
+    Histograma espacial: rejilla size x size sobre el rectángulo de los puntos
+    con la cantidad de puntos por celda.
+
+    Returns:
+        dict: {'bbox': [min_x, min_y, max_x, max_y], 'size', 'counts'} o None si no hay puntos
+    """
+    if not xs:
+        return None
+    bbox = [min(xs), min(ys), max(xs), max(ys)]
+    histogram = {'bbox': bbox, 'size': size, 'counts': [0] * (size * size)}
+    for x, y in zip(xs, ys):
+        spatial_histogram_add(histogram, x, y)
+    return histogram
+
+
+def _grid_cell(histogram, x, y):
+    min_x, min_y, max_x, max_y = histogram['bbox']
+    size = histogram['size']
+    width = (max_x - min_x) or 1.0
+    height = (max_y - min_y) or 1.0
+    cx = min(size - 1, max(0, int((x - min_x) / width * size)))
+    cy = min(size - 1, max(0, int((y - min_y) / height * size)))
+    return cx, cy
+
+
+def spatial_histogram_add(histogram, x, y):
+    """Cuenta un punto en su celda (los puntos fuera del rectángulo van a la celda del borde)."""
+    cx, cy = _grid_cell(histogram, x, y)
+    histogram['counts'][cy * histogram['size'] + cx] += 1
+
+
+def _axis_overlap(q0, q1, c0, c1):
+    """Fracción del intervalo [c0, c1] cubierta por [q0, q1]."""
+    if c1 == c0:
+        return 1.0 if q0 <= c0 <= q1 else 0.0
+    return max(0.0, min(q1, c1) - max(q0, c0)) / (c1 - c0)
+
+
+def spatial_rect_fraction(histogram, min_x, min_y, max_x, max_y):
+    """Fracción estimada de puntos dentro del rectángulo, con densidad uniforme por celda."""
+    counts = histogram['counts']
+    total = sum(counts)
+    if total == 0 or max_x < min_x or max_y < min_y:
+        return 0.0
+
+    bx0, by0, bx1, by1 = histogram['bbox']
+    size = histogram['size']
+    cell_w = (bx1 - bx0) / size
+    cell_h = (by1 - by0) / size
+
+    selected = 0.0
+    for cy in range(size):
+        y0 = by0 + cy * cell_h
+        fy = _axis_overlap(min_y, max_y, y0, y0 + cell_h)
+        if not fy:
+            continue
+        for cx in range(size):
+            count = counts[cy * size + cx]
+            if count:
+                x0 = bx0 + cx * cell_w
+                selected += count * fy * _axis_overlap(min_x, max_x, x0, x0 + cell_w)
+    return min(1.0, selected / total)
+
+
+def spatial_radius_fraction(histogram, x, y, radius):
+    """Fracción estimada de puntos a distancia <= radius de (x, y)."""
+    square = spatial_rect_fraction(histogram, x - radius, y - radius, x + radius, y + radius)
+    # El círculo ocupa pi/4 del cuadrado que lo contiene
+    return square * math.pi / 4
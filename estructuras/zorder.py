@@ -0,0 +1,121 @@
+import struct
+
+# Bits por eje usados en el código Morton (dos ejes -> clave de 64 bits)
+CELL_BITS = 32
+MAX_RANGES = 32
+
+_SIGN_BIT = 1 << 63
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+def ordered_bits(value):
+    """
+    Transforma un double en un entero de 64 bits que conserva el orden:
+    a <= b  <=>  ordered_bits(a) <= ordered_bits(b).
+    """
+    bits = struct.unpack('>Q', struct.pack('>d', float(value) + 0.0))[0]
+    if bits & _SIGN_BIT:
+        return ~bits & _MASK64
+    return bits | _SIGN_BIT
+
+
+def cell(value):
+    """Celda (entero de CELL_BITS bits) de una coordenada, monótona en el valor."""
+    return ordered_bits(value) >> (64 - CELL_BITS)
+
+
+def _spread(v):
+    """Intercala ceros entre los 32 bits de v (bit i -> bit 2i)."""
+    v &= 0xFFFFFFFF
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    v = (v | (v << 1)) & 0x5555555555555555
+    return v
+
+
+def interleave(cx, cy):
+    """Código Morton de una celda: bits de x en posiciones impares, de y en pares."""
+    return (_spread(cx) << 1) | _spread(cy)
+
+
+def morton(point):
+    """Código Morton (Z-order) de 64 bits de un Point."""
+    return interleave(cell(point.x), cell(point.y))
+
+
+def spatial_key(point):
+    """
+    Clave de orden para un Point en índices ordenados: (z, x, y).
+    El código Morton agrupa puntos cercanos; x e y desempatan dentro de una celda.
+    """
+    return (morton(point), point.x, point.y)
+
+
+def spatial_hash(point, bits):
+    """
+    Hash de `bits` bits de un Point a partir de su código Morton completo
+    (64 bits por eje), mezclado multiplicativamente para repartir los buckets.
+    """
+    full = (interleave(ordered_bits(point.x) >> 32, ordered_bits(point.y) >> 32) ^
+            interleave(ordered_bits(point.x) & 0xFFFFFFFF, ordered_bits(point.y) & 0xFFFFFFFF))
+    return ((full * _GOLDEN) & _MASK64) >> (64 - bits)
+
+
+def zorder_ranges(min_point, max_point, max_ranges=MAX_RANGES):
+    """
+    Descompone el rectángulo [min_point, max_point] en intervalos de códigos Morton.
+
+    Se subdivide el espacio como un quadtree nivel por nivel; los cuadrantes
+    contenidos en el rectángulo son intervalos exactos y los que lo cortan se
+    siguen dividiendo mientras no se supere max_ranges. Si se alcanza el límite,
+    los cuadrantes parciales se emiten completos (sobreaproximación), por lo que
+    los candidatos deben filtrarse luego con el rectángulo real.
+
+    Returns:
+        list: Intervalos (z_min, z_max) ordenados y disjuntos
+    """
+    x0, x1 = cell(min_point.x), cell(max_point.x)
+    y0, y1 = cell(min_point.y), cell(max_point.y)
+    if x0 > x1 or y0 > y1:
+        return []
+
+    full = []
+    partial = [(0, 0, CELL_BITS)]
+
+    while partial:
+        new_full = []
+        children = []
+        for qx, qy, bits in partial:
+            half = bits - 1
+            size = 1 << half
+            for cx in (qx, qx + size):
+                for cy in (qy, qy + size):
+                    cx_end = cx + size - 1
+                    cy_end = cy + size - 1
+                    if cx > x1 or cx_end < x0 or cy > y1 or cy_end < y0:
+                        continue
+                    if x0 <= cx and cx_end <= x1 and y0 <= cy and cy_end <= y1:
+                        new_full.append((cx, cy, half))
+                    else:
+                        children.append((cx, cy, half))
+
+        if len(full) + len(new_full) + len(children) > max_ranges:
+            full.extend(partial)
+            break
+
+        full.extend(new_full)
+        partial = children
+
+    ranges = sorted((interleave(qx, qy), interleave(qx, qy) + (1 << (2 * bits)) - 1)
+                    for qx, qy, bits in full)
+
+    merged = []
+    for lo, hi in ranges:
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return merged
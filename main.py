@@ -1,16 +1,49 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from typing import Any, List, Literal, Optional
 import os
 import time
 import json
+import asyncio
+import threading
+import io
+import csv
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from sql import SQLTableManager
 from tabla import TableStorageManager
 from estructuras.point_class import Point
 
+# orjson es opcional: si no está instalado se usa json de la biblioteca estándar
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class SQLRequest(BaseModel):
     sql: str
+    params: Optional[List[Any]] = None
+    timeout: Optional[float] = None
+    # "columnar": {"columns": [...], "rows": [[...]]} con POINT como [x, y]
+    format: Literal['rows', 'columnar'] = 'rows'
+
+# Pool de hilos del motor: el trabajo de archivos e índices no corre en el event loop.
+# SQL_QUEUE_SIZE limita las consultas en espera; al superarse se responde 503.
+SQL_WORKERS = int(os.environ.get('BD2_SQL_WORKERS', '4'))
+SQL_QUEUE_SIZE = int(os.environ.get('BD2_SQL_QUEUE_SIZE', '32'))
+SQL_TIMEOUT = float(os.environ.get('BD2_SQL_TIMEOUT', '30'))
+# /sql/stream: registros leídos por bloque y bloques en espera de ser enviados al cliente
+STREAM_CHUNK_SIZE = 1000
+STREAM_QUEUE_SIZE = 8
+# Varios workers de uvicorn sobre el mismo directorio de tablas
+MULTIPROCESS = os.environ.get('BD2_MULTIPROCESS', '0') == '1'
+# Filas de resultados de SELECT que puede guardar la caché del motor (0, por defecto, la desactiva)
+RESULT_CACHE_ROWS = int(os.environ.get('BD2_RESULT_CACHE_ROWS', '0'))
+# Hilos para ejecutar a la vez los SELECT consecutivos de una misma instrucción
+STATEMENT_WORKERS = int(os.environ.get('BD2_STATEMENT_WORKERS', '4'))
 
 app = FastAPI(title="BD2", version="1.0.0")
 
@@ -27,6 +60,52 @@ app.add_middleware(
 )
 
 sql_manager = None
+engine_pool = None
+engine_slots = threading.BoundedSemaphore(SQL_WORKERS + SQL_QUEUE_SIZE)
+
+def _get_engine_pool():
+    """Crea el pool de hilos del motor la primera vez que se usa."""
+    global engine_pool
+    if engine_pool is None:
+        engine_pool = ThreadPoolExecutor(max_workers=SQL_WORKERS, thread_name_prefix='bd2-engine')
+    return engine_pool
+
+async def run_in_engine(func, *args, timeout=None):
+    """
+    Ejecuta func(*args) en el pool del motor sin bloquear el event loop.
+    
+    Args:
+        func: Función síncrona que accede a tablas o índices
+        timeout (float, optional): Segundos de espera; por defecto SQL_TIMEOUT (nunca mayor)
+        
+    Returns:
+        Resultado de func
+        
+    Raises:
+        HTTPException: 503 si la cola está llena, 504 si se agota el tiempo
+    """
+    if not engine_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado: demasiadas consultas en espera",
+            headers={"Retry-After": "1"}
+        )
+    
+    try:
+        future = _get_engine_pool().submit(func, *args)
+    except Exception:
+        engine_slots.release()
+        raise
+    # El lugar en la cola se libera cuando el hilo termina, aunque el cliente ya no espere
+    future.add_done_callback(lambda _: engine_slots.release())
+    
+    limit = SQL_TIMEOUT if timeout is None else min(timeout, SQL_TIMEOUT)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=limit)
+    except asyncio.TimeoutError:
+        # Si todavía no empezó, no se ejecuta; si ya empezó, termina en segundo plano
+        future.cancel()
+        raise HTTPException(status_code=504, detail=f"La consulta superó el tiempo límite ({limit}s)")
 
 def point_serializer(obj):
     """
@@ -54,18 +133,49 @@ def serialize_records_data(records_data):
     Returns:
         Lista de registros serializados
     """
-    serialized_records = []
-    
-    for record in records_data:
-        serialized_record = {}
-        for key, value in record.items():
-            if isinstance(value, Point):
-                serialized_record[key] = point_serializer(value)
-            else:
-                serialized_record[key] = value
-        serialized_records.append(serialized_record)
+    return [
+        {key: point_serializer(value) if isinstance(value, Point) else value for key, value in record.items()}
+        for record in records_data
+    ]
+
+def compact_value(value):
+    """Valor para el formato columnar: POINT como [x, y], el resto sin cambios."""
+    return [value.x, value.y] if isinstance(value, Point) else value
+
+def records_payload(records_data, columns, columnar):
+    """
+    Parte de la respuesta con los registros: "records" (lista de objetos) o,
+    en formato columnar, "columns" y "rows" (una lista de valores por registro).
+    """
+    if not columnar:
+        return {"records": serialize_records_data(records_data)}
+    return {
+        "columns": columns,
+        "rows": [[compact_value(record.get(column)) for column in columns] for record in records_data]
+    }
+
+def statement_timing(timing):
+    """Tiempos por fase de una sentencia en milisegundos."""
+    return {f"{phase}_ms": round(seconds * 1000, 3) for phase, seconds in timing.items()}
+
+def dumps(obj):
+    """Codifica a JSON (bytes) con orjson si está disponible."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=point_serializer, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=point_serializer, separators=(',', ':')).encode('utf-8')
+
+def build_join_records(join_result):
+    """
+    Construye las filas de un JOIN combinando los registros de ambas tablas.
+    Cada registro se lee una sola vez aunque participe en varios pares.
     
-    return serialized_records
+    Args:
+        join_result: Resultado de SQLTableManager._process_join
+        
+    Returns:
+        Lista de registros con columnas calificadas (tabla.columna)
+    """
+    return sql_manager.join_records(join_result)
 
 @app.on_event("startup")
 async def startup():
@@ -73,7 +183,21 @@ async def startup():
     global sql_manager
     os.makedirs('tablas', exist_ok=True)
     os.makedirs('indices', exist_ok=True)
-    sql_manager = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas')
+    sql_manager = SQLTableManager(
+        storage_class=TableStorageManager, base_dir='tablas',
+        multiprocess=MULTIPROCESS, result_cache_rows=RESULT_CACHE_ROWS,
+        statement_workers=STATEMENT_WORKERS
+    )
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Espera a que terminen las operaciones en curso del motor"""
+    global engine_pool
+    if engine_pool is not None:
+        engine_pool.shutdown(wait=True)
+        engine_pool = None
+    if sql_manager is not None:
+        sql_manager.close()
 
 @app.get("/")
 async def root():
@@ -84,15 +208,26 @@ async def root():
 async def execute_sql(request: SQLRequest):
     """
     Ejecuta instrucciones SQL con soporte completo para tipo POINT.
+    La ejecución corre en el pool del motor, con tiempo límite por consulta.
     """
     
     if not sql_manager:
         raise HTTPException(status_code=500, detail="Sistema no inicializado")
     
+    return await run_in_engine(_encode_sql_response, request, timeout=request.timeout)
+
+def _encode_sql_response(request):
+    """Arma y codifica la respuesta de /sql en el hilo del motor (sin jsonable_encoder)."""
+    return Response(content=dumps(_execute_sql_request(request)), media_type="application/json")
+
+def _execute_sql_request(request):
+    """Ejecuta las instrucciones de /sql y arma la respuesta (en un hilo del motor)."""
     try:
         start_time = time.time()
         
-        operations = sql_manager.execute_sql(request.sql)
+        timings = []
+        operations = sql_manager.execute_sql(request.sql, request.params, timings=timings)
+        columnar = request.format == 'columnar'
         
         execution_time = time.time() - start_time
         
@@ -103,7 +238,12 @@ async def execute_sql(request: SQLRequest):
             "results": []
         }
         
-        for op_type, op_result in operations:
+        for position, (op_type, op_result) in enumerate(operations):
+            # Lectura de filas y armado de la respuesta de esta sentencia
+            serialize_start = time.perf_counter()
+            fetch_time = 0.0
+            appended = len(result["results"])
+            
             if op_type == "CREATE":
                 result["results"].append({
                     "operation": "CREATE",
@@ -142,6 +282,19 @@ async def execute_sql(request: SQLRequest):
                             "error": True,
                             "message": "Respuesta de INSERT inválida"
                         })
+            elif op_type == "SELECT" and op_result.get('aggregate'):
+                # Agregaciones: solo las filas agregadas salen del motor
+                columns = op_result.get('columns', [])
+                rows = op_result.get('rows', [])
+                result["results"].append({
+                    "operation": "SELECT",
+                    "table": op_result.get('table_name', ''),
+                    "records_found": len(rows),
+                    **records_payload([dict(zip(columns, row)) for row in rows], columns, columnar),
+                    "columns": columns,
+                    "message": f"Se calcularon {len(rows)} fila(s) agregadas"
+                })
+            
             elif op_type == "SELECT":
                 if not op_result.get('error', False):
                     resultado = op_result.get('resultado', {})
@@ -151,26 +304,27 @@ async def execute_sql(request: SQLRequest):
                         requested_attributes = resultado.get('requested_attributes', [])
                         
                         records_data = []
-                        if found_records and table_name:
+                        if resultado.get('registros') is not None:
+                            # Ejecución solo con índices: los valores ya vienen en el resultado
+                            records_data = resultado['registros']
+                        elif found_records and table_name:
                             storage_manager = sql_manager.get_storage_manager(table_name)
                             if storage_manager:
-                                for record_num in found_records:
-                                    record = storage_manager.get(record_num)
-                                    if record:
-                                        if requested_attributes:
-                                            filtered_record = {k: v for k, v in record.items() if k in requested_attributes}
-                                            #records_data.append({"record_id": record_num, **filtered_record})
-                                            records_data.append(filtered_record)
-                                        else:
-                                            records_data.append(record)
+                                # Lectura en bloque solo de las columnas pedidas
+                                fetch_start = time.perf_counter()
+                                records_data = [
+                                    record for record in storage_manager.get_many(found_records, requested_attributes)
+                                    if record
+                                ]
+                                fetch_time = time.perf_counter() - fetch_start
                         
-                        serialized_records = serialize_records_data(records_data)
+                        columns = requested_attributes or (list(records_data[0]) if records_data else [])
                         
                         result["results"].append({
                             "operation": "SELECT",
                             "table": table_name,
                             "records_found": len(found_records),
-                            "records": serialized_records,
+                            **records_payload(records_data, columns, columnar),
                             "message": f"Se encontraron {len(found_records)} registro(s)"
                         })
                     else:
@@ -186,6 +340,29 @@ async def execute_sql(request: SQLRequest):
                         "message": op_result.get('message', 'Error en SELECT')
                     })
             
+            elif op_type == "JOIN":
+                if not op_result.get('error', False):
+                    fetch_start = time.perf_counter()
+                    records_data = build_join_records(op_result)
+                    fetch_time = time.perf_counter() - fetch_start
+                    columns = [f"{table_name}.{attr_name}" for table_name, attr_name in op_result['requested_columns']]
+                    if 'pares' in op_result:
+                        columns.append('distance')
+                    
+                    result["results"].append({
+                        "operation": "JOIN",
+                        "tables": [op_result['left_table'], op_result['right_table']],
+                        "records_found": len(records_data),
+                        **records_payload(records_data, columns, columnar),
+                        "message": f"Se encontraron {len(records_data)} par(es)"
+                    })
+                else:
+                    result["results"].append({
+                        "operation": "JOIN",
+                        "error": True,
+                        "message": op_result.get('message', 'Error en JOIN')
+                    })
+            
             elif op_type == "DELETE":
                 if not op_result.get('error', False):
                     deleted_count = op_result.get('count', 0)
@@ -202,6 +379,28 @@ async def execute_sql(request: SQLRequest):
                         "message": op_result.get('message', 'Error en DELETE')
                     })
             
+            elif op_type in ("PREPARE", "EXECUTE"):
+                result["results"].append({
+                    "operation": op_type,
+                    "error": op_result.get('error', False),
+                    "message": op_result.get('message', ''),
+                    "param_count": op_result.get('param_count', 0)
+                })
+            
+            elif op_type == "ANALYZE":
+                if not op_result.get('error', False):
+                    result["results"].append({
+                        "operation": "ANALYZE",
+                        "tables": op_result.get('tables', {}),
+                        "message": f"Estadísticas actualizadas para {len(op_result.get('tables', {}))} tabla(s)"
+                    })
+                else:
+                    result["results"].append({
+                        "operation": "ANALYZE",
+                        "error": True,
+                        "message": op_result.get('message', 'Error en ANALYZE')
+                    })
+            
             elif op_type == "IMPORT_CSV":
                 if not op_result.get('error', False):
                     successful = op_result.get('successful_inserts', 0)
@@ -220,12 +419,246 @@ async def execute_sql(request: SQLRequest):
                         "error": True,
                         "message": op_result.get('message', 'Error en importación CSV')
                     })
+            
+            if len(result["results"]) > appended and position < len(timings):
+                timing = timings[position]
+                timing['fetch'] += fetch_time
+                timing['serialize'] = time.perf_counter() - serialize_start - fetch_time
+                result["results"][-1]["timing"] = statement_timing(timing)
         
         return result
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error SQL: {str(e)}")
 
+@app.post("/sql/stream")
+async def execute_sql_stream(request: SQLRequest):
+    """
+    Ejecuta instrucciones SQL y envía el resultado como NDJSON (un objeto JSON
+    por línea): por cada operación una línea con "operation", luego una línea
+    por registro y otra con "operation_end"; la última línea tiene "done" y el
+    tiempo de ejecución. Los registros se leen por
+    bloques de STREAM_CHUNK_SIZE y se envían a medida que están listos, así
+    la memoria no depende del tamaño del resultado.
+    """
+    if not sql_manager:
+        raise HTTPException(status_code=500, detail="Sistema no inicializado")
+    
+    return engine_stream(
+        lambda: _stream_sql_lines(request),
+        "application/x-ndjson",
+        on_error=lambda e: _ndjson({"error": True, "message": f"Error SQL: {str(e)}"}),
+        timeout=request.timeout
+    )
+
+def engine_stream(produce_chunks, media_type, on_error=None, headers=None, timeout=None):
+    """
+    Respuesta en streaming cuyos bloques genera produce_chunks() en un hilo del motor.
+    
+    El generador corre entero en un solo hilo (los locks de tabla son por hilo)
+    y a lo sumo STREAM_QUEUE_SIZE bloques esperan al cliente, así la memoria
+    no depende del tamaño de la respuesta. Los bloques llegan al event loop por
+    una asyncio.Queue: esperar al productor no ocupa hilos, y si el cliente se
+    desconecta el productor lo nota en su siguiente bloque y termina. Igual que
+    run_in_engine, la respuesta completa tiene un tiempo límite: al agotarse se
+    corta el stream (con on_error si se indicó) y el productor termina.
+    
+    Args:
+        produce_chunks: Función sin argumentos que retorna un generador de bytes
+        media_type (str): Tipo de contenido de la respuesta
+        on_error: Función que convierte una excepción del generador en un último bloque
+        headers (dict, optional): Encabezados adicionales
+        timeout (float, optional): Segundos de espera; por defecto SQL_TIMEOUT (nunca mayor)
+        
+    Raises:
+        HTTPException: 503 si la cola del motor está llena
+    """
+    if not engine_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado: demasiadas consultas en espera",
+            headers={"Retry-After": "1"}
+        )
+    
+    loop = asyncio.get_running_loop()
+    limit = SQL_TIMEOUT if timeout is None else min(timeout, SQL_TIMEOUT)
+    deadline = loop.time() + limit
+    chunks = asyncio.Queue()
+    # Bloques en la cola sin leer (el None final no cuenta)
+    pending = threading.Semaphore(STREAM_QUEUE_SIZE)
+    cancelled = threading.Event()
+    
+    def send(chunk):
+        try:
+            loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+        except RuntimeError:
+            # El event loop ya se cerró
+            cancelled.set()
+    
+    def put(chunk):
+        while not cancelled.is_set():
+            if pending.acquire(timeout=0.1):
+                send(chunk)
+                return True
+        return False
+    
+    def produce():
+        generated = None
+        try:
+            generated = produce_chunks()
+            for chunk in generated:
+                if not put(chunk):
+                    return
+        except Exception as e:
+            print(f"Error en respuesta en streaming: {e}")
+            if on_error is not None:
+                put(on_error(e))
+        finally:
+            # Cliente desconectado: se cierran los generadores del motor en este mismo hilo
+            if generated is not None:
+                generated.close()
+            send(None)
+    
+    try:
+        future = _get_engine_pool().submit(produce)
+    except Exception:
+        engine_slots.release()
+        raise
+    future.add_done_callback(lambda _: engine_slots.release())
+    
+    async def body():
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.get(), timeout=max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    cancelled.set()
+                    if on_error is not None:
+                        yield on_error(TimeoutError(f"La consulta superó el tiempo límite ({limit}s)"))
+                    break
+                if chunk is None:
+                    break
+                pending.release()
+                yield chunk
+        finally:
+            # Cliente desconectado o respuesta completa: el productor deja de leer
+            cancelled.set()
+    
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+def _ndjson(obj):
+    return dumps(obj) + b"\n"
+
+def _ndjson_rows(records, columns=None):
+    """Una línea por registro: objeto JSON o, si se indican columnas, lista de valores."""
+    if columns is None:
+        return b"".join(_ndjson(record) for record in records)
+    return b"".join(_ndjson([compact_value(record.get(column)) for column in columns]) for record in records)
+
+def _stream_sql_lines(request):
+    """
+    Genera el NDJSON de /sql/stream en bloques de líneas (en un hilo del motor).
+    """
+    start_time = time.time()
+    # Las filas se leen por bloques al enviarlas: no se materializan para la caché
+    operations = sql_manager.execute_sql(request.sql, request.params, cache_results=False)
+    columnar = request.format == 'columnar'
+    
+    for op_type, op_result in operations:
+        if isinstance(op_result, dict) and op_result.get('error', False):
+            yield _ndjson({"operation": op_type, "error": True,
+                           "message": op_result.get('message', f'Error en {op_type}')})
+            continue
+        
+        if op_type == "SELECT" and op_result.get('aggregate'):
+            columns = op_result.get('columns', [])
+            yield _ndjson({"operation": "SELECT", "table": op_result.get('table_name', ''), "columns": columns})
+            rows = op_result.get('rows', [])
+            yield _ndjson_rows((dict(zip(columns, row)) for row in rows), columns if columnar else None)
+            yield _ndjson({"operation_end": "SELECT", "records_sent": len(rows)})
+        
+        elif op_type == "SELECT":
+            resultado = op_result.get('resultado', {})
+            if resultado.get('error', False):
+                yield _ndjson({"operation": "SELECT", "error": True,
+                               "message": resultado.get('message', 'Error en búsqueda')})
+                continue
+            
+            table_name = op_result.get('table_name', '')
+            found_records = resultado.get('numeros_registro', [])
+            requested_attributes = resultado.get('requested_attributes', [])
+            storage_manager = sql_manager.get_storage_manager(table_name)
+            header = {"operation": "SELECT", "table": table_name, "records_found": len(found_records)}
+            columns = None
+            if columnar:
+                columns = requested_attributes or (
+                    [attr['name'] for attr in storage_manager.table_info['attributes']] if storage_manager else []
+                )
+                header["columns"] = columns
+            yield _ndjson(header)
+            
+            sent = 0
+            if resultado.get('registros') is not None:
+                registros = resultado['registros']
+                for i in range(0, len(registros), STREAM_CHUNK_SIZE):
+                    block = registros[i:i + STREAM_CHUNK_SIZE]
+                    sent += len(block)
+                    yield _ndjson_rows(block, columns)
+            else:
+                for i in range(0, len(found_records), STREAM_CHUNK_SIZE) if storage_manager else ():
+                    block = [record for record in storage_manager.get_many(
+                        found_records[i:i + STREAM_CHUNK_SIZE], requested_attributes) if record]
+                    sent += len(block)
+                    yield _ndjson_rows(block, columns)
+            yield _ndjson({"operation_end": "SELECT", "records_sent": sent})
+        
+        elif op_type == "JOIN":
+            header = {"operation": "JOIN", "tables": [op_result['left_table'], op_result['right_table']]}
+            columns = None
+            if columnar:
+                columns = [f"{table_name}.{attr_name}" for table_name, attr_name in op_result['requested_columns']]
+                if 'pares' in op_result:
+                    columns.append('distance')
+                header["columns"] = columns
+            yield _ndjson(header)
+            sent = 0
+            if 'filas' in op_result:
+                filas = op_result['filas']
+                try:
+                    block = []
+                    for fila in filas:
+                        block.append(fila)
+                        if len(block) >= STREAM_CHUNK_SIZE:
+                            sent += len(block)
+                            yield _ndjson_rows(block, columns)
+                            block = []
+                    sent += len(block)
+                    yield _ndjson_rows(block, columns)
+                finally:
+                    filas.close()
+            else:
+                pares = op_result.get('pares', [])
+                for i in range(0, len(pares), STREAM_CHUNK_SIZE):
+                    block = build_join_records(dict(op_result, pares=pares[i:i + STREAM_CHUNK_SIZE]))
+                    sent += len(block)
+                    yield _ndjson_rows(block, columns)
+            yield _ndjson({"operation_end": "JOIN", "records_sent": sent})
+        
+        else:
+            # Las demás operaciones no devuelven registros: una línea de resumen
+            summary = {"operation": op_type}
+            if op_type == "CREATE":
+                summary["table_created"] = op_result
+            elif op_type == "DELETE":
+                summary["records_deleted"] = op_result.get('count', 0)
+            elif op_type == "INSERT" and isinstance(op_result, dict):
+                summary["records_inserted"] = len(op_result.get('records', []))
+            elif op_type == "IMPORT_CSV":
+                summary["records_imported"] = op_result.get('successful_inserts', 0)
+            yield _ndjson(summary)
+    
+    yield _ndjson({"done": True, "execution_time": round(time.time() - start_time, 4)})
+
 @app.get("/tables")
 async def get_tables():
     """
@@ -234,6 +667,10 @@ async def get_tables():
     if not sql_manager:
         raise HTTPException(status_code=500, detail="Sistema no inicializado")
     
+    return await run_in_engine(_get_tables)
+
+def _get_tables():
+    """Arma la información de /tables (en un hilo del motor)."""
     try:
         tables_info = {}
         
@@ -241,12 +678,15 @@ async def get_tables():
             storage_manager = sql_manager.get_storage_manager(table_name)
             record_count = 0
             active_count = 0
+            index_sizes = {}
             
             if storage_manager:
                 try:
-                    record_count = storage_manager._get_record_count()
-                    active_records = storage_manager._get_all_active_record_numbers()
-                    active_count = len(active_records)
+                    # Contadores mantenidos por el motor: no se leen registros
+                    metadata = storage_manager.get_metadata()
+                    record_count = metadata['total_records']
+                    active_count = metadata['active_records']
+                    index_sizes = {attr: info['size_bytes'] for attr, info in metadata['indexes'].items()}
                 except:
                     pass
             
@@ -266,7 +706,8 @@ async def get_tables():
                 if attr.get('index'):
                     indexes.append({
                         "attribute": attr['name'],
-                        "type": attr['index']
+                        "type": attr['index'],
+                        "size_bytes": index_sizes.get(attr['name'])
                     })
             
             tables_info[table_name] = {
@@ -292,6 +733,94 @@ async def get_tables():
         }
 
 
+@app.get("/tables/{table_name}/export")
+async def export_table(table_name: str, format: Literal['csv', 'ndjson', 'columnar'] = 'csv'):
+    """
+    Exporta los registros activos de una tabla recorriendo su archivo en
+    bloques (mmap), sin pasar por índices ni armar diccionarios por registro.
+    
+    Formatos:
+    - csv: encabezado con los nombres de columna; POINT como "(x, y)"
+    - ndjson: una lista de valores por línea, en el orden de las columnas de la
+      primera línea; POINT como [x, y]
+    - columnar: binario por bloques (ver _export_columnar)
+    """
+    if not sql_manager:
+        raise HTTPException(status_code=500, detail="Sistema no inicializado")
+    
+    if not sql_manager.get_table(table_name):
+        raise HTTPException(status_code=404, detail=f"Tabla '{table_name}' no encontrada")
+    storage_manager = sql_manager.get_storage_manager(table_name)
+    if not storage_manager:
+        raise HTTPException(status_code=404, detail=f"La tabla '{table_name}' no tiene almacenamiento")
+    
+    exporters = {
+        'csv': (_export_csv, "text/csv", "csv"),
+        'ndjson': (_export_ndjson, "application/x-ndjson", "ndjson"),
+        'columnar': (_export_columnar, "application/octet-stream", "bd2c")
+    }
+    exporter, media_type, extension = exporters[format]
+    return engine_stream(
+        lambda: exporter(storage_manager),
+        media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table_name}.{extension}"'}
+    )
+
+def _export_columns(storage_manager):
+    return [attr['name'] for attr in storage_manager.table_info['attributes']]
+
+def _export_csv(storage_manager):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(_export_columns(storage_manager))
+    for rows in storage_manager.iter_live_blocks():
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def _export_ndjson(storage_manager):
+    yield _ndjson({"columns": _export_columns(storage_manager)})
+    for rows in storage_manager.iter_live_blocks():
+        yield b"".join(_ndjson([compact_value(value) for value in row]) for row in rows)
+
+def _export_columnar(storage_manager):
+    """
+    Formato binario columnar (little endian):
+    - b"BD2C", longitud del encabezado (uint32) y encabezado JSON con los campos
+      {"name", "format"} en formato de struct (POINT son dos campos "attr.x", "attr.y")
+    - por bloque: cantidad de registros (uint32) y, campo por campo, sus valores
+      contiguos (los strings con su ancho fijo, rellenos con bytes nulos)
+    - un bloque con cantidad 0 marca el final
+    """
+    fields = []
+    for attr in storage_manager.table_info['attributes']:
+        fmt = storage_manager.attribute_formats[attr['name']]
+        if fmt == 'dd':
+            fields += [(f"{attr['name']}.x", 'd'), (f"{attr['name']}.y", 'd')]
+        else:
+            fields.append((attr['name'], fmt))
+    
+    header = dumps({
+        "table": storage_manager.table_name,
+        "byte_order": "little",
+        "fields": [{"name": name, "format": fmt} for name, fmt in fields]
+    })
+    yield b"BD2C" + struct.pack("<I", len(header)) + header
+    
+    for rows in storage_manager.iter_live_blocks(raw=True):
+        count = len(rows)
+        parts = [struct.pack("<I", count)]
+        for (_, fmt), column in zip(fields, zip(*rows)):
+            if fmt.endswith('s'):
+                parts.append(b"".join(column))
+            else:
+                parts.append(struct.pack(f"<{count}{fmt}", *column))
+        yield b"".join(parts)
+    yield struct.pack("<I", 0)
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
@@ -304,27 +833,37 @@ async def get_table_info(table_name: str):
     if not sql_manager:
         raise HTTPException(status_code=500, detail="Sistema no inicializado")
     
+    return await run_in_engine(_get_table_info, table_name)
+
+def _get_table_info(table_name):
+    """Arma la información de /tables/{table_name} (en un hilo del motor)."""
     table_info = sql_manager.get_table(table_name)
     if not table_info:
         raise HTTPException(status_code=404, detail=f"Tabla '{table_name}' no encontrada")
     
     storage_manager = sql_manager.get_storage_manager(table_name)
     
-    # Obtener algunos registros de ejemplo
+    # Los primeros 5 registros activos como muestra (solo se lee el primer bloque)
     sample_records = []
+    total_records = 0
     if storage_manager:
         try:
-            all_records = storage_manager.get_all_records()
-            # Tomar los primeros 5 registros como muestra
-            sample_records = serialize_records_data(all_records[:5])
+            sample_records = serialize_records_data(storage_manager.sample_records(5))
         except:
             pass
+        total_records = storage_manager.get_metadata()['active_records']
+    
+    # Estadísticas de ANALYZE (None si la tabla no fue analizada)
+    statistics = storage_manager.get_statistics_summary() if storage_manager else None
+    if not isinstance(statistics, dict):
+        statistics = None
     
     return {
         "table_name": table_name,
         "table_info": table_info,
         "sample_records": sample_records,
-        "total_records": len(storage_manager.get_all_records()) if storage_manager else 0
+        "total_records": total_records,
+        "statistics": statistics
     }
 
 
@@ -358,6 +897,10 @@ async def register(request: RegisterRequest):
     if 'auth_usuario_xa' not in sql_manager.tables:
         raise HTTPException(status_code=500, detail="Tabla de usuarios no configurada")
     
+    return await run_in_engine(_register_user, request)
+
+def _register_user(request):
+    """Registra el usuario: lecturas, bcrypt e inserción (en un hilo del motor)."""
     storage = sql_manager.get_storage_manager('auth_usuario_xa')
     
     # Verificar si el usuario ya existe
@@ -389,6 +932,10 @@ async def login(request: LoginRequest):
     if 'auth_usuario_xa' not in sql_manager.tables:
         raise HTTPException(status_code=500, detail="Tabla de usuarios no configurada")
     
+    return await run_in_engine(_login_user, request)
+
+def _login_user(request):
+    """Verifica las credenciales y arma el token (en un hilo del motor)."""
     storage = sql_manager.get_storage_manager('auth_usuario_xa')
     
     # Buscar usuario
@@ -1,14 +1,72 @@
 import re
+from collections import OrderedDict
 from pathlib import Path
+from contextlib import nullcontext
 import os
 import csv
 import json 
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from estructuras.point_class import Point  # Importar la clase Point
+from estructuras.distance import normalize_metric
+from estructuras.catalog import SharedCatalog
+from sql_parser import parse_where, conjuncts, Comparison, Between, InList, SpatialCall, And, Or, Not
 
 SELECT_KEYWORD = "SELECT "
 FROM_KEYWORD = "FROM"
 WHERE_KEYWORD = "WHERE "
 DELETE_KEYWORD = "DELETE "
+JOIN_KEYWORD = "JOIN"
+ON_KEYWORD = "ON"
+
+# Tamaño máximo de la caché LRU de planes ya analizados
+PLAN_CACHE_SIZE = 256
+PARAM_MARKER = '?'
+PARAM_PATTERN = re.compile(r'^\?(\d+)$')
+EXECUTE_PATTERN = re.compile(r'^\s*EXECUTE\s+(\w+)\s*(?:\((.*)\)|USING\s+(.+))?\s*$', re.IGNORECASE | re.DOTALL)
+# Funciones de agregación en la lista de columnas y GROUP BY al final de un SELECT
+AGGREGATE_PATTERN = re.compile(r'^(COUNT|SUM|AVG|MIN|MAX)\s*\(\s*(\*|\w+)\s*\)$', re.IGNORECASE)
+GROUP_BY_PATTERN = re.compile(r'\s+GROUP\s+BY\s+(\w+(?:\s*,\s*\w+)*)\s*$', re.IGNORECASE)
+# ORDER BY / LIMIT / OFFSET al final de un SELECT: desde la primera de estas
+# palabras clave el resto de la sentencia tiene que coincidir completo
+SELECT_MODIFIER_KEYWORDS = ('ORDER', 'LIMIT', 'OFFSET')
+SELECT_MODIFIERS_PATTERN = re.compile(
+    r'(?:ORDER\s+BY\s+(\w+)(?:\s+(ASC|DESC))?)?\s*'
+    r'(?:LIMIT\s+([^\s;]+))?\s*(?:OFFSET\s+([^\s;]+))?\s*;?\s*',
+    re.IGNORECASE
+)
+
+
+class SQLParam:
+    """
+    Parámetro posicional (?) de una sentencia preparada.
+    Guarda cómo convertir el valor recibido al tipo de la columna y el
+    desplazamiento que aplican las comparaciones estrictas (>, <).
+    """
+    __slots__ = ('index', 'converter', 'offset')
+
+    def __init__(self, index, converter, offset=0):
+        self.index = index
+        self.converter = converter
+        self.offset = offset
+
+    def shifted(self, delta):
+        """Copia del parámetro con un desplazamiento adicional."""
+        return SQLParam(self.index, self.converter, self.offset + delta)
+
+    def bind(self, params):
+        """Convierte el valor del parámetro y aplica el desplazamiento."""
+        value = self.converter(params[self.index])
+        if not self.offset:
+            return value
+        if isinstance(value, Point):
+            return Point(value.x + self.offset, value.y + self.offset)
+        return value + self.offset
+
+    def __repr__(self):
+        return f"?{self.index + 1}"
+
 
 class SQLTableManager:
     """
@@ -17,13 +75,20 @@ class SQLTableManager:
     VERSIÓN ACTUALIZADA con soporte completo para tipo POINT.
     """
     
-    def __init__(self, storage_class=None, base_dir='tablas'):
+    def __init__(self, storage_class=None, base_dir='tablas', multiprocess=False, result_cache_rows=0,
+                 statement_workers=0):
         """
         Inicializa el gestor de tablas.
         
         Args:
             storage_class: Clase que se usará para almacenamiento (e.g., TableStorageManager)
             base_dir: Directorio base para almacenar las tablas
+            multiprocess: Si es True, el catálogo y los locks de las tablas se comparten
+                          con otros procesos que usan el mismo base_dir
+            result_cache_rows: Total de filas que puede guardar la caché LRU de resultados
+                               de SELECT entre todas sus entradas (0 la desactiva)
+            statement_workers: Hilos para ejecutar a la vez los SELECT consecutivos de
+                               una misma instrucción (0 o 1: uno tras otro)
         """
         self.tables = {}
         self.storage_managers = {}
@@ -31,10 +96,57 @@ class SQLTableManager:
         self.base_dir = base_dir
         self.operations = []
         self.blacklisted_tables = {'auth_usuario_xa'}
+        
+        # Caché LRU de planes (SQL normalizado -> plan) y sentencias preparadas
+        self.plan_cache = OrderedDict()
+        self.plan_cache_size = PLAN_CACHE_SIZE
+        self.plan_cache_hits = 0
+        self.plan_cache_misses = 0
+        self.prepared_statements = {}
+        # Sube cada vez que cambia el esquema de alguna tabla (CREATE o catálogo recargado)
+        self.schema_version = 0
+        
+        # Caché LRU de resultados: (SQL normalizado, parámetros) -> (versión de la tabla, resultado, filas)
+        self.result_cache = OrderedDict()
+        self.result_cache_rows = result_cache_rows
+        self.result_cache_used = 0
+        self.result_cache_hits = 0
+        self.result_cache_misses = 0
+        # Pool propio para los SELECT de una instrucción con varias sentencias
+        self.statement_workers = statement_workers
+        self.statement_pool = None
+        # Protege el catálogo (tablas, gestores) y la caché de planes entre hilos
+        self.catalog_lock = threading.RLock()
         Path(base_dir).mkdir(exist_ok=True)
         
+        # Modo multiproceso: versión del catálogo compartido vista por este proceso
+        self.catalog = SharedCatalog(base_dir) if multiprocess else None
+        self.catalog_version = self.catalog.version() if self.catalog else None
+        
         self.load_existing_tables()
 
+    def _new_storage_manager(self, table_name, table_info):
+        """Crea el gestor de almacenamiento de una tabla (ligado al catálogo compartido si lo hay)."""
+        storage_manager = self.storage_class(table_name, table_info, self.base_dir)
+        if self.catalog is not None and hasattr(storage_manager, 'attach_catalog'):
+            storage_manager.attach_catalog(self.catalog)
+        return storage_manager
+
+    def refresh_catalog(self):
+        """
+        En modo multiproceso, carga las tablas creadas por otros procesos desde
+        la última vez que se revisó el catálogo compartido.
+        """
+        if self.catalog is None:
+            return
+        version = self.catalog.version()
+        if version == self.catalog_version:
+            return
+        with self.catalog_lock:
+            self.load_existing_tables()
+            self.invalidate_plans()
+            self.catalog_version = version
+
     def load_existing_tables(self):
         """
         Carga todas las tablas existentes desde el sistema de archivos.
@@ -57,68 +169,639 @@ class SQLTableManager:
                     
                     # Verificar que existe el archivo de datos
                     data_file = os.path.join(self.base_dir, f"{table_name}.bin")
-                    if not os.path.exists(data_file):
+                    if not os.path.exists(data_file) or table_name in self.tables:
                         continue
                     
                     self.tables[table_name] = table_info
                     
                     if self.storage_class:
-                        self.storage_managers[table_name] = self.storage_class(
-                            table_name, table_info, self.base_dir
-                        )
+                        self.storage_managers[table_name] = self._new_storage_manager(table_name, table_info)
                     
                     
                 except Exception:
                     continue
     
-    def parse_sql_statement(self, sql_statement):
+    def parse_sql_statement(self, sql_statement, params=None, timings=None, cache_results=True):
         """
         Analiza una instrucción SQL que puede contener múltiples declaraciones.
-        Versión actualizada que incluye CREATE, INSERT, SELECT, DELETE e IMPORT FROM CSV.
+        Versión actualizada que incluye CREATE, INSERT, SELECT, DELETE, IMPORT FROM CSV,
+        PREPARE, EXECUTE y ANALYZE.
+        
+        Las sentencias SELECT/DELETE simples se guardan en una caché de planes:
+        si el mismo texto (normalizado) se vuelve a ejecutar no se vuelve a
+        analizar, solo se enlazan los parámetros '?'. Los SELECT consecutivos
+        de una instrucción con varias sentencias solo leen, así que se ejecutan
+        a la vez en el pool de sentencias; las demás operaciones separan esos
+        grupos y conservan el orden.
         
         Args:
             sql_statement (str): La instrucción SQL completa.
+            params (list, optional): Valores para los parámetros '?' en orden. Con varias
+                                     sentencias, cada una toma los siguientes tantos
+                                     valores como '?' tenga.
+            timings (list, optional): Si se indica, se le agrega por cada operación
+                                      procesada un dict con los segundos de cada fase
+                                      ('parse', 'plan', 'index', 'fetch', 'execute').
+            cache_results (bool): Si es False, un SELECT puede responderse desde la caché
+                                  de resultados pero su resultado no se guarda (no se
+                                  leen sus filas por adelantado).
             
         Returns:
             list: Lista de operaciones procesadas.
         """
+        self.refresh_catalog()
+        start = time.perf_counter()
+        cache_key = self._plan_cache_key(sql_statement)
+        plan = self._plan_cache_get(cache_key)
+        if plan is not None:
+            timing = self._new_timing(plan=time.perf_counter() - start)
+            processed_operations = [(plan['op_type'], self._execute_plan_cached(cache_key, plan, params, timing,
+                                                                                cache_results))]
+            if timings is not None:
+                timings.append(timing)
+            self._flush_statistics()
+            self._record_operations(processed_operations)
+            return processed_operations
+        
         # Limpiar el statement (eliminar comentarios, etc.)
         clean_sql = self._clean_sql_statement(sql_statement)
         
         # Extraer todas las operaciones SQL (CREATE TABLE, INSERT INTO, SELECT, DELETE, IMPORT FROM CSV, etc.)
         operations = self._extract_sql_operations(clean_sql)
+        split_time = time.perf_counter() - start
+        
+        # Con varias sentencias los parámetros se reparten en orden según sus '?'
+        params = list(params) if params else []
+        param_offset = 0
+        
+        def statement_params(operation):
+            nonlocal param_offset
+            if len(operations) == 1:
+                return params
+            count = self._statement_param_count(*operation)
+            own = params[param_offset:param_offset + count]
+            param_offset += count
+            return own
         
         # Procesar cada operación en el orden que aparece
         processed_operations = []
-        for op_type, op_content in operations:
-            result = None
-            
-            if op_type == "CREATE":
-                result = self._process_create_table(op_content)
-                if result:
-                    processed_operations.append(("CREATE", result))
-            
-            elif op_type == "INSERT":
-                result = self._process_insert(op_content)
-                if result:
-                    processed_operations.append(("INSERT", result))
-                    
-            elif op_type == "SELECT":
-                result = self._process_select(op_content)
-                if result:
-                    processed_operations.append(("SELECT", result))
-                    
-            elif op_type == "DELETE":
-                result = self._process_delete(op_content)
-                if result:
-                    processed_operations.append(("DELETE", result))
-            elif op_type == "IMPORT_CSV":
-                result = self._process_import_csv(op_content)
-                if result:
-                    processed_operations.append(("IMPORT_CSV", result))
-        
-        self.operations.extend(processed_operations)
+        position = 0
+        while position < len(operations):
+            end = position
+            while end < len(operations) and operations[end][0] == "SELECT":
+                end += 1
+            
+            if end - position > 1 and self.statement_workers > 1:
+                batch = [(*operation, statement_params(operation)) for operation in operations[position:end]]
+                outcomes = list(self._get_statement_pool().map(
+                    lambda operation: self._process_operation(*operation), batch
+                ))
+                position = end
+            else:
+                single_key = cache_key if len(operations) == 1 else None
+                operation = operations[position]
+                outcomes = [self._process_operation(*operation, statement_params(operation), single_key,
+                                                    cache_results)]
+                position += 1
+            
+            for processed, timing in outcomes:
+                if processed is None:
+                    continue
+                processed_operations.append(processed)
+                if timings is not None:
+                    # Separar la instrucción en sentencias se reparte entre todas
+                    timing['parse'] += split_time / len(operations)
+                    timings.append(timing)
+        
+        self._flush_statistics()
+        self._record_operations(processed_operations)
         return processed_operations
+
+    def _statement_param_count(self, op_type, op_content):
+        """
+        Cantidad de valores de params que consume una sentencia: sus '?' si es
+        SELECT o DELETE, o los de la sentencia preparada si es un EXECUTE sin valores.
+        """
+        if op_type in ("SELECT", "DELETE"):
+            return self._number_placeholders(op_content)[1]
+        if op_type == "EXECUTE":
+            match = EXECUTE_PATTERN.match(op_content)
+            if match and match.group(2) is None and match.group(3) is None:
+                plan = self.prepared_statements.get(match.group(1).lower())
+                return plan['param_count'] if plan else 0
+        return 0
+
+    def _record_operations(self, processed_operations):
+        """
+        Agrega las operaciones al historial. Los JOIN por igualdad se guardan sin
+        su generador de filas: el historial no debe retener lecturas pendientes.
+        """
+        for op_type, result in processed_operations:
+            if isinstance(result, dict) and 'filas' in result:
+                result = {key: value for key, value in result.items() if key != 'filas'}
+            self.operations.append((op_type, result))
+
+    def _new_timing(self, **phases):
+        """Segundos por fase de una operación (ver parse_sql_statement)."""
+        timing = {'parse': 0.0, 'plan': 0.0, 'index': 0.0, 'fetch': 0.0, 'execute': 0.0}
+        timing.update(phases)
+        return timing
+
+    def _process_operation(self, op_type, op_content, params=None, cache_key=None, cache_results=True):
+        """
+        Procesa una operación extraída de la instrucción.
+        
+        Args:
+            op_type (str): Tipo de operación ("SELECT", "INSERT", ...)
+            op_content (str): Texto de la sentencia
+            params (list, optional): Valores de los parámetros '?'
+            cache_key (str, optional): Clave de caché si la instrucción tiene una sola sentencia
+            cache_results (bool): Si el resultado de un SELECT se puede guardar en la caché
+            
+        Returns:
+            tuple: ((tipo, resultado) o None si no produjo resultado, tiempos por fase)
+        """
+        timing = self._new_timing()
+        start = time.perf_counter()
+        processed = None
+        
+        if op_type in ("SELECT", "DELETE"):
+            plan = self._build_plan(op_type, op_content)
+            timing['parse'] = time.perf_counter() - start
+            if cache_key is not None:
+                result = self._execute_plan_cached(cache_key, plan, params, timing, cache_results)
+                # Solo se cachean sentencias únicas que se analizaron sin error
+                if not plan['info'].get('error', False):
+                    self._plan_cache_put(cache_key, plan)
+            else:
+                result = self._execute_plan(plan, params, timing)
+            if result:
+                processed = (op_type, result)
+            return processed, timing
+        
+        if op_type == "CREATE":
+            result = self._process_create_table(op_content)
+            if result:
+                processed = ("CREATE", result)
+        
+        elif op_type == "INSERT":
+            result = self._process_insert(op_content)
+            if result:
+                processed = ("INSERT", result)
+
+        elif op_type == "JOIN":
+            result = self._process_join(op_content)
+            if result:
+                processed = ("JOIN", result)
+                
+        elif op_type == "IMPORT_CSV":
+            result = self._process_import_csv(op_content)
+            if result:
+                processed = ("IMPORT_CSV", result)
+
+        elif op_type == "PREPARE":
+            processed = ("PREPARE", self._process_prepare(op_content))
+
+        elif op_type == "EXECUTE":
+            processed = self._process_execute(op_content, params)
+
+        elif op_type == "ANALYZE":
+            processed = ("ANALYZE", self._process_analyze(op_content))
+        
+        timing['execute'] = time.perf_counter() - start
+        return processed, timing
+
+    def _get_statement_pool(self):
+        """Pool de hilos para los SELECT concurrentes (se crea al primer uso)."""
+        with self.catalog_lock:
+            if self.statement_pool is None:
+                self.statement_pool = ThreadPoolExecutor(
+                    max_workers=self.statement_workers, thread_name_prefix='bd2-statement'
+                )
+            return self.statement_pool
+
+    def close(self):
+        """Espera a las sentencias en curso y libera el pool de sentencias."""
+        with self.catalog_lock:
+            pool, self.statement_pool = self.statement_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def _flush_statistics(self):
+        """Guarda las estadísticas de las tablas modificadas por la sentencia."""
+        for storage_manager in self.storage_managers.values():
+            storage_manager.flush_statistics()
+
+    def _process_analyze(self, sql_statement):
+        """
+        Procesa ANALYZE [TABLE] [tabla]: recalcula las estadísticas por columna
+        de una tabla, o de todas si no se indica ninguna.
+        
+        Args:
+            sql_statement (str): La instrucción ANALYZE.
+            
+        Returns:
+            dict: Resumen de estadísticas por tabla o error.
+        """
+        match = re.match(r'^\s*ANALYZE(?:\s+(?:TABLE\s+)?(\w+))?\s*$', sql_statement, re.IGNORECASE)
+        if not match:
+            return {'error': True, 'message': "Sintaxis inválida. Use: ANALYZE [TABLE] [tabla]"}
+        
+        table_name = match.group(1)
+        if table_name is not None:
+            if table_name not in self.storage_managers:
+                return {'error': True, 'message': f"La tabla '{table_name}' no existe"}
+            table_names = [table_name]
+        else:
+            table_names = list(self.storage_managers)
+        
+        tables = {}
+        for name in table_names:
+            storage_manager = self.storage_managers[name]
+            storage_manager.analyze()
+            tables[name] = storage_manager.get_statistics_summary()
+        
+        return {'error': False, 'tables': tables}
+
+    def _plan_cache_key(self, sql_statement):
+        """Clave de la caché de planes: SQL sin espacios redundantes ni ';' final."""
+        return self._normalize_whitespace(sql_statement).rstrip('; ')
+
+    def _plan_cache_get(self, key):
+        """Obtiene un plan de la caché LRU y lo marca como usado recientemente."""
+        with self.catalog_lock:
+            plan = self.plan_cache.get(key)
+            if plan is None:
+                self.plan_cache_misses += 1
+                return None
+            self.plan_cache.move_to_end(key)
+            self.plan_cache_hits += 1
+            return plan
+
+    def _plan_cache_put(self, key, plan):
+        """Guarda un plan en la caché LRU, desalojando el menos usado si está llena."""
+        with self.catalog_lock:
+            self.plan_cache[key] = plan
+            self.plan_cache.move_to_end(key)
+            while len(self.plan_cache) > self.plan_cache_size:
+                self.plan_cache.popitem(last=False)
+
+    def invalidate_plans(self, table_name=None):
+        """
+        Descarta los planes cacheados de una tabla (o todos si table_name es None).
+        Las sentencias preparadas con PREPARE se conservan.
+        """
+        with self.catalog_lock:
+            self.schema_version += 1
+            if table_name is None:
+                self.plan_cache.clear()
+                return
+            stale = [key for key, plan in self.plan_cache.items()
+                     if plan['info'].get('table_name') == table_name]
+            for key in stale:
+                del self.plan_cache[key]
+
+    def _execute_plan_cached(self, cache_key, plan, params=None, timing=None, store=True):
+        """
+        Ejecuta un plan usando la caché de resultados para los SELECT.
+        
+        Cada entrada guarda la versión de escritura que tenía la tabla antes de
+        ejecutar la consulta; si la tabla cambió desde entonces la entrada ya no
+        sirve. Los registros se guardan ya leídos ('registros'), así un acierto
+        no vuelve a recorrer índices ni a leer el archivo de la tabla. La caché
+        se limita por la cantidad total de filas guardadas (result_cache_rows).
+        
+        Args:
+            store (bool): Si es False solo se consulta la caché; en un fallo el
+                          resultado no se materializa ni se guarda
+        """
+        info = plan['info']
+        if not self.result_cache_rows or plan['op_type'] != "SELECT" or info.get('error', False):
+            return self._execute_plan(plan, params, timing)
+        
+        storage_manager = self.storage_managers.get(info.get('table_name'))
+        version = getattr(storage_manager, 'write_version', None)
+        if not isinstance(version, int):
+            return self._execute_plan(plan, params, timing)
+        if self.catalog is not None:
+            # Las escrituras de otros procesos solo se ven en el catálogo compartido
+            version = (version, self.catalog.table_version(info['table_name']))
+        
+        key = (cache_key, repr(list(params) if params else []))
+        with self.catalog_lock:
+            entry = self.result_cache.get(key)
+            if entry is not None and entry[0] == version:
+                self.result_cache.move_to_end(key)
+                self.result_cache_hits += 1
+                return entry[1]
+            self.result_cache_misses += 1
+        
+        result = self._execute_plan(plan, params, timing)
+        if not store:
+            return result
+        fetch_start = time.perf_counter()
+        rows = self._materialize_result(result, storage_manager)
+        if timing is not None:
+            timing['fetch'] += time.perf_counter() - fetch_start
+        if rows is not None:
+            with self.catalog_lock:
+                previous = self.result_cache.pop(key, None)
+                if previous is not None:
+                    self.result_cache_used -= previous[2]
+                self.result_cache[key] = (version, result, rows)
+                self.result_cache_used += rows
+                while self.result_cache_used > self.result_cache_rows:
+                    _, (_, _, evicted_rows) = self.result_cache.popitem(last=False)
+                    self.result_cache_used -= evicted_rows
+        return result
+
+    def _materialize_result(self, result, storage_manager):
+        """
+        Lee los registros de un SELECT para guardarlo en la caché de resultados.
+        
+        Returns:
+            int: Filas que ocupará la entrada (al menos 1), o None si el
+                 resultado no se guarda (error, o más filas que toda la caché)
+        """
+        if not isinstance(result, dict) or result.get('error', False):
+            return None
+        if result.get('aggregate'):
+            rows = max(1, len(result.get('rows', [])))
+            return rows if rows <= self.result_cache_rows else None
+        
+        resultado = result.get('resultado')
+        if not isinstance(resultado, dict) or resultado.get('error', False):
+            return None
+        if resultado.get('registros') is not None:
+            rows = max(1, len(resultado['registros']))
+            return rows if rows <= self.result_cache_rows else None
+        
+        found_records = list(resultado.get('numeros_registro', []))
+        if len(found_records) > self.result_cache_rows:
+            return None
+        rows = storage_manager.get_many(found_records, resultado.get('requested_attributes'))
+        resultado['registros'] = [row for row in rows if row]
+        return max(1, len(resultado['registros']))
+
+    def invalidate_results(self, table_name=None):
+        """Descarta los resultados cacheados de una tabla (o todos si table_name es None)."""
+        with self.catalog_lock:
+            if table_name is None:
+                self.result_cache.clear()
+                self.result_cache_used = 0
+                return
+            stale = [key for key, (_, result, _) in self.result_cache.items()
+                     if result.get('table_name') == table_name]
+            for key in stale:
+                self.result_cache_used -= self.result_cache.pop(key)[2]
+
+    def get_result_cache_stats(self):
+        """Estadísticas de la caché de resultados."""
+        return {
+            'size': len(self.result_cache),
+            'rows': self.result_cache_used,
+            'max_rows': self.result_cache_rows,
+            'hits': self.result_cache_hits,
+            'misses': self.result_cache_misses
+        }
+
+    def get_plan_cache_stats(self):
+        """Estadísticas de la caché de planes."""
+        return {
+            'size': len(self.plan_cache),
+            'max_size': self.plan_cache_size,
+            'hits': self.plan_cache_hits,
+            'misses': self.plan_cache_misses,
+            'prepared_statements': sorted(self.prepared_statements)
+        }
+
+    def _number_placeholders(self, sql_statement):
+        """
+        Numera los parámetros '?' que están fuera de comillas (?1, ?2, ...)
+        para que cada valor quede asociado a su posición en el texto.
+        
+        Returns:
+            tuple: (sql numerado, cantidad de parámetros)
+        """
+        result = []
+        count = 0
+        in_string = False
+        string_char = None
+        
+        for char in sql_statement:
+            if char in ["'", '"'] and (not in_string or string_char == char):
+                in_string = not in_string
+                string_char = char if in_string else None
+                result.append(char)
+            elif char == PARAM_MARKER and not in_string:
+                count += 1
+                result.append(f"{PARAM_MARKER}{count}")
+            else:
+                result.append(char)
+        
+        return ''.join(result), count
+
+    def _param_from_string(self, value_str, converter):
+        """Devuelve un SQLParam si value_str es un marcador ?N, o None."""
+        match = PARAM_PATTERN.match(value_str.strip())
+        if not match:
+            return None
+        return SQLParam(int(match.group(1)) - 1, converter)
+
+    def _build_plan(self, op_type, sql_statement):
+        """
+        Analiza una sentencia SELECT o DELETE y construye su plan reutilizable.
+        
+        Returns:
+            dict: {'op_type', 'info', 'param_count'}
+        """
+        numbered_sql, param_count = self._number_placeholders(sql_statement)
+        if op_type == "SELECT":
+            info = self.parse_sql_select(numbered_sql)
+        else:
+            info = self.parse_sql_delete(numbered_sql)
+        return {'op_type': op_type, 'info': info, 'param_count': param_count}
+
+    def _bind_params(self, value, params):
+        """Sustituye recursivamente los SQLParam por sus valores convertidos."""
+        if isinstance(value, SQLParam):
+            return value.bind(params)
+        if isinstance(value, list):
+            return [self._bind_params(item, params) for item in value]
+        return value
+
+    def _execute_plan(self, plan, params=None, timing=None):
+        """
+        Enlaza los parámetros a un plan y lo ejecuta.
+        
+        Args:
+            plan (dict): Plan construido por _build_plan
+            params (list, optional): Valores de los parámetros '?'
+            timing (dict, optional): Tiempos por fase; se le suman 'plan' (enlazar
+                                     parámetros) e 'index' (ejecutar con los índices)
+            
+        Returns:
+            dict: Resultado del SELECT o DELETE
+        """
+        start = time.perf_counter()
+        info = self._bind_plan(plan, params)
+        bound = time.perf_counter()
+        
+        if info.get('error', False):
+            result = info
+        elif plan['op_type'] == "SELECT":
+            result = self._execute_select(info)
+        else:
+            result = self._execute_delete(info)
+        
+        if timing is not None:
+            timing['plan'] += bound - start
+            timing['index'] += time.perf_counter() - bound
+        return result
+
+    def _bind_plan(self, plan, params=None):
+        """
+        Enlaza los parámetros '?' de un plan.
+        
+        Returns:
+            dict: Información de la sentencia con los valores enlazados, o un error
+        """
+        info = plan['info']
+        if info.get('error', False):
+            print(f"Error en {plan['op_type']}: {info['message']}")
+            return info
+        
+        params = list(params) if params else []
+        if len(params) != plan['param_count']:
+            return {
+                'error': True,
+                'message': f"Se esperaban {plan['param_count']} parámetro(s) y se recibieron {len(params)}"
+            }
+        
+        if plan['param_count']:
+            try:
+                info = dict(info)
+                for key in ('lista_busquedas', 'lista_rangos', 'lista_espaciales', 'condicion', 'limit', 'offset'):
+                    if key in info:
+                        info[key] = self._bind_params(info[key], params)
+            except (ValueError, TypeError) as e:
+                return {
+                    'error': True,
+                    'message': f"Parámetro inválido: {str(e)}"
+                }
+        return info
+
+    def _process_prepare(self, sql_statement):
+        """
+        Procesa PREPARE nombre AS <SELECT|DELETE ...> con parámetros '?'.
+        El plan queda guardado hasta que se vuelva a preparar con el mismo nombre.
+        """
+        match = re.match(r'^\s*PREPARE\s+(\w+)\s+(?:AS|FROM)\s+(.+)$', sql_statement,
+                         re.IGNORECASE | re.DOTALL)
+        if not match:
+            return {
+                'error': True,
+                'message': "Formato de PREPARE no válido. Use: PREPARE nombre AS SELECT ..."
+            }
+        
+        name = match.group(1).lower()
+        plan = self.prepare_statement(match.group(2))
+        if plan.get('error', False):
+            return plan
+        
+        self.prepared_statements[name] = plan
+        return {
+            'error': False,
+            'name': name,
+            'operation': plan['op_type'],
+            'param_count': plan['param_count'],
+            'message': f"Sentencia '{name}' preparada con {plan['param_count']} parámetro(s)"
+        }
+
+    def prepare_statement(self, sql_statement):
+        """
+        Analiza un SELECT (sin JOIN) o DELETE con parámetros '?' y retorna su plan.
+        
+        Args:
+            sql_statement (str): La sentencia a preparar
+            
+        Returns:
+            dict: Plan para execute_prepared ({'op_type', 'info', 'param_count', 'cache_key',
+                  'schema_version'}) o un dict de error
+        """
+        self.refresh_catalog()
+        statement = self._clean_sql_statement(sql_statement).strip().rstrip(';').strip()
+        
+        if re.match(r'^\s*DELETE\s+FROM', statement, re.IGNORECASE):
+            op_type = "DELETE"
+        elif (re.match(r'^\s*SELECT', statement, re.IGNORECASE) and
+                self._find_keyword_outside_quotes_parens(statement, JOIN_KEYWORD) == -1):
+            op_type = "SELECT"
+        else:
+            return {
+                'error': True,
+                'message': "PREPARE solo soporta sentencias SELECT (sin JOIN) y DELETE"
+            }
+        
+        schema_version = self.schema_version
+        plan = self._build_plan(op_type, statement)
+        if plan['info'].get('error', False):
+            return plan['info']
+        # Misma clave que usa parse_sql_statement: comparten la caché de resultados
+        plan['cache_key'] = self._plan_cache_key(statement)
+        plan['schema_version'] = schema_version
+        return plan
+
+    def is_plan_current(self, plan):
+        """
+        Indica si un plan de prepare_statement sigue valiendo, es decir, si
+        ninguna tabla cambió de esquema desde que se preparó.
+        """
+        self.refresh_catalog()
+        return plan.get('schema_version') == self.schema_version
+
+    def execute_prepared(self, plan, params=None):
+        """
+        Ejecuta un plan de prepare_statement con los valores de sus parámetros.
+        
+        Returns:
+            dict: Resultado del SELECT o DELETE
+        """
+        self.refresh_catalog()
+        result = self._execute_plan_cached(plan['cache_key'], plan, params)
+        if plan['op_type'] == "DELETE":
+            self._flush_statistics()
+        return result
+
+    def _process_execute(self, sql_statement, params=None):
+        """
+        Procesa EXECUTE nombre (v1, v2, ...) o EXECUTE nombre USING v1, v2.
+        Si la sentencia no trae valores se usan los params recibidos por la API.
+        
+        Returns:
+            tuple: (tipo de operación ejecutada, resultado)
+        """
+        match = EXECUTE_PATTERN.match(sql_statement)
+        if not match:
+            return "EXECUTE", {
+                'error': True,
+                'message': "Formato de EXECUTE no válido. Use: EXECUTE nombre (valores)"
+            }
+        
+        name = match.group(1).lower()
+        plan = self.prepared_statements.get(name)
+        if plan is None:
+            return "EXECUTE", {
+                'error': True,
+                'message': f"La sentencia preparada '{name}' no existe"
+            }
+        
+        values_str = match.group(2) if match.group(2) is not None else match.group(3)
+        if values_str is not None:
+            params = self._parse_values(values_str)
+        
+        return plan['op_type'], self._execute_plan(plan, params)
+
     def _clean_sql_statement(self, sql_statement):
         """
         Limpia una instrucción SQL eliminando comentarios y normalizando espacios en blanco.
@@ -270,12 +953,21 @@ class SQLTableManager:
             elif re.match(r'^\s*INSERT\s+INTO', stmt, re.IGNORECASE):
                 operations.append(("INSERT", stmt))
             elif re.match(r'^\s*SELECT', stmt, re.IGNORECASE):
-                operations.append(("SELECT", stmt))
+                if self._find_keyword_outside_quotes_parens(stmt, JOIN_KEYWORD) != -1:
+                    operations.append(("JOIN", stmt))
+                else:
+                    operations.append(("SELECT", stmt))
             elif re.match(r'^\s*DELETE\s+FROM', stmt, re.IGNORECASE):
                 operations.append(("DELETE", stmt))
             # ✨ NUEVO: Detectar IMPORT FROM CSV
             elif re.match(r'^\s*IMPORT\s+FROM\s+CSV', stmt, re.IGNORECASE):
                 operations.append(("IMPORT_CSV", stmt))
+            elif re.match(r'^\s*PREPARE\s', stmt, re.IGNORECASE):
+                operations.append(("PREPARE", stmt))
+            elif re.match(r'^\s*EXECUTE\s', stmt, re.IGNORECASE):
+                operations.append(("EXECUTE", stmt))
+            elif re.match(r'^\s*ANALYZE\b', stmt, re.IGNORECASE):
+                operations.append(("ANALYZE", stmt))
             
         
         return operations
@@ -293,18 +985,23 @@ class SQLTableManager:
         table_info = self.parse_sql_create_table(sql_statement)
         if table_info:
             table_name = table_info['table_name']
-            self.tables[table_name] = table_info
-            
-            # Crear un gestor de almacenamiento para esta tabla si se proporcionó la clase
-            if self.storage_class:
-                # Si ya existe un gestor para esta tabla, lo eliminamos primero
-                if table_name in self.storage_managers:
-                    return table_name
+            with self.catalog_lock:
+                self.tables[table_name] = table_info
+                self.invalidate_plans(table_name)
+                self.invalidate_results(table_name)
+                
+                # Crear un gestor de almacenamiento para esta tabla si se proporcionó la clase
+                if self.storage_class:
+                    # Si ya existe un gestor para esta tabla, lo eliminamos primero
+                    if table_name in self.storage_managers:
+                        return table_name
 
-                # Crear un nuevo gestor
-                self.storage_managers[table_name] = self.storage_class(
-                    table_name, table_info, self.base_dir
-                )
+                    # Crear un nuevo gestor
+                    self.storage_managers[table_name] = self._new_storage_manager(table_name, table_info)
+            
+            # Los demás procesos cargan la tabla en su próxima sentencia
+            if self.catalog is not None:
+                self.catalog.bump_catalog()
             
             return table_name
         return None
@@ -333,12 +1030,14 @@ class SQLTableManager:
                 storage_manager = self.storage_managers[table_name]
                 inserted_ids = []
                 
-                for record in records:
-                    try:
-                        record_id = storage_manager.insert(record)
-                        inserted_ids.append(record_id)
-                    except Exception as e:
-                        print(f"Error al insertar registro en tabla '{table_name}': {e}")
+                # Todas las filas de la sentencia se insertan sin intercalar otras operaciones
+                with self._table_write_lock(storage_manager):
+                    for record in records:
+                        try:
+                            record_id = storage_manager.insert(record)
+                            inserted_ids.append(record_id)
+                        except Exception as e:
+                            print(f"Error al insertar registro en tabla '{table_name}': {e}")
                 
                 return {
                     'table_name': table_name,
@@ -357,6 +1056,12 @@ class SQLTableManager:
     
     
     
+    @staticmethod
+    def _table_write_lock(storage_manager):
+        """Lock de escritura de la tabla (o un contexto vacío si el gestor no tiene lock)."""
+        lock = getattr(storage_manager, 'lock', None)
+        return lock.write() if lock is not None else nullcontext()
+
     def _process_import_csv(self, sql_statement):
         """
         Procesa una instrucción IMPORT FROM CSV y la convierte en inserciones.
@@ -392,15 +1097,16 @@ class SQLTableManager:
             inserted_ids = []
             failed_inserts = []
                         
-            for i, record in enumerate(records, 1):
-                try:
-                    record_id = storage_manager.insert(record)
-                    if record_id:
-                        inserted_ids.append(record_id)
-                    else:
+            with self._table_write_lock(storage_manager):
+                for i, record in enumerate(records, 1):
+                    try:
+                        record_id = storage_manager.insert(record)
+                        if record_id:
+                            inserted_ids.append(record_id)
+                        else:
+                            failed_inserts.append(i)
+                    except Exception:
                         failed_inserts.append(i)
-                except Exception:
-                    failed_inserts.append(i)
             
             success_count = len(inserted_ids)
             fail_count = len(failed_inserts)
@@ -870,6 +1576,8 @@ class SQLTableManager:
             r"\s*(\w+)\s+([A-Za-z_\d\[\]]+)"        # Nombre y tipo de dato (como VARCHAR[50] o POINT)
             r"(?:\s+(PRIMARY\s+KEY|KEY))?"          # PRIMARY KEY o KEY
             r"(?:\s+INDEX\s+(\w+))?"                # INDEX con tipo (como BTree)
+            r"(?:\s+METRIC\s+(\w+))?"               # METRIC de distancia (euclidean / haversine)
+            r"(?:\s+CELL\s+([\d.]+))?"              # CELL: lado de celda del índice grid
             r"(?:\s+SEQ)?"                          # SEQ opcional
             r"\s*(?:,|$)",                          # Coma final o fin de línea
             re.IGNORECASE
@@ -905,6 +1613,23 @@ class SQLTableManager:
                 "is_key": False,
                 "index": index_type
             }
+
+            if match.group(5):
+                try:
+                    attribute["metric"] = normalize_metric(match.group(5))
+                except ValueError as e:
+                    print(f"Error en CREATE TABLE: {e}")
+                    return None
+            
+            if match.group(6):
+                try:
+                    cell_size = float(match.group(6))
+                except ValueError:
+                    cell_size = 0.0
+                if cell_size <= 0:
+                    print(f"Error en CREATE TABLE: tamaño de celda no válido '{match.group(6)}'")
+                    return None
+                attribute["cell_size"] = cell_size
             
             # Verificar si es clave primaria
             if is_key and is_key.upper() in ["PRIMARY KEY", "KEY"]:
@@ -1015,73 +1740,6 @@ class SQLTableManager:
         }
   
 
-    def clean_leading_trailing_ands(self,clause):
-        """Limpia ANDs al inicio y final de manera segura"""
-        clause = clause.strip()
-        
-        # Remover AND al inicio
-        if clause.upper().startswith('AND '):
-            clause = clause[4:].strip()
-        
-        # Remover AND al final
-        if clause.upper().endswith(' AND'):
-            clause = clause[:-4].strip()
-        
-        return clause
-
-    def clean_duplicate_ands(self,clause):
-        """Limpia ANDs duplicados de manera segura sin regex vulnerable"""
-        # Dividir por espacios y reconstruir
-        words = clause.split()
-        result = []
-        prev_was_and = False
-        
-        for word in words:
-            word_upper = word.upper()
-            if word_upper == 'AND':
-                if not prev_was_and:
-                    result.append(word)
-                    prev_was_and = True
-            else:
-                result.append(word)
-                prev_was_and = False
-        
-        return ' '.join(result)
-    
-    def safe_split_and_conditions(self, clause):
-        """Divide condiciones por AND de manera segura"""
-        if not clause:
-            return []
-        
-        # Convertir a mayúsculas para búsqueda
-        clause_upper = clause.upper()
-        parts = []
-        current_part = ""
-        i = 0
-        
-        while i < len(clause):
-            # Buscar " AND " (con espacios)
-            if (i <= len(clause) - 5 and 
-                clause_upper[i:i+5] == ' AND ' and
-                (i == 0 or clause[i-1] == ' ') and
-                (i+5 >= len(clause) or clause[i+5] == ' ')):
-                
-                # Encontramos un AND, guardar parte actual
-                if current_part.strip():
-                    parts.append(current_part.strip())
-                current_part = ""
-                i += 5  # Saltar " AND "
-            else:
-                current_part += clause[i]
-                i += 1
-        
-        # Agregar última parte
-        if current_part.strip():
-            parts.append(current_part.strip())
-        
-        return parts
-    
-
     def safe_extract_parentheses_content(self, sql_statement):
         """Extrae contenido entre paréntesis de manera segura"""
         # Buscar el primer paréntesis de apertura
@@ -1112,18 +1770,15 @@ class SQLTableManager:
     def _parse_where_with_ranges(self, where_clause, table_name):
         """
         Analiza una cláusula WHERE y la separa en búsquedas exactas y por rango.
-        VERSIÓN ACTUALIZADA que soporta operadores de comparación: >, <, >=, <=
-        Y maneja tipo POINT correctamente.
         
         Soporta:
         - attr=value
         - attr BETWEEN min_val AND max_val
-        - attr > value (convertido a rango)
-        - attr < value (convertido a rango)
-        - attr >= value (convertido a rango)
-        - attr <= value (convertido a rango)
+        - attr > value, attr < value, attr >= value, attr <= value (convertidos a rango)
         - Combinaciones con AND
         
+        Las funciones espaciales se procesan con _parse_where_with_spatial.
+        
         Args:
             where_clause (str): La cláusula WHERE sin la palabra WHERE.
             table_name (str): Nombre de la tabla para conversión de tipos.
@@ -1131,83 +1786,9 @@ class SQLTableManager:
         Returns:
             tuple: (lista_busquedas, lista_rangos)
         """
-        lista_busquedas = []
-        lista_rangos = []
-        
-        print(f"Analizando WHERE clause: '{where_clause}'")
-        
-        # 1. Primero extraer condiciones BETWEEN
-        between_pattern = r'(\w+)\s+BETWEEN\s+([^\s]+(?:\s+[^\s]+)*?)\s+AND\s+([^\s]+(?:\s+[^\s]+)*?)(?:\s+AND\s+|$)'
-        between_matches = list(re.finditer(between_pattern, where_clause, re.IGNORECASE))
-        
-        remaining_clause = where_clause
-        
-        # Procesar condiciones BETWEEN
-        for match in reversed(between_matches):
-            attr_name = match.group(1)
-            min_val_str = match.group(2).strip()
-            max_val_str = match.group(3).strip()
-            
-            min_val = self._convert_value(min_val_str, table_name, attr_name)
-            max_val = self._convert_value(max_val_str, table_name, attr_name)
-            
-            lista_rangos.append([attr_name, min_val, max_val])
-            print(f"BETWEEN encontrado: {attr_name} BETWEEN {min_val} AND {max_val}")
-            
-            # Remover del remaining_clause
-            remaining_clause = remaining_clause[:match.start()] + remaining_clause[match.end():]
-        
-        # 2. Extraer operadores de comparación (>=, <=, >, <)
-        comparison_patterns = [
-            (r'(\w+)\s*>=\s*([^\s]+(?:\s+[^\s]+)*?)(?:\s+AND\s+|$)', '>='),
-            (r'(\w+)\s*<=\s*([^\s]+(?:\s+[^\s]+)*?)(?:\s+AND\s+|$)', '<='),
-            (r'(\w+)\s*>\s*([^\s]+(?:\s+[^\s]+)*?)(?:\s+AND\s+|$)', '>'),
-            (r'(\w+)\s*<\s*([^\s]+(?:\s+[^\s]+)*?)(?:\s+AND\s+|$)', '<')
-        ]
-        
-        for pattern, operator in comparison_patterns:
-            matches = list(re.finditer(pattern, remaining_clause, re.IGNORECASE))
-            
-            for match in reversed(matches):
-                attr_name = match.group(1)
-                value_str = match.group(2).strip()
-                value = self._convert_value(value_str, table_name, attr_name)
-                
-                # Convertir operador de comparación a rango
-                range_result = self._comparison_to_range(attr_name, operator, value, table_name)
-                if range_result:
-                    lista_rangos.append(range_result)
-                    print(f"Comparación encontrada: {attr_name} {operator} {value} → rango")
-                
-                # Remover del remaining_clause
-                remaining_clause = remaining_clause[:match.start()] + remaining_clause[match.end():]
-        
-        # 3. Limpiar remaining_clause
-        remaining_clause  = self.clean_duplicate_ands(remaining_clause)
-        remaining_clause = self.clean_leading_trailing_ands(remaining_clause)
-        remaining_clause = remaining_clause.strip()
-        
-        # 4. Procesar condiciones de igualdad restantes
-        if remaining_clause:
-            and_parts = self.safe_split_and_conditions(remaining_clause)
-            
-            for part in and_parts:
-                part = part.strip()
-                if not part:
-                    continue
-                    
-                # Buscar condiciones de igualdad
-                eq_match = re.match(r'(\w+)\s*=\s*(.+)', part)
-                if eq_match:
-                    attr_name = eq_match.group(1)
-                    value_str = eq_match.group(2).strip()
-                    value = self._convert_value(value_str, table_name, attr_name)
-                    lista_busquedas.append([attr_name, value])
-                    print(f"Condición exacta: {attr_name} = {value}")
-                else:
-                    print(f"Advertencia: Condición no soportada: {part}")
-        
-        print(f"Resultado final - Búsquedas exactas: {lista_busquedas}, Rangos: {lista_rangos}")
+        lista_busquedas, lista_rangos, lista_espaciales = self._parse_where_with_spatial(where_clause, table_name)
+        if lista_espaciales:
+            raise ValueError("Las funciones espaciales requieren _parse_where_with_spatial")
         return lista_busquedas, lista_rangos
 
     def _comparison_to_range(self, attr_name, operator, value, table_name):
@@ -1227,6 +1808,18 @@ class SQLTableManager:
         # Determinar el tipo de dato para establecer límites
         data_type = self._get_attribute_data_type(table_name, attr_name)
         
+        if isinstance(value, SQLParam) and operator in ('>', '<'):
+            # El desplazamiento se aplica al enlazar el valor
+            if 'INT' in data_type:
+                epsilon = 1
+            elif data_type == 'POINT' or 'DECIMAL' in data_type or 'FLOAT' in data_type:
+                epsilon = 0.01
+            else:
+                return None
+            if operator == '>':
+                return [attr_name, value.shifted(epsilon), self._get_max_value_for_type(data_type)]
+            return [attr_name, self._get_min_value_for_type(data_type), value.shifted(-epsilon)]
+        
         if operator == '>':
             # attr > value → rango desde (value + epsilon) hasta infinito
             if isinstance(value, (int, float)):
@@ -1371,6 +1964,12 @@ class SQLTableManager:
         if not data_type:
             return value_str
         
+        # Parámetro '?' de una sentencia preparada: se convierte al enlazarlo
+        param = self._param_from_string(
+            value_str, lambda raw: self._convert_param_value(raw, table_name, column_name))
+        if param is not None:
+            return param
+        
         # Eliminar comillas si es un string
         if value_str.startswith(("'", '"')) and value_str.endswith(("'", '"')):
             value_str = value_str[1:-1]
@@ -1393,6 +1992,22 @@ class SQLTableManager:
             # Si hay un error de conversión, devolver el valor original
             return value_str
     
+    def _convert_param_value(self, raw, table_name, column_name):
+        """
+        Convierte el valor de un parámetro al tipo de la columna.
+        Acepta literales SQL (strings) y valores Python: números, Point o (x, y).
+        """
+        if isinstance(raw, Point):
+            return raw
+        if isinstance(raw, (list, tuple)) and len(raw) == 2:
+            raw = f"({raw[0]}, {raw[1]})"
+        elif not isinstance(raw, str):
+            raw = str(raw)
+        value = self._convert_value(raw, table_name, column_name)
+        if isinstance(value, SQLParam):
+            raise ValueError(f"Valor de parámetro no válido: {raw}")
+        return value
+    
     # Resto de métodos siguen siendo los mismos...
     def get_table(self, table_name):
         """
@@ -1404,7 +2019,7 @@ class SQLTableManager:
         Returns:
             dict: Información de la tabla o None si no existe.
         """
-
+        self.refresh_catalog()
         if table_name in self.blacklisted_tables:
             return None
             
@@ -1422,6 +2037,49 @@ class SQLTableManager:
         """
         return self.storage_managers.get(table_name)
     
+    def join_records(self, join_result):
+        """
+        Construye las filas de un JOIN combinando los registros de ambas tablas.
+        Cada registro se lee una sola vez aunque participe en varios pares.
+        
+        Args:
+            join_result (dict): Resultado de _process_join
+            
+        Returns:
+            list: Registros con columnas calificadas (tabla.columna); los joins
+                  espaciales agregan la columna 'distance'
+        """
+        # Joins por igualdad: el motor ya genera las filas con columnas calificadas
+        if 'filas' in join_result:
+            return list(join_result['filas'])
+        
+        left_table = join_result['left_table']
+        right_table = join_result['right_table']
+        storages = {
+            left_table: self.get_storage_manager(left_table),
+            right_table: self.get_storage_manager(right_table)
+        }
+        pares = join_result.get('pares', [])
+        
+        # Cada registro de cada lado se lee una sola vez, en bloque
+        cache = {}
+        for table_name, position in ((left_table, 0), (right_table, 1)):
+            record_numbers = sorted({par[position] for par in pares})
+            cache[table_name] = dict(zip(record_numbers, storages[table_name].get_many(record_numbers)))
+        
+        records_data = []
+        for left_num, right_num, distance in pares:
+            rows = {left_table: cache[left_table][left_num], right_table: cache[right_table][right_num]}
+            if not rows[left_table] or not rows[right_table]:
+                continue
+            
+            record = {f"{table_name}.{attr_name}": rows[table_name].get(attr_name)
+                      for table_name, attr_name in join_result['requested_columns']}
+            record['distance'] = distance
+            records_data.append(record)
+        
+        return records_data
+    
     def get_all_tables(self):
         """
         Obtiene todas las tablas almacenadas.
@@ -1429,22 +2087,24 @@ class SQLTableManager:
         Returns:
             dict: Diccionario con todas las tablas.
         """
-
-        
+        self.refresh_catalog()
         return {name: info for name, info in self.tables.items() 
             if name not in self.blacklisted_tables}
     
-    def execute_sql(self, sql_statement):
+    def execute_sql(self, sql_statement, params=None, timings=None, cache_results=True):
         """
         Ejecuta una instrucción SQL.
         
         Args:
             sql_statement (str): La instrucción SQL a ejecutar.
+            params (list, optional): Valores para los parámetros '?' de la instrucción.
+            timings (list, optional): Recibe los tiempos por fase de cada operación.
+            cache_results (bool): Si los resultados de SELECT se pueden guardar en la caché.
             
         Returns:
             list: Resultados de la ejecución.
         """
-        return self.parse_sql_statement(sql_statement)
+        return self.parse_sql_statement(sql_statement, params, timings, cache_results)
     
    
     def execute_delete(self, sql_delete_statement):
@@ -1476,8 +2136,18 @@ class SQLTableManager:
         Procesa una instrucción SELECT y ejecuta la búsqueda.
         VERSIÓN ACTUALIZADA con soporte para funciones espaciales R-Tree.
         """
-        select_info = self.parse_sql_select(sql_statement)
+        return self._execute_select(self.parse_sql_select(sql_statement))
+
+    def _execute_select(self, select_info):
+        """
+        Ejecuta un SELECT ya analizado (por parse_sql_select o desde la caché de planes).
         
+        Args:
+            select_info (dict): Resultado de parse_sql_select con los parámetros enlazados
+            
+        Returns:
+            dict: Información de la consulta y su resultado
+        """
         if select_info.get('error', False):
             print(f"Error en SELECT: {select_info['message']}")
             return select_info
@@ -1486,20 +2156,35 @@ class SQLTableManager:
         lista_busquedas = select_info['lista_busquedas']
         lista_rangos = select_info['lista_rangos']
         lista_espaciales = select_info.get('lista_espaciales', [])  
+        condicion = select_info.get('condicion')
         requested_attributes = select_info['requested_attributes']
+        order = {
+            'order_by': select_info.get('order_by'),
+            'descending': select_info.get('descending', False),
+            'limit': select_info.get('limit'),
+            'offset': select_info.get('offset', 0)
+        }
         
         # Ejecutar la consulta si hay un gestor de almacenamiento
         if table_name in self.storage_managers:
             storage_manager = self.storage_managers[table_name]
             
             try:
-                # Ejecutar el select con listas de búsquedas, rangos Y espaciales
-                resultado = storage_manager.select(
-                    lista_busquedas=lista_busquedas if lista_busquedas else None,
-                    lista_rangos=lista_rangos if lista_rangos else None,
-                    lista_espaciales=lista_espaciales if lista_espaciales else None,  
-                    requested_attributes=requested_attributes
-                )
+                if select_info.get('aggregates') or select_info.get('group_by'):
+                    return self._execute_aggregate(select_info, storage_manager)
+                
+                if condicion:
+                    # Condición con OR, NOT, IN o !=
+                    resultado = storage_manager.select_condition(condicion, requested_attributes=requested_attributes, **order)
+                else:
+                    # Ejecutar el select con listas de búsquedas, rangos Y espaciales
+                    resultado = storage_manager.select(
+                        lista_busquedas=lista_busquedas if lista_busquedas else None,
+                        lista_rangos=lista_rangos if lista_rangos else None,
+                        lista_espaciales=lista_espaciales if lista_espaciales else None,  
+                        requested_attributes=requested_attributes,
+                        **order
+                    )
                 
                 return {
                     'error': False,
@@ -1507,6 +2192,7 @@ class SQLTableManager:
                     'lista_busquedas': lista_busquedas,
                     'lista_rangos': lista_rangos,
                     'lista_espaciales': lista_espaciales,   
+                    'condicion': condicion,
                     'requested_attributes': requested_attributes,
                     'resultado': resultado
                 }
@@ -1525,11 +2211,357 @@ class SQLTableManager:
             }
             print(f"Error: {error_result['message']}")
             return error_result
+
+    def _execute_aggregate(self, select_info, storage_manager):
+        """
+        Ejecuta un SELECT con funciones de agregación y/o GROUP BY dentro del
+        motor: el WHERE se resuelve con los índices y solo las filas agregadas
+        forman parte del resultado.
+        
+        Returns:
+            dict: {'error', 'table_name', 'aggregate': True, 'columns', 'rows'}
+        """
+        table_name = select_info['table_name']
+        lista_busquedas = select_info['lista_busquedas']
+        lista_rangos = select_info['lista_rangos']
+        lista_espaciales = select_info.get('lista_espaciales', [])
+        condicion = select_info.get('condicion')
+        aggregates = select_info['aggregates']
+        group_by = select_info['group_by']
+        
+        record_numbers = None
+        if condicion:
+            filtro = storage_manager.select_condition(condicion)
+        elif lista_busquedas or lista_rangos or lista_espaciales:
+            filtro = storage_manager.select(
+                lista_busquedas=lista_busquedas if lista_busquedas else None,
+                lista_rangos=lista_rangos if lista_rangos else None,
+                lista_espaciales=lista_espaciales if lista_espaciales else None
+            )
+        else:
+            filtro = None
+        if filtro is not None:
+            if filtro.get('error', False):
+                return filtro
+            record_numbers = filtro['numeros_registro']
+        
+        resultado = storage_manager.aggregate(aggregates, group_by=group_by, record_numbers=record_numbers)
+        if resultado.get('error', False):
+            return resultado
+        
+        rows = resultado['rows']
+        order_by = select_info.get('order_by')
+        if order_by is not None:
+            position = group_by.index(order_by)
+            rows.sort(key=lambda row: row[position], reverse=select_info.get('descending', False))
+        offset = select_info.get('offset') or 0
+        limit = select_info.get('limit')
+        rows = rows[offset:None if limit is None else offset + limit]
+        
+        # Columnas en el orden del SELECT
+        columns = []
+        positions = []
+        for kind, value in select_info['select_items']:
+            if kind == 'AGG':
+                func, attr_name = aggregates[value]
+                columns.append(f"{func}({attr_name})")
+                positions.append(len(group_by) + value)
+            else:
+                columns.append(value)
+                positions.append(group_by.index(value))
         
+        return {
+            'error': False,
+            'table_name': table_name,
+            'aggregate': True,
+            'columns': columns,
+            'rows': [[row[position] for position in positions] for row in rows]
+        }
 
-    
+    def _process_join(self, sql_statement):
+        """
+        Procesa un SELECT con JOIN entre dos tablas y ejecuta el join.
+
+        Soporta:
+        - SELECT * FROM a JOIN b ON RADIUS(a.attr, b.attr, radio)
+        - SELECT * FROM a JOIN b ON a.attr = b.attr
+
+        Returns:
+            dict: Información del join con la lista de pares (record_a, record_b, distancia)
+                  o, para joins por igualdad, un generador 'filas' con columnas calificadas
+        """
+        join_info = self.parse_sql_join(sql_statement)
+
+        if join_info.get('error', False):
+            print(f"Error en JOIN: {join_info['message']}")
+            return join_info
+
+        left_table = join_info['left_table']
+        right_table = join_info['right_table']
+        condition = join_info['condition']
+
+        left_storage = self.storage_managers.get(left_table)
+        right_storage = self.storage_managers.get(right_table)
+        if not left_storage or not right_storage:
+            missing = left_table if not left_storage else right_table
+            error_result = {
+                'error': True,
+                'message': f"No hay un gestor de almacenamiento para la tabla '{missing}'"
+            }
+            print(f"Error: {error_result['message']}")
+            return error_result
+
+        if condition['type'] == 'EQUI':
+            return self._process_equi_join(join_info, left_storage, right_storage)
+
+        try:
+            pares = left_storage.spatial_join(
+                condition['left_attr'], right_storage, condition['right_attr'], condition['radius'],
+                condition.get('metric')
+            )
+        except Exception as e:
+            error_result = {
+                'error': True,
+                'message': f"Error al ejecutar JOIN entre '{left_table}' y '{right_table}': {str(e)}"
+            }
+            print(f"Error: {error_result['message']}")
+            return error_result
+
+        return {
+            'error': False,
+            'left_table': left_table,
+            'right_table': right_table,
+            'condition': condition,
+            'requested_columns': join_info['requested_columns'],
+            'pares': pares
+        }
+
+    def _process_equi_join(self, join_info, left_storage, right_storage):
+        """
+        Ejecuta un JOIN por igualdad. Solo se leen las columnas pedidas y las
+        filas se generan a medida que el motor encuentra los pares.
+        """
+        left_table = join_info['left_table']
+        right_table = join_info['right_table']
+        condition = join_info['condition']
+        requested_columns = join_info['requested_columns']
+        columns = {
+            table_name: list(dict.fromkeys(attr for t, attr in requested_columns if t == table_name))
+            for table_name in (left_table, right_table)
+        }
+
+        try:
+            strategy, pares = left_storage.equi_join(
+                condition['left_attr'], right_storage, condition['right_attr'],
+                columns[left_table], columns[right_table]
+            )
+        except Exception as e:
+            error_result = {
+                'error': True,
+                'message': f"Error al ejecutar JOIN entre '{left_table}' y '{right_table}': {str(e)}"
+            }
+            print(f"Error: {error_result['message']}")
+            return error_result
+
+        print(f"JOIN {left_table}.{condition['left_attr']} = {right_table}.{condition['right_attr']}: {strategy}")
+
+        def filas():
+            for _, _, left_row, right_row in pares:
+                rows = {left_table: left_row, right_table: right_row}
+                yield {f"{table_name}.{attr_name}": rows[table_name][attr_name]
+                       for table_name, attr_name in requested_columns}
+
+        return {
+            'error': False,
+            'left_table': left_table,
+            'right_table': right_table,
+            'condition': condition,
+            'requested_columns': requested_columns,
+            'strategy': strategy,
+            'filas': filas()
+        }
+
+    def parse_sql_join(self, sql_statement):
+        """
+        Analiza un SELECT con JOIN entre dos tablas.
+
+        Formato soportado:
+        SELECT <cols> FROM tabla_a JOIN tabla_b ON RADIUS(tabla_a.attr, tabla_b.attr, radio)
+        SELECT <cols> FROM tabla_a JOIN tabla_b ON tabla_a.attr = tabla_b.attr
+        donde <cols> es * o una lista de columnas calificadas (tabla.columna).
+
+        Returns:
+            dict: Información extraída o un diccionario de error
+        """
+        invalid = {
+            "error": True,
+            "message": "Formato de JOIN no válido. Use: SELECT * FROM a JOIN b ON RADIUS(a.attr, b.attr, radio)"
+        }
+
+        s = sql_statement.strip().rstrip(';')
+        from_pos = self._find_keyword_outside_quotes_parens(s, FROM_KEYWORD, len(SELECT_KEYWORD))
+        if from_pos == -1:
+            return invalid
+
+        columns_part = s[len(SELECT_KEYWORD):from_pos].strip()
+        after_from = s[from_pos + len(FROM_KEYWORD):].strip()
+
+        left_table = self._extract_table_name(after_from)
+        rest = after_from[len(left_table):].strip()
+        if not left_table or not rest.upper().startswith(JOIN_KEYWORD + ' '):
+            return invalid
+
+        rest = rest[len(JOIN_KEYWORD):].strip()
+        right_table = self._extract_table_name(rest)
+        rest = rest[len(right_table):].strip()
+        if not right_table or not rest.upper().startswith(ON_KEYWORD + ' '):
+            return invalid
+
+        condition_str = rest[len(ON_KEYWORD):].strip()
+
+        for table_name in (left_table, right_table):
+            if table_name not in self.tables:
+                return {
+                    "error": True,
+                    "message": f"La tabla '{table_name}' no existe"
+                }
+
+        condition = self._parse_join_condition(condition_str, left_table, right_table)
+        if condition.get('error', False):
+            return condition
+
+        requested_columns = self._parse_join_columns(columns_part, left_table, right_table)
+        if isinstance(requested_columns, dict):
+            return requested_columns
+
+        return {
+            'error': False,
+            'left_table': left_table,
+            'right_table': right_table,
+            'condition': condition,
+            'requested_columns': requested_columns
+        }
+
+    def _parse_join_condition(self, condition_str, left_table, right_table):
+        """
+        Analiza la condición ON de un JOIN: espacial, RADIUS(a.attr, b.attr, radio[, 'metrica']),
+        o por igualdad, a.attr = b.attr.
+        Las columnas se normalizan para que left_attr pertenezca a left_table.
+        """
+        equi = re.fullmatch(r"(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)", condition_str)
+        if equi:
+            return self._parse_equi_join_condition(equi.groups(), left_table, right_table)
+
+        match = re.fullmatch(
+            r"RADIUS\s*\(\s*(\w+)\.(\w+)\s*,\s*(\w+)\.(\w+)\s*,\s*([\d.]+)"
+            r"(?:\s*,\s*['\"]?(\w+)['\"]?)?\s*\)",
+            condition_str, re.IGNORECASE
+        )
+        if not match:
+            return {
+                "error": True,
+                "message": f"Condición de JOIN no soportada: {condition_str}"
+            }
+
+        table_1, attr_1, table_2, attr_2, radius_str, metric = match.groups()
+        columns = {table_1: attr_1, table_2: attr_2}
+        if set(columns) != {left_table, right_table}:
+            return {
+                "error": True,
+                "message": f"La condición de JOIN debe referenciar a '{left_table}' y '{right_table}'"
+            }
+
+        for table_name, attr_name in columns.items():
+            if self._get_attribute_data_type(table_name, attr_name) != 'POINT':
+                return {
+                    "error": True,
+                    "message": f"El atributo '{table_name}.{attr_name}' debe ser de tipo POINT"
+                }
+
+        condition = {
+            'type': 'RADIUS',
+            'left_attr': columns[left_table],
+            'right_attr': columns[right_table],
+            'radius': float(radius_str)
+        }
+
+        if metric:
+            try:
+                condition['metric'] = normalize_metric(metric)
+            except ValueError as e:
+                return {"error": True, "message": str(e)}
+
+        return condition
+
+    def _parse_equi_join_condition(self, groups, left_table, right_table):
+        """
+        Valida la condición a.attr = b.attr: ambos atributos deben existir,
+        tener el mismo tipo y no ser POINT.
+        """
+        table_1, attr_1, table_2, attr_2 = groups
+        columns = {table_1: attr_1, table_2: attr_2}
+        if set(columns) != {left_table, right_table}:
+            return {
+                "error": True,
+                "message": f"La condición de JOIN debe referenciar a '{left_table}' y '{right_table}'"
+            }
+
+        types = {}
+        for table_name, attr_name in columns.items():
+            data_type = self._get_attribute_data_type(table_name, attr_name)
+            if data_type == 'UNKNOWN':
+                return {
+                    "error": True,
+                    "message": f"El atributo '{attr_name}' no existe en la tabla '{table_name}'"
+                }
+            if data_type == 'POINT':
+                return {
+                    "error": True,
+                    "message": f"El atributo '{table_name}.{attr_name}' es POINT; use RADIUS para joins espaciales"
+                }
+            types[table_name] = data_type.split('[')[0]
+
+        if types[left_table] != types[right_table]:
+            return {
+                "error": True,
+                "message": f"Los atributos del JOIN tienen tipos distintos: {types[left_table]} y {types[right_table]}"
+            }
+
+        return {
+            'type': 'EQUI',
+            'left_attr': columns[left_table],
+            'right_attr': columns[right_table]
+        }
+
+    def _parse_join_columns(self, columns_part, left_table, right_table):
+        """
+        Resuelve las columnas solicitadas de un JOIN a pares (tabla, columna).
+
+        Returns:
+            list: Lista de tuplas (tabla, columna) o un diccionario de error
+        """
+        if columns_part == "*":
+            return [(table_name, attr['name'])
+                    for table_name in (left_table, right_table)
+                    for attr in self.tables[table_name]['attributes']]
+
+        requested_columns = []
+        for column in [c.strip() for c in columns_part.split(',')]:
+            table_name, _, attr_name = column.partition('.')
+            if table_name not in (left_table, right_table) or not attr_name:
+                return {
+                    "error": True,
+                    "message": f"La columna '{column}' debe tener la forma tabla.columna"
+                }
+            if attr_name not in {attr['name'] for attr in self.tables[table_name]['attributes']}:
+                return {
+                    "error": True,
+                    "message": f"El atributo '{attr_name}' no existe en la tabla '{table_name}'"
+                }
+            requested_columns.append((table_name, attr_name))
+
+        return requested_columns
 
-    
     def _safe_parse_basic_delete(self, sql_statement: str):
         """
         Parser lineal y seguro para:
@@ -1563,13 +2595,72 @@ class SQLTableManager:
             return table_name, None
 
         # 6) Si hay algo, debe ser WHERE (delimitado) al inicio
-        where_pos = self._find_keyword_outside_quotes_parens(rest, WHERE_KEYWORD, 0)
+        where_pos = self._find_keyword_outside_quotes_parens(rest, WHERE_KEYWORD.strip(), 0)
         if where_pos == 0:
             where_clause = rest[len(WHERE_KEYWORD):].strip()
             return table_name, (where_clause if where_clause else None)
 
         # Si aparece WHERE más adelante o hay basura antes, es inválido
         return None, None
+    def _split_select_modifiers(self, sql_statement):
+        """
+        Separa ORDER BY, LIMIT y OFFSET del final de un SELECT. LIMIT y OFFSET
+        aceptan un entero no negativo o un parámetro '?'.
+        
+        Returns:
+            tuple: (sql sin modificadores, order_by, descending, limit, offset)
+            
+        Raises:
+            ValueError: Si sobra texto después de los modificadores o LIMIT/OFFSET
+                        no es un entero no negativo
+        """
+        from_pos = self._find_keyword_outside_quotes_parens(sql_statement, FROM_KEYWORD)
+        if from_pos == -1:
+            return sql_statement, None, False, None, 0
+        
+        positions = [self._find_keyword_outside_quotes_parens(sql_statement, keyword, from_pos)
+                     for keyword in SELECT_MODIFIER_KEYWORDS]
+        positions = [position for position in positions if position != -1]
+        if not positions:
+            return sql_statement, None, False, None, 0
+        
+        start = min(positions)
+        modifiers = sql_statement[start:].strip()
+        match = SELECT_MODIFIERS_PATTERN.fullmatch(modifiers)
+        if not match:
+            raise ValueError(f"Modificadores de SELECT no válidos: '{modifiers}'")
+        
+        order_by, direction, limit, offset = match.groups()
+        
+        def to_int(keyword, value):
+            if value is None:
+                return None
+            param = self._param_from_string(value, lambda bound: self._non_negative_int(keyword, bound))
+            if param is not None:
+                return param
+            if not value.isdigit():
+                raise ValueError(f"{keyword} debe ser un entero no negativo")
+            return int(value)
+        
+        return (
+            sql_statement[:start],
+            order_by,
+            (direction or '').upper() == 'DESC',
+            to_int('LIMIT', limit),
+            to_int('OFFSET', offset) or 0
+        )
+
+    def _non_negative_int(self, keyword, value):
+        """Convierte el valor enlazado a LIMIT/OFFSET, que no puede ser negativo."""
+        if isinstance(value, str):
+            value = value.strip()
+            valid = value.isdigit()
+        else:
+            valid = not isinstance(value, bool) and isinstance(value, (int, float)) and value == int(value) >= 0
+        if not valid:
+            raise ValueError(f"{keyword} debe ser un entero no negativo")
+        return int(value)
+
     def _safe_parse_basic_select(self, sql_statement: str):
         """
         Parser lineal y seguro para: SELECT <cols> FROM <tabla> [WHERE <cláusula>][;]
@@ -1697,7 +2788,22 @@ class SQLTableManager:
         - SELECT * FROM tabla WHERE attr BETWEEN min_val AND max_val
         - SELECT * FROM tabla WHERE RADIUS(attr, center_point, radius)   
         - SELECT * FROM tabla WHERE KNN(attr, center_point, k)         
+        - SELECT attr, COUNT(*), SUM(attr), AVG(attr), MIN(attr), MAX(attr) FROM tabla [WHERE ...] [GROUP BY attr, ...]
+        - ... [ORDER BY attr [ASC|DESC]] [LIMIT n] [OFFSET m]
         """
+        try:
+            sql_statement, order_by, descending, limit, offset = self._split_select_modifiers(sql_statement)
+        except ValueError as e:
+            return {
+                "error": True,
+                "message": str(e)
+            }
+        group_by = []
+        group_match = GROUP_BY_PATTERN.search(sql_statement)
+        if group_match:
+            group_by = [attr.strip() for attr in group_match.group(1).split(',')]
+            sql_statement = sql_statement[:group_match.start()]
+        
         # Patrón para SELECT básico
         columns_str, table_name, where_clause = self._safe_parse_basic_select(sql_statement)
         if not columns_str or not table_name:
@@ -1716,30 +2822,62 @@ class SQLTableManager:
         
         # Procesar columnas solicitadas (código existente)
         requested_attributes = []
+        aggregates = []
+        select_items = []
+        table_attributes = {attr['name'] for attr in self.tables[table_name]['attributes']}
         if columns_str == "*":
             requested_attributes = [attr['name'] for attr in self.tables[table_name]['attributes']]
         else:
             attr_names = [attr.strip() for attr in columns_str.split(',')]
-            table_attributes = {attr['name'] for attr in self.tables[table_name]['attributes']}
             
             for attr_name in attr_names:
+                aggregate_match = AGGREGATE_PATTERN.match(attr_name)
+                if aggregate_match:
+                    func, argument = aggregate_match.group(1).upper(), aggregate_match.group(2)
+                    if argument != '*' and argument not in table_attributes:
+                        return {
+                            "error": True,
+                            "message": f"El atributo '{argument}' no existe en la tabla '{table_name}'"
+                        }
+                    select_items.append(['AGG', len(aggregates)])
+                    aggregates.append([func, argument])
+                    continue
                 if attr_name not in table_attributes:
                     return {
                         "error": True,
                         "message": f"El atributo '{attr_name}' no existe en la tabla '{table_name}'"
                     }
-            
-            requested_attributes = attr_names
+                select_items.append(['COL', attr_name])
+                requested_attributes.append(attr_name)
+        
+        if aggregates or group_by:
+            for attr_name in group_by:
+                if attr_name not in table_attributes:
+                    return {
+                        "error": True,
+                        "message": f"El atributo '{attr_name}' de GROUP BY no existe en la tabla '{table_name}'"
+                    }
+            if columns_str == "*" or any(name not in group_by for name in requested_attributes):
+                return {
+                    "error": True,
+                    "message": "Las columnas sin función de agregación deben estar en GROUP BY"
+                }
+            if order_by is not None and order_by not in group_by:
+                return {
+                    "error": True,
+                    "message": "ORDER BY en una consulta agregada debe usar una columna de GROUP BY"
+                }
         
         # Analizar condiciones WHERE y separar en búsquedas exactas, rangos Y espaciales
         lista_busquedas = []
         lista_rangos = []
         lista_espaciales = []   
+        condicion = None
         
         if where_clause:
             try:
-                # 🔧 USAR SOLO EL NUEVO MÉTODO que soporta espaciales
-                lista_busquedas, lista_rangos, lista_espaciales = self._parse_where_with_spatial(where_clause, table_name)
+                # Conjunciones simples en listas; OR, NOT, IN o != como árbol de condición
+                lista_busquedas, lista_rangos, lista_espaciales, condicion = self._parse_where_condition(where_clause, table_name)
             except Exception as e:
                 return {
                     "error": True,
@@ -1753,161 +2891,185 @@ class SQLTableManager:
             'requested_attributes': requested_attributes,
             'lista_busquedas': lista_busquedas,
             'lista_rangos': lista_rangos,
-            'lista_espaciales': lista_espaciales   
+            'lista_espaciales': lista_espaciales,
+            'condicion': condicion,
+            'aggregates': aggregates,
+            'group_by': group_by,
+            'select_items': select_items,
+            'order_by': order_by,
+            'descending': descending,
+            'limit': limit,
+            'offset': offset
         }
 
     def _parse_where_with_spatial(self, where_clause, table_name):
         """
-        Parser espacial ULTRA SIMPLE usando split manual.
+        Analiza una cláusula WHERE con el parser de sql_parser y separa sus
+        condiciones en búsquedas exactas, rangos y funciones espaciales.
+        
+        El análisis es lineal en el tamaño de la cláusula. Las condiciones deben
+        estar unidas por AND; para OR, NOT, IN y != use _parse_where_condition.
+        
+        Args:
+            where_clause (str): La cláusula WHERE sin la palabra WHERE.
+            table_name (str): Nombre de la tabla para conversión de tipos.
+            
+        Returns:
+            tuple: (lista_busquedas, lista_rangos, lista_espaciales)
+            
+        Raises:
+            ValueError: Si la cláusula no es válida o usa una condición no soportada
+        """
+        return self._split_conjuncts(conjuncts(parse_where(where_clause)), table_name)
+
+    def _parse_where_condition(self, where_clause, table_name):
+        """
+        Analiza una cláusula WHERE completa. Si es una conjunción de condiciones
+        simples se devuelve en listas (como _parse_where_with_spatial); si usa
+        OR, NOT, IN o != se devuelve como árbol de condición para
+        TableStorageManager.select_condition.
+        
+        Args:
+            where_clause (str): La cláusula WHERE sin la palabra WHERE.
+            table_name (str): Nombre de la tabla para conversión de tipos.
+            
+        Returns:
+            tuple: (lista_busquedas, lista_rangos, lista_espaciales, condicion o None)
+        """
+        where_tree = parse_where(where_clause)
+        conditions = conjuncts(where_tree)
+        
+        if all(self._is_simple_condition(condition) for condition in conditions):
+            return (*self._split_conjuncts(conditions, table_name), None)
+        
+        return [], [], [], self._condition_tree(where_tree, table_name)
+
+    def _is_simple_condition(self, condition):
+        """Condiciones que select resuelve directamente (sin OR, NOT, IN ni !=)."""
+        if isinstance(condition, Comparison):
+            return condition.op not in ('!=', '<>')
+        return isinstance(condition, (Between, SpatialCall))
+
+    def _split_conjuncts(self, conditions, table_name):
+        """
+        Separa condiciones simples unidas por AND en búsquedas exactas,
+        rangos y funciones espaciales.
         """
         lista_busquedas = []
         lista_rangos = []
         lista_espaciales = []
         
-        
-        remaining_clause = where_clause.strip()
-        
-        # Función helper para extraer función espacial
-        def extract_spatial_function(clause, func_name):
-            """Extrae función espacial usando búsqueda manual"""
-            func_upper = func_name.upper()
-            
-            # Buscar inicio de la función (case insensitive)
-            start_idx = clause.upper().find(func_upper + '(')
-            if start_idx == -1:
-                return None, clause
-            
-            # Encontrar paréntesis balanceados
-            paren_start = start_idx + len(func_upper)
-            paren_count = 0
-            end_idx = paren_start
-            
-            while end_idx < len(clause):
-                if clause[end_idx] == '(':
-                    paren_count += 1
-                elif clause[end_idx] == ')':
-                    paren_count -= 1
-                    if paren_count == 0:
-                        break
-                end_idx += 1
-            
-            if paren_count != 0:
-                return None, clause
-            
-            # Extraer contenido entre paréntesis
-            content = clause[paren_start + 1:end_idx]
-            
-            
-            # PARSING MANUAL SUPER SIMPLE
-            # Buscar las tres partes separadas por comas, pero respetando las comillas
-            parts = []
-            current_part = ""
-            in_quotes = False
-            quote_char = None
-            paren_depth = 0
-            
-            for char in content:
-                if not in_quotes and char in ["'", '"']:
-                    in_quotes = True
-                    quote_char = char
-                    current_part += char
-                elif in_quotes and char == quote_char:
-                    in_quotes = False
-                    quote_char = None
-                    current_part += char
-                elif not in_quotes and char == '(':
-                    paren_depth += 1
-                    current_part += char
-                elif not in_quotes and char == ')':
-                    paren_depth -= 1
-                    current_part += char
-                elif not in_quotes and char == ',' and paren_depth == 0:
-                    # Encontramos un separador válido
-                    parts.append(current_part.strip())
-                    current_part = ""
-                else:
-                    current_part += char
-            
-            # Agregar última parte
-            if current_part.strip():
-                parts.append(current_part.strip())
+        for condition in conditions:
+            if isinstance(condition, Comparison):
+                value = self._convert_value(condition.value, table_name, condition.attr)
+                if condition.op == '=':
+                    lista_busquedas.append([condition.attr, value])
+                    continue
+                range_result = None
+                if condition.op in ('>', '>=', '<', '<='):
+                    range_result = self._comparison_to_range(condition.attr, condition.op, value, table_name)
+                if not range_result:
+                    raise ValueError(f"Condición no soportada: {condition.attr} {condition.op} {condition.value}")
+                lista_rangos.append(range_result)
             
+            elif isinstance(condition, Between):
+                min_val = self._convert_value(condition.low, table_name, condition.attr)
+                max_val = self._convert_value(condition.high, table_name, condition.attr)
+                lista_rangos.append([condition.attr, min_val, max_val])
             
-            if len(parts) == 3:
-                attr_name = parts[0].strip()
-                center_str = parts[1].strip()
-                param_str = parts[2].strip()
-                
-                # Remover comillas externas del center_str
-                if (center_str.startswith("'") and center_str.endswith("'")) or \
-                (center_str.startswith('"') and center_str.endswith('"')):
-                    center_str = center_str[1:-1]
-                
-               
-                new_clause = clause[:start_idx] + clause[end_idx + 1:]
-                
-                return (attr_name, center_str, param_str), new_clause.strip()
+            elif isinstance(condition, SpatialCall):
+                lista_espaciales.append(self._spatial_condition(condition, table_name))
             
-            return None, clause
+            else:
+                raise ValueError(f"Condición no soportada: {condition}")
         
-        # 1. Extraer RADIUS
-        radius_result, remaining_clause = extract_spatial_function(remaining_clause, 'RADIUS')
-        if radius_result:
-            try:
-                attr_name, center_str, radius_str = radius_result
-                
-                center_point = self._convert_value(center_str, table_name, attr_name)
-                radius = float(radius_str)
-                
-                lista_espaciales.append(['RADIUS', attr_name, center_point, radius])
-                
-            except Exception as e:
-                import traceback
-                traceback.print_exc()
+        print(f"RESULTADO: Exactas={lista_busquedas}, Rangos={lista_rangos}, Espaciales={lista_espaciales}")
+        return lista_busquedas, lista_rangos, lista_espaciales
+
+    def _condition_tree(self, node, table_name):
+        """
+        Convierte el AST de la cláusula WHERE en el árbol de listas que evalúa
+        TableStorageManager.select_condition.
+        """
+        if isinstance(node, And):
+            return ['AND', [self._condition_tree(item, table_name) for item in node.items]]
         
-        # 2. Extraer KNN  
-        knn_result, remaining_clause = extract_spatial_function(remaining_clause, 'KNN')
-        if knn_result:
-            try:
-                attr_name, center_str, k_str = knn_result
-                
-                center_point = self._convert_value(center_str, table_name, attr_name)
-                k = int(k_str)
-                
-                lista_espaciales.append(['KNN', attr_name, center_point, k])
-                
-            except Exception as e:
-                import traceback
-                traceback.print_exc()
+        if isinstance(node, Or):
+            return ['OR', [self._condition_tree(item, table_name) for item in node.items]]
         
-        # 3. Procesar resto de condiciones
-        remaining_clause = remaining_clause.strip()
+        if isinstance(node, Not):
+            return ['NOT', self._condition_tree(node.item, table_name)]
         
-        # Limpiar ANDs sobrantes
-        while remaining_clause.startswith('AND '):
-            remaining_clause = remaining_clause[4:].strip()
-        while remaining_clause.endswith(' AND'):
-            remaining_clause = remaining_clause[:-4].strip()
+        if isinstance(node, InList):
+            values = [self._convert_value(value, table_name, node.attr) for value in node.values]
+            return ['IN', node.attr, values]
         
+        if isinstance(node, Comparison):
+            value = self._convert_value(node.value, table_name, node.attr)
+            if node.op in ('!=', '<>'):
+                return ['NOT', ['EQ', node.attr, value]]
+            if node.op == '=':
+                return ['EQ', node.attr, value]
+            range_result = self._comparison_to_range(node.attr, node.op, value, table_name)
+            if not range_result:
+                raise ValueError(f"Condición no soportada: {node.attr} {node.op} {node.value}")
+            return ['RANGE', *range_result]
         
-        if remaining_clause:
-            try:
-                temp_busquedas, temp_rangos = self._parse_where_with_ranges(remaining_clause, table_name)
-                lista_busquedas.extend(temp_busquedas)
-                lista_rangos.extend(temp_rangos)
-            except Exception as e:
-                print(f"Error en condiciones restantes: {e}")
+        if isinstance(node, Between):
+            min_val = self._convert_value(node.low, table_name, node.attr)
+            max_val = self._convert_value(node.high, table_name, node.attr)
+            return ['RANGE', node.attr, min_val, max_val]
         
-        print(f"RESULTADO: Exactas={lista_busquedas}, Rangos={lista_rangos}, Espaciales={lista_espaciales}")
-        return lista_busquedas, lista_rangos, lista_espaciales
+        if isinstance(node, SpatialCall):
+            return ['SPATIAL', self._spatial_condition(node, table_name)]
+        
+        raise ValueError(f"Condición no soportada: {node}")
+
+    def _spatial_condition(self, condition, table_name):
+        """
+        Convierte un nodo RADIUS/KNN del AST al formato de lista_espaciales:
+        [tipo, attr, centro, radio|k] con la métrica como quinto elemento opcional.
+        """
+        center = self._convert_spatial_center(condition.center, table_name, condition.attr)
+        cast = float if condition.func == 'RADIUS' else int
+        param = self._param_from_string(condition.param, cast) or cast(condition.param)
+        
+        espacial = [condition.func, condition.attr, center, param]
+        if condition.metric is not None:
+            espacial.append(normalize_metric(condition.metric))
+        return espacial
+
+    def _convert_spatial_center(self, center, table_name, attr_name):
+        """
+        Convierte el centro de una función espacial RADIUS/KNN.
+        Acepta un punto '(x, y)' o una lista de puntos ('(x1, y1)', '(x2, y2)', ...)
+        para resolver varias consultas en una sola búsqueda en lote.
+        
+        Returns:
+            Point o list[Point]
+        """
+        if isinstance(center, list):
+            return [self._convert_value(value, table_name, attr_name) for value in center]
+        
+        return self._convert_value(center, table_name, attr_name)
 
     def _process_delete(self, sql_statement):
         """
         Procesa una instrucción DELETE FROM y ejecuta la eliminación.
         VERSIÓN ACTUALIZADA con soporte para funciones espaciales.
         """
-        delete_info = self.parse_sql_delete(sql_statement)
+        return self._execute_delete(self.parse_sql_delete(sql_statement))
+
+    def _execute_delete(self, delete_info):
+        """
+        Ejecuta un DELETE ya analizado (por parse_sql_delete o desde la caché de planes).
         
+        Args:
+            delete_info (dict): Resultado de parse_sql_delete con los parámetros enlazados
+            
+        Returns:
+            dict: Información de la eliminación
+        """
         if delete_info.get('error', False):
             print(f"Error en DELETE: {delete_info['message']}")
             return delete_info
@@ -1916,6 +3078,7 @@ class SQLTableManager:
         lista_busquedas = delete_info['lista_busquedas']
         lista_rangos = delete_info['lista_rangos']
         lista_espaciales = delete_info.get('lista_espaciales', [])   
+        condicion = delete_info.get('condicion')
         
         print(f"Procesando DELETE en tabla: {table_name}")
         if lista_busquedas:
@@ -1938,11 +3101,14 @@ class SQLTableManager:
             storage_manager = self.storage_managers[table_name]
             
             try:
-                resultado_busqueda = storage_manager.select(
-                    lista_busquedas=lista_busquedas if lista_busquedas else None,
-                    lista_rangos=lista_rangos if lista_rangos else None,
-                    lista_espaciales=lista_espaciales if lista_espaciales else None  
-                )
+                if condicion:
+                    resultado_busqueda = storage_manager.select_condition(condicion)
+                else:
+                    resultado_busqueda = storage_manager.select(
+                        lista_busquedas=lista_busquedas if lista_busquedas else None,
+                        lista_rangos=lista_rangos if lista_rangos else None,
+                        lista_espaciales=lista_espaciales if lista_espaciales else None  
+                    )
                 
                 if resultado_busqueda.get('error', False):
                     print(f"Error al buscar registros para eliminar: {resultado_busqueda.get('message', 'Error desconocido')}")
@@ -2025,9 +3191,11 @@ class SQLTableManager:
         lista_busquedas = []
         lista_rangos = []
         lista_espaciales = []   
+        condicion = None
         
         try:
-            lista_busquedas, lista_rangos, lista_espaciales = self._parse_where_with_spatial(where_clause, table_name)
+            # Conjunciones simples en listas; OR, NOT, IN o != como árbol de condición
+            lista_busquedas, lista_rangos, lista_espaciales, condicion = self._parse_where_condition(where_clause, table_name)
         except Exception as e:
             return {
                 "error": True,
@@ -2039,5 +3207,6 @@ class SQLTableManager:
             'table_name': table_name,
             'lista_busquedas': lista_busquedas,
             'lista_rangos': lista_rangos,
-            'lista_espaciales': lista_espaciales   
+            'lista_espaciales': lista_espaciales,
+            'condicion': condicion
         }
\ No newline at end of file
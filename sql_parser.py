@@ -0,0 +1,439 @@
+# Tipos de token
+IDENT = 'IDENT'
+NUMBER = 'NUMBER'
+STRING = 'STRING'
+PARAM = 'PARAM'
+OP = 'OP'
+LPAREN = 'LPAREN'
+RPAREN = 'RPAREN'
+COMMA = 'COMMA'
+KEYWORD = 'KEYWORD'
+EOF = 'EOF'
+
+KEYWORDS = {'AND', 'OR', 'NOT', 'IN', 'BETWEEN'}
+SPATIAL_FUNCTIONS = {'RADIUS', 'KNN'}
+COMPARISON_OPERATORS = {'=', '!=', '<>', '<', '<=', '>', '>='}
+
+# Profundidad máxima de anidamiento (paréntesis / NOT) antes de rechazar la cláusula
+MAX_DEPTH = 100
+
+
+class SQLSyntaxError(ValueError):
+    """Error de sintaxis en una cláusula WHERE, con la posición del problema."""
+
+    def __init__(self, message, position=None):
+        if position is not None:
+            message = f"{message} (posición {position})"
+        super().__init__(message)
+        self.position = position
+
+
+class Token:
+    __slots__ = ('type', 'value', 'position')
+
+    def __init__(self, type, value, position):
+        self.type = type
+        self.value = value
+        self.position = position
+
+    def __repr__(self):
+        return f"Token({self.type}, {self.value!r})"
+
+
+def tokenize(text):
+    """
+    Divide una cláusula WHERE en tokens en una sola pasada.
+
+    Args:
+        text (str): Cláusula WHERE (sin la palabra WHERE)
+
+    Returns:
+        list[Token]: Tokens terminados con un token EOF
+
+    Raises:
+        SQLSyntaxError: Si hay un carácter inválido o un string sin cerrar
+    """
+    tokens = []
+    i = 0
+    length = len(text)
+
+    while i < length:
+        char = text[i]
+
+        if char.isspace():
+            i += 1
+
+        elif char in "'\"":
+            end = text.find(char, i + 1)
+            if end == -1:
+                raise SQLSyntaxError("String sin cerrar", i)
+            tokens.append(Token(STRING, text[i:end + 1], i))
+            i = end + 1
+
+        elif char.isdigit() or (char in '+-.' and i + 1 < length and
+                                (text[i + 1].isdigit() or text[i + 1] == '.')):
+            start = i
+            i += 1
+            while i < length and (text[i].isdigit() or text[i] in '.eE' or
+                                  (text[i] in '+-' and text[i - 1] in 'eE')):
+                i += 1
+            tokens.append(Token(NUMBER, text[start:i], start))
+
+        elif char.isalpha() or char == '_':
+            start = i
+            while i < length and (text[i].isalnum() or text[i] in '_.'):
+                i += 1
+            word = text[start:i]
+            if word.upper() in KEYWORDS:
+                tokens.append(Token(KEYWORD, word.upper(), start))
+            else:
+                tokens.append(Token(IDENT, word, start))
+
+        elif char == '?':
+            start = i
+            i += 1
+            while i < length and text[i].isdigit():
+                i += 1
+            if i == start + 1:
+                raise SQLSyntaxError("Parámetro '?' sin numerar", start)
+            tokens.append(Token(PARAM, text[start:i], start))
+
+        elif char in '<>!=':
+            two = text[i:i + 2]
+            if two in COMPARISON_OPERATORS:
+                tokens.append(Token(OP, two, i))
+                i += 2
+            elif char in '<>=':
+                tokens.append(Token(OP, char, i))
+                i += 1
+            else:
+                raise SQLSyntaxError(f"Operador inválido '{char}'", i)
+
+        elif char == '(':
+            tokens.append(Token(LPAREN, char, i))
+            i += 1
+        elif char == ')':
+            tokens.append(Token(RPAREN, char, i))
+            i += 1
+        elif char == ',':
+            tokens.append(Token(COMMA, char, i))
+            i += 1
+
+        else:
+            raise SQLSyntaxError(f"Carácter inesperado '{char}'", i)
+
+    tokens.append(Token(EOF, None, length))
+    return tokens
+
+
+# Nodos del AST
+
+class Comparison:
+    """attr <op> value"""
+    __slots__ = ('attr', 'op', 'value')
+
+    def __init__(self, attr, op, value):
+        self.attr = attr
+        self.op = op
+        self.value = value
+
+    def __repr__(self):
+        return f"Comparison({self.attr} {self.op} {self.value})"
+
+
+class Between:
+    """attr BETWEEN low AND high"""
+    __slots__ = ('attr', 'low', 'high')
+
+    def __init__(self, attr, low, high):
+        self.attr = attr
+        self.low = low
+        self.high = high
+
+    def __repr__(self):
+        return f"Between({self.attr}, {self.low}, {self.high})"
+
+
+class InList:
+    """attr IN (v1, v2, ...)"""
+    __slots__ = ('attr', 'values')
+
+    def __init__(self, attr, values):
+        self.attr = attr
+        self.values = values
+
+    def __repr__(self):
+        return f"InList({self.attr}, {self.values})"
+
+
+class SpatialCall:
+    """RADIUS(attr, center, radius[, metric]) o KNN(attr, center, k[, metric])"""
+    __slots__ = ('func', 'attr', 'center', 'param', 'metric')
+
+    def __init__(self, func, attr, center, param, metric=None):
+        self.func = func
+        self.attr = attr
+        self.center = center
+        self.param = param
+        self.metric = metric
+
+    def __repr__(self):
+        return f"SpatialCall({self.func}, {self.attr}, {self.center}, {self.param}, {self.metric})"
+
+
+class And:
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        self.items = items
+
+    def __repr__(self):
+        return f"And({self.items})"
+
+
+class Or:
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        self.items = items
+
+    def __repr__(self):
+        return f"Or({self.items})"
+
+
+class Not:
+    __slots__ = ('item',)
+
+    def __init__(self, item):
+        self.item = item
+
+    def __repr__(self):
+        return f"Not({self.item})"
+
+
+def conjuncts(node):
+    """Lista de condiciones unidas por AND en el nivel superior del AST."""
+    if isinstance(node, And):
+        return node.items
+    return [node]
+
+
+# Parser
+
+class WhereParser:
+    """
+    Parser descendente recursivo de cláusulas WHERE con un token de
+    anticipación: el análisis es lineal en el tamaño de la cláusula.
+
+    Gramática:
+        expr       := or_expr
+        or_expr    := and_expr (OR and_expr)*
+        and_expr   := not_expr (AND not_expr)*
+        not_expr   := NOT not_expr | primary
+        primary    := '(' expr ')' | spatial | predicate
+        spatial    := (RADIUS | KNN) '(' IDENT ',' center ',' value [',' value] ')'
+        predicate  := IDENT ( OP value
+                            | [NOT] BETWEEN value AND value
+                            | [NOT] IN '(' value (',' value)* ')' )
+        value      := STRING | NUMBER | PARAM | IDENT | '(' NUMBER ',' NUMBER ')'
+
+    Los valores se conservan como texto (los strings con sus comillas) para
+    que SQLTableManager los convierta según el tipo de la columna.
+    """
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.pos = 0
+        self.depth = 0
+
+    def parse(self):
+        """
+        Analiza la cláusula completa.
+
+        Returns:
+            Nodo raíz del AST
+
+        Raises:
+            SQLSyntaxError: Si la cláusula no es válida
+        """
+        if self._peek().type == EOF:
+            raise SQLSyntaxError("Cláusula WHERE vacía", 0)
+        node = self._parse_or()
+        token = self._peek()
+        if token.type != EOF:
+            raise SQLSyntaxError(f"Token inesperado '{token.value}'", token.position)
+        return node
+
+    def _peek(self):
+        return self.tokens[self.pos]
+
+    def _advance(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _is_keyword(self, word):
+        token = self.tokens[self.pos]
+        return token.type == KEYWORD and token.value == word
+
+    def _expect(self, type, description):
+        token = self._peek()
+        if token.type != type:
+            found = 'fin de la cláusula' if token.type == EOF else f"'{token.value}'"
+            raise SQLSyntaxError(f"Se esperaba {description} y se encontró {found}", token.position)
+        return self._advance()
+
+    def _enter(self):
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise SQLSyntaxError("Cláusula WHERE demasiado anidada", self._peek().position)
+
+    def _leave(self):
+        self.depth -= 1
+
+    def _parse_or(self):
+        items = [self._parse_and()]
+        while self._is_keyword('OR'):
+            self._advance()
+            items.append(self._parse_and())
+        return items[0] if len(items) == 1 else Or(items)
+
+    def _parse_and(self):
+        items = [self._parse_not()]
+        while self._is_keyword('AND'):
+            self._advance()
+            items.append(self._parse_not())
+        if len(items) == 1:
+            return items[0]
+        # Aplanar ANDs anidados: (a AND b) AND c -> And([a, b, c])
+        flat = []
+        for item in items:
+            flat.extend(item.items if isinstance(item, And) else [item])
+        return And(flat)
+
+    def _parse_not(self):
+        if self._is_keyword('NOT'):
+            self._advance()
+            self._enter()
+            node = Not(self._parse_not())
+            self._leave()
+            return node
+        return self._parse_primary()
+
+    def _parse_primary(self):
+        token = self._peek()
+
+        if token.type == LPAREN:
+            self._advance()
+            self._enter()
+            node = self._parse_or()
+            self._leave()
+            self._expect(RPAREN, "')'")
+            return node
+
+        if token.type == IDENT:
+            if (token.value.upper() in SPATIAL_FUNCTIONS and
+                    self.tokens[self.pos + 1].type == LPAREN):
+                return self._parse_spatial()
+            return self._parse_predicate()
+
+        found = 'fin de la cláusula' if token.type == EOF else f"'{token.value}'"
+        raise SQLSyntaxError(f"Se esperaba una condición y se encontró {found}", token.position)
+
+    def _parse_predicate(self):
+        attr = self._advance().value
+        token = self._peek()
+
+        if token.type == OP:
+            self._advance()
+            return Comparison(attr, token.value, self._parse_value())
+
+        negated = False
+        if self._is_keyword('NOT'):
+            self._advance()
+            negated = True
+
+        if self._is_keyword('BETWEEN'):
+            self._advance()
+            low = self._parse_value()
+            if not self._is_keyword('AND'):
+                raise SQLSyntaxError("Se esperaba AND en BETWEEN", self._peek().position)
+            self._advance()
+            node = Between(attr, low, self._parse_value())
+        elif self._is_keyword('IN'):
+            self._advance()
+            self._expect(LPAREN, "'(' después de IN")
+            values = [self._parse_value()]
+            while self._peek().type == COMMA:
+                self._advance()
+                values.append(self._parse_value())
+            self._expect(RPAREN, "')' al cerrar IN")
+            node = InList(attr, values)
+        else:
+            found = 'fin de la cláusula' if token.type == EOF else f"'{token.value}'"
+            raise SQLSyntaxError(f"Se esperaba un operador después de '{attr}' y se encontró {found}",
+                                 token.position)
+
+        return Not(node) if negated else node
+
+    def _parse_spatial(self):
+        func = self._advance().value.upper()
+        self._expect(LPAREN, "'('")
+        attr = self._expect(IDENT, "el atributo espacial").value
+        self._expect(COMMA, "','")
+        center = self._parse_center()
+        self._expect(COMMA, "','")
+        param = self._parse_value()
+        metric = None
+        if self._peek().type == COMMA:
+            self._advance()
+            metric = self._parse_value()
+        self._expect(RPAREN, f"')' al cerrar {func}")
+        return SpatialCall(func, attr, center, param, metric)
+
+    def _parse_center(self):
+        """Centro de RADIUS/KNN: un valor o una lista ('(x1, y1)', '(x2, y2)', ...)."""
+        if self._peek().type == LPAREN and self.tokens[self.pos + 1].type in (STRING, PARAM):
+            self._advance()
+            centers = [self._parse_value()]
+            while self._peek().type == COMMA:
+                self._advance()
+                centers.append(self._parse_value())
+            self._expect(RPAREN, "')' al cerrar la lista de centros")
+            return centers
+        return self._parse_value()
+
+    def _parse_value(self):
+        token = self._peek()
+
+        if token.type in (STRING, NUMBER, PARAM, IDENT):
+            self._advance()
+            return token.value
+
+        if token.type == LPAREN:
+            # Punto sin comillas: (x, y)
+            self._advance()
+            x = self._expect(NUMBER, "la coordenada x").value
+            self._expect(COMMA, "','")
+            y = self._expect(NUMBER, "la coordenada y").value
+            self._expect(RPAREN, "')'")
+            return f"({x}, {y})"
+
+        found = 'fin de la cláusula' if token.type == EOF else f"'{token.value}'"
+        raise SQLSyntaxError(f"Se esperaba un valor y se encontró {found}", token.position)
+
+
+def parse_where(text):
+    """
+    Analiza una cláusula WHERE y devuelve su AST.
+
+    Args:
+        text (str): Cláusula WHERE sin la palabra WHERE
+
+    Returns:
+        Nodo raíz del AST (Comparison, Between, InList, SpatialCall, And, Or o Not)
+
+    Raises:
+        SQLSyntaxError: Si la cláusula no es válida
+    """
+    return WhereParser(text).parse()
@@ -1,12 +1,26 @@
 import os
+import mmap
 import struct
 import json
 import re
+import math
+import time
+import heapq
+from itertools import islice
+from contextlib import contextmanager, ExitStack
 from pathlib import Path
 from estructuras.hash import ExtendibleHashFile
 from estructuras.avl import AVLFile
-from estructuras.point_class import Point 
+from estructuras.point_class import Point, PointArray
 from estructuras.rtree_class import RTreeFile  
+from estructuras.grid import GridFile
+from estructuras.bitmap import RecordBitmap
+from estructuras.rwlock import ReadWriteLock, read_locked, write_locked
+from estructuras.distance import EUCLIDEAN, HAVERSINE, distance, normalize_metric
+from estructuras.statistics import (
+    HyperLogLog, equi_depth_histogram, histogram_add, histogram_range_fraction,
+    spatial_histogram, spatial_histogram_add, spatial_rect_fraction, spatial_radius_fraction
+)
 
 class TableStorageManager:
     """
@@ -30,6 +44,28 @@ class TableStorageManager:
         'POINT': 'dd'       # 16 bytes para punto 2D (dos doubles: x, y)
     }
     
+    # Selectividades por defecto del planificador cuando no hay información del índice
+    DEFAULT_EQ_SELECTIVITY = 0.1
+    DEFAULT_RANGE_SELECTIVITY = 1 / 3
+    DEFAULT_SPATIAL_SELECTIVITY = 0.1
+    # Costo relativo de verificar un candidato leyendo su registro
+    PROBE_COST = 1.0
+    # Cada cuántas modificaciones se guardan las estadísticas en disco
+    STATS_FLUSH_INTERVAL = 100
+    # Kilómetros por grado de latitud, para estimar radios haversine en grados
+    KM_PER_DEGREE = 111.195
+    # get_many: registros de separación que se leen de corrido y tamaño máximo de cada lectura
+    MAX_READ_GAP = 16
+    MAX_READ_BYTES = 4 * 1024 * 1024
+    # equi_join: costo de una búsqueda en índice frente a leer un registro en secuencia,
+    # y filas del lado externo por lote de get_many en el index nested-loop
+    INDEX_LOOKUP_COST = 8
+    JOIN_BATCH_SIZE = 512
+    # Registros por bloque en los recorridos de exportación
+    EXPORT_BLOCK_RECORDS = 8192
+    # Tipos con histograma de igual profundidad en las estadísticas
+    NUMERIC_TYPES = ('INT', 'DECIMAL', 'DATE')
+    
     # Tamaños por defecto para los tipos de datos (en bytes)
     TYPE_SIZES = {
         'INT': 4,
@@ -51,6 +87,8 @@ class TableStorageManager:
         self.table_name = table_name
         self.table_info = table_info
         self.base_dir = base_dir
+        # Lecturas concurrentes; INSERT/DELETE/ANALYZE con acceso exclusivo
+        self.lock = ReadWriteLock()
         
         # Asegurar que el directorio base existe
         os.makedirs(base_dir, exist_ok=True)
@@ -92,13 +130,26 @@ class TableStorageManager:
         
         if not os.path.exists(self.filename):
             self._initialize_file()
+        
+        # Estadísticas por columna (ver analyze); None si la tabla nunca se analizó
+        self.stats_path = os.path.join(base_dir, f"{table_name}_stats.json")
+        self.statistics = self._load_statistics()
+        # HyperLogLog de cada columna en memoria; en statistics quedan serializados
+        # recién al guardar (ver _column_sketches)
+        self._sketches = None
+        self._stats_dirty = False
+        # Registros activos, mantenido por insert/delete (ver get_metadata)
+        self.live_records = self.count_live_records()
+        # Sube con cada escritura; la caché de resultados lo compara para invalidar
+        self.write_version = 0
 
         INDEX_CLASSES = {
             'hash': ExtendibleHashFile,
             'avl': AVLFile,
             'btree': AVLFile,  
             'isam': AVLFile,
-            'rtree': RTreeFile   
+            'rtree': RTreeFile,
+            'grid': GridFile
         }
 
         for attr_index, attr in enumerate(table_info['attributes'], 1):
@@ -118,6 +169,13 @@ class TableStorageManager:
                     'is_key': attr.get('is_key', False)
                 }
                 
+                # Métrica de distancia del índice espacial (euclidean / haversine)
+                if index_type in ('rtree', 'grid') and attr.get('metric'):
+                    index_params['metric'] = attr['metric']
+                # Lado de celda del grid file (INDEX grid CELL <tamaño>)
+                if index_type == 'grid' and attr.get('cell_size'):
+                    index_params['cell_size'] = attr['cell_size']
+
                 # Crear el índice
                 index_class = INDEX_CLASSES[index_type]
                 self.indices[attr['name']] = index_class(**index_params)
@@ -125,7 +183,7 @@ class TableStorageManager:
         
     def _is_rtree_spatial_index(self, attr_name):
         """
-        Verifica si un atributo tiene índice R-Tree y es de tipo POINT.
+        Verifica si un atributo tiene índice espacial (R-Tree o Grid) y es de tipo POINT.
         
         Args:
             attr_name (str): Nombre del atributo
@@ -136,8 +194,8 @@ class TableStorageManager:
         if attr_name not in self.indices:
             return False
         
-        # Verificar si el índice es R-Tree
-        if not isinstance(self.indices[attr_name], RTreeFile):
+        # Verificar si el índice es espacial (R-Tree o Grid)
+        if not isinstance(self.indices[attr_name], (RTreeFile, GridFile)):
             return False
         
         # Verificar si el tipo de dato es POINT
@@ -147,7 +205,8 @@ class TableStorageManager:
         
         return False
     
-    def spatial_radius_search(self, attr_name, center_point, radius):
+    @read_locked
+    def spatial_radius_search(self, attr_name, center_point, radius, metric=None):
         """
         Realiza búsqueda radial usando R-Tree espacial.
         
@@ -155,6 +214,7 @@ class TableStorageManager:
             attr_name (str): Nombre del atributo POINT
             center_point (Point): Punto central
             radius (float): Radio de búsqueda
+            metric (str): Métrica de la consulta (por defecto la del índice)
             
         Returns:
             list: Números de registro dentro del radio
@@ -167,9 +227,10 @@ class TableStorageManager:
             center_point = self._convert_search_value(attr_name, center_point)
         
         rtree_index = self.indices[attr_name]
-        return rtree_index.range_search_radius(center_point, radius)
+        return rtree_index.range_search_radius(center_point, radius, metric)
 
-    def spatial_knn_search(self, attr_name, center_point, k):
+    @read_locked
+    def spatial_knn_search(self, attr_name, center_point, k, metric=None):
         """
         Realiza búsqueda de K vecinos más cercanos usando R-Tree espacial.
         
@@ -177,6 +238,7 @@ class TableStorageManager:
             attr_name (str): Nombre del atributo POINT
             center_point (Point): Punto central
             k (int): Número de vecinos más cercanos
+            metric (str): Métrica de la consulta (por defecto la del índice)
             
         Returns:
             list: Números de registro de los k vecinos más cercanos
@@ -189,7 +251,227 @@ class TableStorageManager:
             center_point = self._convert_search_value(attr_name, center_point)
         
         rtree_index = self.indices[attr_name]
-        return rtree_index.range_search_knn_simple(center_point, k)
+        return rtree_index.range_search_knn_simple(center_point, k, metric)
+
+    @read_locked
+    def spatial_radius_search_batch(self, attr_name, center_points, radius, metric=None):
+        """
+        Realiza búsquedas radiales para varios puntos en una sola llamada.
+
+        Args:
+            attr_name (str): Nombre del atributo POINT
+            center_points (list): Puntos centrales
+            radius (float | list): Radio común o un radio por punto
+            metric (str): Métrica de la consulta (por defecto la del índice)
+
+        Returns:
+            list: Una lista de números de registro por cada punto central
+        """
+        if not self._is_rtree_spatial_index(attr_name):
+            raise ValueError(f"El atributo '{attr_name}' no tiene índice R-Tree espacial")
+
+        centers = [p if isinstance(p, Point) else self._convert_search_value(attr_name, p)
+                   for p in center_points]
+
+        rtree_index = self.indices[attr_name]
+        return rtree_index.batch_range_search_radius(centers, radius, metric)
+
+    @read_locked
+    def spatial_knn_search_batch(self, attr_name, center_points, k, metric=None):
+        """
+        Realiza búsquedas KNN para varios puntos en una sola llamada.
+
+        Args:
+            attr_name (str): Nombre del atributo POINT
+            center_points (list): Puntos centrales
+            k (int): Número de vecinos por punto
+            metric (str): Métrica de la consulta (por defecto la del índice)
+
+        Returns:
+            list: Una lista de números de registro por cada punto central
+        """
+        if not self._is_rtree_spatial_index(attr_name):
+            raise ValueError(f"El atributo '{attr_name}' no tiene índice R-Tree espacial")
+
+        centers = [p if isinstance(p, Point) else self._convert_search_value(attr_name, p)
+                   for p in center_points]
+
+        rtree_index = self.indices[attr_name]
+        knn_results = rtree_index.batch_range_search_knn(centers, k, metric)
+        return [[record_num for record_num, _ in neighbors] for neighbors in knn_results]
+
+    def spatial_join(self, attr_name, other_storage, other_attr_name, radius, metric=None):
+        """
+        Join espacial por distancia con otra tabla que tenga índice R-Tree.
+
+        Args:
+            attr_name (str): Atributo POINT de esta tabla
+            other_storage (TableStorageManager): Gestor de la otra tabla
+            other_attr_name (str): Atributo POINT de la otra tabla
+            radius (float): Distancia máxima entre los puntos de cada par
+            metric (str): Métrica del join (por defecto la del índice de esta tabla)
+
+        Returns:
+            list: Lista de tuplas (record_num_esta_tabla, record_num_otra_tabla, distance)
+        """
+        if not self._is_rtree_spatial_index(attr_name):
+            raise ValueError(f"El atributo '{attr_name}' no tiene índice R-Tree espacial")
+        if not other_storage._is_rtree_spatial_index(other_attr_name):
+            raise ValueError(f"El atributo '{other_attr_name}' no tiene índice R-Tree espacial")
+
+        rtree_index = self.indices[attr_name]
+        with self._read_together(other_storage):
+            return rtree_index.spatial_join_radius(other_storage.indices[other_attr_name], float(radius), metric)
+
+    def attach_catalog(self, catalog):
+        """
+        Activa el modo multiproceso: el lock de la tabla pasa a coordinarse con
+        los demás procesos a través del catálogo compartido.
+        
+        Args:
+            catalog (SharedCatalog): Catálogo del directorio de tablas
+        """
+        self.lock = catalog.table_lock(self.table_name, self._reload_shared_state, self._sync_shared_state)
+
+    def _sync_shared_state(self):
+        """Persiste lo que quedó en memoria antes de que otro proceso lea la tabla."""
+        if self._stats_dirty:
+            self._save_statistics()
+        for index in self.indices.values():
+            if hasattr(index, 'sync'):
+                index.sync()
+
+    def _reload_shared_state(self):
+        """Descarta los cachés en memoria porque otro proceso modificó la tabla."""
+        print(f"Tabla '{self.table_name}' modificada por otro proceso: recargando cachés")
+        self.statistics = self._load_statistics()
+        self._sketches = None
+        self._stats_dirty = False
+        self.live_records = self.count_live_records()
+        self.write_version += 1
+        for index in self.indices.values():
+            if hasattr(index, 'reload'):
+                index.reload()
+
+    @contextmanager
+    def _read_together(self, other_storage):
+        """Toma el lock de lectura de ambas tablas, siempre en orden de nombre."""
+        storages = sorted({id(s): s for s in (self, other_storage)}.values(), key=lambda s: s.table_name)
+        with ExitStack() as stack:
+            for storage in storages:
+                stack.enter_context(storage.lock.read())
+            yield
+
+    def equi_join(self, attr_name, other_storage, other_attr_name, columns=None, other_columns=None):
+        """
+        Join por igualdad (attr_name = other_attr_name) con otra tabla.
+        
+        Elige la estrategia por cantidad de registros activos: si uno de los
+        lados tiene índice hash/AVL sobre su atributo y el otro lado es mucho
+        más chico, se recorre el lado chico y se busca cada valor en el índice
+        (index nested-loop); si no, hash join construyendo la tabla hash sobre
+        el lado más chico y recorriendo el otro en una pasada secuencial.
+        Los pares se generan por lotes de JOIN_BATCH_SIZE registros: los locks
+        de lectura se toman mientras se arma cada lote y nunca quedan tomados
+        entre un yield y el siguiente, así un generador a medio consumir (o
+        abandonado) no frena a las escrituras.
+        
+        Args:
+            attr_name (str): Atributo de esta tabla
+            other_storage (TableStorageManager): Gestor de la otra tabla
+            other_attr_name (str): Atributo de la otra tabla
+            columns (list, optional): Atributos de esta tabla a devolver
+            other_columns (list, optional): Atributos de la otra tabla a devolver
+            
+        Returns:
+            tuple: (estrategia, generador de (record_num, other_record_num, fila, otra_fila))
+        """
+        left = (self, attr_name, list(columns or []))
+        right = (other_storage, other_attr_name, list(other_columns or []))
+        left_count = self.count_live_records()
+        right_count = other_storage.count_live_records()
+        
+        # Index nested-loop: el lado chico se recorre, el otro se consulta por índice
+        for outer, inner, outer_count, inner_count, swapped in (
+            (left, right, left_count, right_count, False),
+            (right, left, right_count, left_count, True)
+        ):
+            if inner[0]._has_equality_index(inner[1]) and outer_count * self.INDEX_LOOKUP_COST < inner_count:
+                return 'index_nested_loop', self._index_nested_loop_join(outer, inner, swapped)
+        
+        if left_count <= right_count:
+            return 'hash', self._hash_join(left, right, False)
+        return 'hash', self._hash_join(right, left, True)
+
+    def _has_equality_index(self, attr_name):
+        """Indica si el atributo tiene un índice que responde búsquedas por igualdad."""
+        index = self.indices.get(attr_name)
+        return isinstance(index, ExtendibleHashFile) or (isinstance(index, AVLFile) and not index.is_spatial)
+
+    def _hash_join(self, build, probe, swapped):
+        """
+        Hash join: tabla hash en memoria del lado build y recorrido secuencial
+        del lado probe. Si swapped es True el lado build es la tabla derecha.
+        """
+        build_storage, build_attr, build_columns = build
+        probe_storage, probe_attr, probe_columns = probe
+        
+        table = {}
+        for rows in build_storage._scan_row_batches([build_attr] + build_columns):
+            for record_num, row in rows:
+                table.setdefault(row[0], []).append((record_num, dict(zip(build_columns, row[1:]))))
+        
+        for rows in probe_storage._scan_row_batches([probe_attr] + probe_columns):
+            for record_num, row in rows:
+                matches = table.get(row[0])
+                if not matches:
+                    continue
+                probe_row = dict(zip(probe_columns, row[1:]))
+                for build_num, build_row in matches:
+                    if swapped:
+                        yield record_num, build_num, probe_row, build_row
+                    else:
+                        yield build_num, record_num, build_row, probe_row
+
+    def _index_nested_loop_join(self, outer, inner, swapped):
+        """
+        Index nested-loop join: recorre el lado outer y busca cada valor en el
+        índice del lado inner. Las filas inner se leen en lotes con get_many.
+        Si swapped es True el lado outer es la tabla derecha.
+        """
+        outer_storage, outer_attr, outer_columns = outer
+        inner_storage, inner_attr, inner_columns = inner
+        inner_index = inner_storage.indices[inner_attr]
+        
+        def match(rows):
+            """Pares de un lote outer (con el lock de la tabla inner tomado)."""
+            batch = []
+            for record_num, row in rows:
+                nums = inner_index.search(row[0])
+                if nums:
+                    batch.append((record_num, row, nums))
+            inner_nums = sorted({n for _, _, nums in batch for n in nums})
+            inner_rows = dict(zip(inner_nums, inner_storage.get_many(inner_nums, [inner_attr] + inner_columns)))
+            
+            pairs = []
+            for outer_num, outer_row, nums in batch:
+                for inner_num in nums:
+                    inner_row = inner_rows.get(inner_num)
+                    # Se descartan coincidencias obsoletas del índice
+                    if inner_row is None or inner_row[inner_attr] != outer_row[0]:
+                        continue
+                    values = {name: inner_row[name] for name in inner_columns}
+                    row = dict(zip(outer_columns, outer_row[1:]))
+                    if swapped:
+                        pairs.append((inner_num, outer_num, values, row))
+                    else:
+                        pairs.append((outer_num, inner_num, row, values))
+            return pairs
+        
+        for rows in outer_storage._scan_row_batches([outer_attr] + outer_columns):
+            with inner_storage.lock.read():
+                pairs = match(rows)
+            yield from pairs
 
     def _calculate_real_attr_index_for_index(self, logical_attr_index):
         """
@@ -424,6 +706,7 @@ class TableStorageManager:
     
  
     
+    @write_locked
     def insert(self, record_data):
         """
         Inserta un nuevo registro, reutilizando espacios eliminados si están disponibles.
@@ -471,8 +754,13 @@ class TableStorageManager:
             
             self._write_record(record_id, validated_record)
         
+        self.live_records += 1
+        self.write_version += 1
+        
         for attr_name, index in self.indices.items():
             index.insert_record(record_id)
+        
+        self._stats_on_insert(validated_record)
 
         return record_id
 
@@ -514,6 +802,7 @@ class TableStorageManager:
         
         return validated_record
 
+    @write_locked
     def delete(self, id):
         """
         Marca un registro como eliminado y lo agrega a la lista de registros libres.
@@ -538,9 +827,14 @@ class TableStorageManager:
         self._write_record(id, record)
         
         self._write_header(id)
+        self.live_records -= 1
+        self.write_version += 1
+        
+        self._stats_on_delete()
         
         return True
 
+    @write_locked
     def delete_records(self, record_numbers):
         """
         Elimina múltiples registros especificados por sus números de registro.
@@ -621,98 +915,199 @@ class TableStorageManager:
             except Exception as e:
                 print(f" Error al eliminar del índice {attr_name}: {e}")
 
-    def select(self, lista_busquedas=None, lista_rangos=None, lista_espaciales=None, requested_attributes=None):
+    @read_locked
+    def select(self, lista_busquedas=None, lista_rangos=None, lista_espaciales=None, requested_attributes=None,
+               order_by=None, descending=False, limit=None, offset=0):
         """
         Busca registros que cumplan todas las condiciones especificadas.
-        VERSIÓN ACTUALIZADA con soporte para búsquedas espaciales R-Tree.
+        VERSIÓN ACTUALIZADA con planificador basado en costos.
+        
+        Cada condición se convierte en un predicado con una estimación de
+        cuántos registros devuelve. Se ejecuta primero, con su índice, el más
+        selectivo; los demás se resuelven con su índice solo si eso es más
+        barato que leer los candidatos actuales, y si no se verifican sobre
+        cada candidato en una sola pasada. Si no quedan candidatos se omiten
+        las condiciones restantes.
         
         Args:
             lista_busquedas: Lista de búsquedas exactas [attr_name, value]
             lista_rangos: Lista de rangos [attr_name, min_val, max_val]
-            lista_espaciales: Lista de búsquedas espaciales [tipo, attr_name, center_point, param]
-                            donde tipo es 'RADIUS' o 'KNN' y param es radio o k
+            lista_espaciales: Lista de búsquedas espaciales [tipo, attr_name, center_point, param(, metric)]
+                            donde tipo es 'RADIUS' o 'KNN', param es radio o k y metric
+                            (opcional) la métrica de distancia de la consulta
             requested_attributes: Atributos solicitados
+            order_by: Atributo por el que se ordena el resultado (ORDER BY)
+            descending: Orden descendente (DESC)
+            limit: Cantidad máxima de registros (LIMIT)
+            offset: Registros que se omiten al inicio (OFFSET)
         """
-        print("quee",lista_busquedas,lista_rangos,lista_espaciales,"gaa")
+        error = self._validate_order(order_by, limit, offset)
+        if error:
+            return error
+        
+        if requested_attributes and (lista_busquedas or lista_rangos) and not lista_espaciales:
+            cubierto = self._select_index_only(lista_busquedas, lista_rangos, requested_attributes,
+                                               order_by, descending, limit, offset)
+            if cubierto is not None:
+                return cubierto
+        
         if not lista_busquedas and not lista_rangos and not lista_espaciales:
             print("No hay condiciones WHERE - retornando todos los registros")
-            all_records = self._get_all_active_record_numbers()
-            return {
-                "error": False, 
-                "numeros_registro": all_records,
-                "requested_attributes": requested_attributes
-            }
+            candidatos = self._live_records_bitmap()
+        else:
+            candidatos = self._select_bitmap(lista_busquedas, lista_rangos, lista_espaciales)
+            if isinstance(candidatos, dict):
+                return candidatos
         
-        conjuntos_resultados = []
-        errores = []
+        return {
+            "error": False, 
+            "numeros_registro": self._order_and_limit(candidatos, order_by, descending, limit, offset),
+            "requested_attributes": requested_attributes
+        }
+
+    def _select_index_only(self, lista_busquedas, lista_rangos, requested_attributes,
+                           order_by=None, descending=False, limit=None, offset=0):
+        """
+        Ejecución solo con índices (covering). Si cada atributo pedido está fijado
+        por una igualdad, o es el atributo de un único rango sobre un índice
+        AVL/B-tree, su valor sale de la propia condición o del recorrido del
+        índice y el resultado se arma sin volver a leer los registros.
         
-        # Procesar búsquedas exactas (código existente)
-        if lista_busquedas:
-            for i, (attr_name, valor) in enumerate(lista_busquedas):
-                converted_value = self._convert_search_value(attr_name, valor)
-                
-                if attr_name in self.indices:
-                    indice = self.indices[attr_name]
-                    resultados = indice.search(converted_value)
-                    
-                    if not resultados:
-                        return {"error": False, "numeros_registro": [], "requested_attributes": requested_attributes}
-                    
-                    conjuntos_resultados.append(set(resultados))
-                else:
-                    error_msg = f"No existe índice para {attr_name}"
-                    errores.append({"error": True, "message": error_msg, "type": "no_index"})
+        Returns:
+            dict como select con 'registros' (valores de requested_attributes por
+            registro), o None si la consulta no está cubierta
+        """
+        lista_busquedas = lista_busquedas or []
+        lista_rangos = lista_rangos or []
         
-        if lista_rangos:
-            for i, (attr_name, min_val, max_val) in enumerate(lista_rangos):
-                converted_min = self._convert_search_value(attr_name, min_val)
-                converted_max = self._convert_search_value(attr_name, max_val)
-                
-                if attr_name in self.indices:
-                    indice = self.indices[attr_name]
-                    resultado = indice.range_search(converted_min, converted_max)
-                    print("aver resultado",resultado)
-                    print(i,attr_name)
-                    if isinstance(resultado, dict) and resultado.get("error", False):
-                        errores.append(resultado)
-                        continue
-                    
-                    if not resultado:
-                        return {"error": False, "numeros_registro": [], "requested_attributes": requested_attributes}
-                    
-                    conjuntos_resultados.append(set(resultado))
-                else:
-                    error_msg = f"No existe índice para {attr_name}"
-                    errores.append({"error": True, "message": error_msg, "type": "no_index"})
+        fijos = {}
+        for attr_name, valor in lista_busquedas:
+            if attr_name not in self.indices:
+                return None
+            fijos[attr_name] = self._convert_search_value(attr_name, valor)
+        
+        faltantes = [attr_name for attr_name in requested_attributes if attr_name not in fijos]
+        rango = None
+        if faltantes:
+            rangos = [r for r in lista_rangos if r[0] == faltantes[0]]
+            index = self.indices.get(faltantes[0])
+            if len(set(faltantes)) > 1 or len(rangos) != 1 or not isinstance(index, AVLFile) or index.is_spatial:
+                return None
+            rango = rangos[0]
+        
+        valores = {}
+        if rango is not None:
+            attr_name, min_val, max_val = rango
+            valores = dict(self.indices[attr_name].range_search_items(
+                self._convert_search_value(attr_name, min_val),
+                self._convert_search_value(attr_name, max_val)
+            ))
+            candidatos = RecordBitmap(valores)
+            resto_rangos = [r for r in lista_rangos if r is not rango]
+            if candidatos and (lista_busquedas or resto_rangos):
+                otros = self._select_bitmap(lista_busquedas, resto_rangos, None)
+                if isinstance(otros, dict):
+                    return otros
+                candidatos = candidatos & otros
+        else:
+            candidatos = self._select_bitmap(lista_busquedas, lista_rangos, None)
+            if isinstance(candidatos, dict):
+                return candidatos
+        
+        numeros = self._order_and_limit(candidatos, order_by, descending, limit, offset)
+        registros = [
+            {attr_name: valores[record_num] if attr_name not in fijos else fijos[attr_name]
+             for attr_name in requested_attributes}
+            for record_num in numeros
+        ]
+        return {
+            "error": False,
+            "numeros_registro": numeros,
+            "registros": registros,
+            "requested_attributes": requested_attributes
+        }
+
+    def _validate_order(self, order_by, limit, offset):
+        """Valida ORDER BY/LIMIT/OFFSET; retorna un dict de error o None."""
+        if order_by is not None:
+            attr = next((a for a in self.table_info['attributes'] if a['name'] == order_by), None)
+            if attr is None:
+                return {"error": True, "message": f"El atributo '{order_by}' no existe", "errores": []}
+            if attr['data_type'].upper() == 'POINT':
+                return {"error": True, "message": "ORDER BY no soporta atributos POINT", "errores": []}
+        if limit is not None and (not isinstance(limit, int) or limit < 0):
+            return {"error": True, "message": "LIMIT debe ser un entero no negativo", "errores": []}
+        if not isinstance(offset or 0, int) or (offset or 0) < 0:
+            return {"error": True, "message": "OFFSET debe ser un entero no negativo", "errores": []}
+        return None
+
+    def _order_and_limit(self, candidatos, order_by, descending=False, limit=None, offset=0):
+        """
+        Ordena y pagina un conjunto de registros.
         
-        if lista_espaciales:
-            for i, (tipo, attr_name, center_point, param) in enumerate(lista_espaciales):
-                try:
-                    if tipo.upper() == 'RADIUS':
-                        # Búsqueda por radio
-                        radio = float(param)
-                        resultados = self.spatial_radius_search(attr_name, center_point, radio)
-                        print(f"Búsqueda radial: {attr_name} centro={center_point} radio={radio} → {len(resultados)} resultados")
-                        
-                    elif tipo.upper() == 'KNN':
-                        # Búsqueda K vecinos más cercanos
-                        k = int(param)
-                        resultados = self.spatial_knn_search(attr_name, center_point, k)
-                        print(f"Búsqueda KNN: {attr_name} centro={center_point} k={k} → {len(resultados)} resultados")
-                        
-                    else:
-                        error_msg = f"Tipo de búsqueda espacial '{tipo}' no soportado"
-                        errores.append({"error": True, "message": error_msg, "type": "unsupported_spatial"})
-                        continue
-                    
-                    if not resultados:
-                        return {"error": False, "numeros_registro": [], "requested_attributes": requested_attributes}
-                    
-                    conjuntos_resultados.append(set(resultados))
-                    
-                except Exception as e:
-                    error_msg = f"Error en búsqueda espacial {tipo} para {attr_name}: {str(e)}"
-                    errores.append({"error": True, "message": error_msg, "type": "spatial_error"})
+        Sin ORDER BY se devuelven en orden de número de registro. Con ORDER BY
+        sobre un atributo con índice AVL/B-tree se recorre el índice en orden y
+        se corta al juntar offset + limit registros, si eso visita menos nodos
+        que registros habría que leer; si no, se leen en lote (get_many) las
+        claves de los candidatos y se eligen los primeros con un heap acotado (top-k).
+        
+        Args:
+            candidatos (RecordBitmap): Registros que cumplen la consulta
+            order_by (str): Atributo de orden o None
+            descending (bool): Orden descendente
+            limit (int): Cantidad máxima o None
+            offset (int): Registros omitidos al inicio
+            
+        Returns:
+            list: Números de registro en el orden pedido
+        """
+        offset = offset or 0
+        needed = None if limit is None else offset + limit
+        
+        if order_by is None:
+            return list(islice(candidatos, offset, needed))
+        
+        if needed == 0 or not candidatos:
+            return []
+        
+        total = len(candidatos)
+        index = self.indices.get(order_by)
+        if isinstance(index, AVLFile) and not index.is_spatial:
+            # Nodos que se espera visitar hasta juntar 'needed' candidatos
+            expected_visits = (needed or total) * max(1, self._get_record_count()) / total
+            if expected_visits <= total:
+                ordered = []
+                for record_num in index.iter_in_order(descending):
+                    if record_num in candidatos:
+                        ordered.append(record_num)
+                        if len(ordered) == needed:
+                            break
+                return ordered[offset:]
+        
+        # Solo la columna de orden, leída en bloques contiguos
+        batch = self.get_many(list(candidatos), columns=[order_by], columnar=True)
+        record_nums = batch['numeros_registro']
+        keys = dict(zip(record_nums, batch['columnas'][order_by]))
+        
+        def sort_key(record_num):
+            return (keys[record_num], record_num)
+        
+        if needed is None:
+            ordered = sorted(record_nums, key=sort_key, reverse=descending)
+        elif descending:
+            ordered = heapq.nlargest(needed, record_nums, key=sort_key)
+        else:
+            ordered = heapq.nsmallest(needed, record_nums, key=sort_key)
+        return ordered[offset:]
+
+    def _select_bitmap(self, lista_busquedas, lista_rangos, lista_espaciales):
+        """
+        Ejecuta el plan de select para condiciones unidas por AND.
+        
+        Returns:
+            RecordBitmap con los registros que cumplen todas las condiciones, o dict de error
+        """
+        predicados, errores = self._build_predicates(lista_busquedas, lista_rangos, lista_espaciales)
         
         if errores:
             return {
@@ -721,28 +1116,442 @@ class TableStorageManager:
                 "message": "Se encontraron errores en la consulta"
             }
         
-        if not conjuntos_resultados:
+        if not predicados:
             return {
                 "error": True,
                 "message": "No se pudieron procesar las búsquedas",
                 "errores": []
             }
         
-        # Intersección de todos los conjuntos de resultados
-        interseccion_final = conjuntos_resultados[0]
-        for conjunto in conjuntos_resultados[1:]:
-            interseccion_final = interseccion_final.intersection(conjunto)
-            if not interseccion_final:
-                return {"error": False, "numeros_registro": [], "requested_attributes": requested_attributes}
+        plan = self.plan_predicates(predicados)
+        
+        candidatos = None
+        probes = []
+        for predicado in plan:
+            if predicado['access'] == 'probe':
+                probes.append(predicado)
+                continue
+            
+            resultado = self._evaluate_with_index(predicado)
+            if isinstance(resultado, dict):
+                return {
+                    "error": True,
+                    "errores": [resultado],
+                    "message": "Se encontraron errores en la consulta"
+                }
+            
+            resultado = RecordBitmap(resultado)
+            candidatos = resultado if candidatos is None else candidatos & resultado
+            if not candidatos:
+                # Sin candidatos: el resto de condiciones no se evalúa
+                return candidatos
+        
+        if probes:
+            candidatos = RecordBitmap(
+                record_num for record_num in candidatos
+                if self._record_matches(record_num, probes)
+            )
+        
+        return candidatos
+
+    @read_locked
+    def select_condition(self, condicion, requested_attributes=None,
+                         order_by=None, descending=False, limit=None, offset=0):
+        """
+        Busca registros que cumplan una condición con AND, OR, NOT e IN.
+        
+        La condición es un árbol de listas:
+            ['AND', [condiciones]], ['OR', [condiciones]], ['NOT', condicion],
+            ['EQ', attr, valor], ['IN', attr, [valores]], ['RANGE', attr, min, max],
+            ['SPATIAL', [tipo, attr, centro, param(, metric)]]
+        
+        Las condiciones simples de un AND se resuelven juntas con el planificador
+        de select; OR une los resultados, IN busca cada valor en el índice una
+        sola vez y NOT resta del conjunto de registros activos (o de los demás
+        términos del AND). Los conjuntos se combinan como RecordBitmap.
         
-        resultado_final = list(interseccion_final)
+        Args:
+            condicion (list): Árbol de la condición
+            requested_attributes: Atributos solicitados
+            order_by, descending, limit, offset: Orden y paginación, como en select
+            
+        Returns:
+            dict: Mismo formato que select
+        """
+        error = self._validate_order(order_by, limit, offset)
+        if error:
+            return error
+        
+        registros = self._evaluate_condition(condicion)
+        if isinstance(registros, dict):
+            return registros
         
         return {
-            "error": False, 
-            "numeros_registro": resultado_final,
+            "error": False,
+            "numeros_registro": self._order_and_limit(registros, order_by, descending, limit, offset),
             "requested_attributes": requested_attributes
         }
 
+    def _evaluate_condition(self, condicion):
+        """
+        Evalúa recursivamente un árbol de condición.
+        
+        Returns:
+            RecordBitmap, o dict de error
+        """
+        tipo = condicion[0]
+        
+        if tipo == 'AND':
+            return self._evaluate_and(condicion[1])
+        
+        if tipo == 'OR':
+            resultado = RecordBitmap()
+            for hijo in condicion[1]:
+                parcial = self._evaluate_condition(hijo)
+                if isinstance(parcial, dict):
+                    return parcial
+                resultado |= parcial
+            return resultado
+        
+        if tipo == 'NOT':
+            return self._evaluate_and([condicion])
+        
+        if tipo == 'IN':
+            return self._evaluate_in(condicion[1], condicion[2])
+        
+        return self._evaluate_and([condicion])
+
+    def _evaluate_and(self, condiciones):
+        """
+        Intersección de condiciones: las simples (EQ, RANGE, SPATIAL) pasan juntas
+        por el planificador, luego se intersectan IN/OR y al final se restan los NOT.
+        """
+        lista_busquedas = []
+        lista_rangos = []
+        lista_espaciales = []
+        compuestas = []
+        negadas = []
+        
+        for condicion in condiciones:
+            tipo = condicion[0]
+            if tipo == 'EQ':
+                lista_busquedas.append([condicion[1], condicion[2]])
+            elif tipo == 'RANGE':
+                lista_rangos.append([condicion[1], condicion[2], condicion[3]])
+            elif tipo == 'SPATIAL':
+                lista_espaciales.append(condicion[1])
+            elif tipo == 'NOT':
+                negadas.append(condicion[1])
+            else:
+                compuestas.append(condicion)
+        
+        resultado = None
+        if lista_busquedas or lista_rangos or lista_espaciales:
+            resultado = self._select_bitmap(lista_busquedas, lista_rangos, lista_espaciales)
+            if isinstance(resultado, dict) or not resultado:
+                return resultado
+        
+        for condicion in compuestas:
+            parcial = self._evaluate_condition(condicion)
+            if isinstance(parcial, dict):
+                return parcial
+            resultado = parcial if resultado is None else resultado & parcial
+            if not resultado:
+                return resultado
+        
+        if resultado is None:
+            resultado = self._live_records_bitmap()
+        
+        for condicion in negadas:
+            parcial = self._evaluate_condition(condicion)
+            if isinstance(parcial, dict):
+                return parcial
+            resultado = resultado - parcial
+            if not resultado:
+                break
+        
+        return resultado
+
+    def _evaluate_in(self, attr_name, valores):
+        """
+        attr IN (valores): una búsqueda en el índice por cada valor distinto.
+        
+        Returns:
+            RecordBitmap, o dict de error
+        """
+        if attr_name not in self.indices:
+            return {
+                "error": True,
+                "errores": [{"error": True, "message": f"No existe índice para {attr_name}", "type": "no_index"}],
+                "message": "Se encontraron errores en la consulta"
+            }
+        
+        index = self.indices[attr_name]
+        distintos = {}
+        for valor in valores:
+            convertido = self._convert_search_value(attr_name, valor)
+            distintos[repr(convertido)] = convertido
+        
+        encontrados = []
+        for valor in distintos.values():
+            encontrados.extend(index.search(valor))
+        return RecordBitmap(encontrados)
+
+    def _live_records_bitmap(self):
+        """Registros activos en una lectura secuencial del archivo."""
+        with open(self.filename, 'rb') as f:
+            f.seek(self.header_size)
+            data = f.read()
+        
+        usable = len(data) - len(data) % self.record_size
+        return RecordBitmap(
+            record_num
+            for record_num, values in enumerate(struct.iter_unpack(self.record_format, data[:usable]), 1)
+            if values[-1] == self.RECORD_NORMAL
+        )
+
+    def _build_predicates(self, lista_busquedas, lista_rangos, lista_espaciales):
+        """
+        Normaliza las condiciones de select en predicados:
+        {'kind': 'exact'|'range'|'spatial', 'attr', ... }
+        
+        Returns:
+            tuple: (lista de predicados, lista de errores)
+        """
+        predicados = []
+        errores = []
+        
+        for attr_name, valor in lista_busquedas or []:
+            if attr_name not in self.indices:
+                errores.append({"error": True, "message": f"No existe índice para {attr_name}", "type": "no_index"})
+                continue
+            predicados.append({
+                'kind': 'exact',
+                'attr': attr_name,
+                'value': self._convert_search_value(attr_name, valor)
+            })
+        
+        for attr_name, min_val, max_val in lista_rangos or []:
+            if attr_name not in self.indices:
+                errores.append({"error": True, "message": f"No existe índice para {attr_name}", "type": "no_index"})
+                continue
+            converted_min = self._convert_search_value(attr_name, min_val)
+            converted_max = self._convert_search_value(attr_name, max_val)
+            if isinstance(self.indices[attr_name], ExtendibleHashFile):
+                # El hash no soporta rangos: se reporta su error
+                errores.append(self.indices[attr_name].range_search(converted_min, converted_max))
+                continue
+            predicados.append({
+                'kind': 'range',
+                'attr': attr_name,
+                'min': converted_min,
+                'max': converted_max
+            })
+        
+        for espacial in lista_espaciales or []:
+            tipo, attr_name, center_point, param = espacial[:4]
+            metric = espacial[4] if len(espacial) > 4 else None
+            tipo = tipo.upper()
+            if tipo not in ('RADIUS', 'KNN'):
+                error_msg = f"Tipo de búsqueda espacial '{tipo}' no soportado"
+                errores.append({"error": True, "message": error_msg, "type": "unsupported_spatial"})
+                continue
+            try:
+                predicados.append({
+                    'kind': 'spatial',
+                    'attr': attr_name,
+                    'type': tipo,
+                    'center': center_point,
+                    'param': float(param) if tipo == 'RADIUS' else int(param),
+                    'metric': metric
+                })
+            except (TypeError, ValueError) as e:
+                error_msg = f"Error en búsqueda espacial {tipo} para {attr_name}: {str(e)}"
+                errores.append({"error": True, "message": error_msg, "type": "spatial_error"})
+        
+        return predicados, errores
+
+    @read_locked
+    def plan_predicates(self, predicados):
+        """
+        Ordena los predicados por costo estimado y decide cómo resolver cada uno.
+        
+        El primero siempre usa su índice. Para los demás se compara el costo de
+        usar el índice (registros estimados + descenso del árbol) con el de
+        verificar el predicado sobre los candidatos que ya se tienen. KNN se
+        resuelve siempre con el índice porque su resultado depende de toda la tabla.
+        
+        Args:
+            predicados (list): Predicados de _build_predicates
+            
+        Returns:
+            list: Los mismos predicados ordenados, con 'estimate' y 'access'
+                  ('index' o 'probe')
+        """
+        total = max(1, self.statistics['row_count'] if self.statistics else self._get_record_count())
+        for predicado in predicados:
+            predicado['estimate'] = self._estimate_predicate(predicado, total)
+        
+        plan = sorted(predicados, key=lambda p: p['estimate'])
+        descent_cost = math.log2(total + 1)
+        
+        candidatos = None
+        for predicado in plan:
+            index_cost = predicado['estimate'] + descent_cost
+            es_knn = predicado['kind'] == 'spatial' and predicado['type'] == 'KNN'
+            if candidatos is None or es_knn or index_cost < candidatos * self.PROBE_COST:
+                predicado['access'] = 'index'
+                candidatos = predicado['estimate'] if candidatos is None else min(candidatos, predicado['estimate'])
+            else:
+                predicado['access'] = 'probe'
+        
+        return plan
+
+    def _estimate_predicate(self, predicado, total):
+        """
+        Estima cuántos registros cumplen un predicado.
+        Usa las estadísticas de la columna (NDV, histogramas) si existen; si no,
+        la clave primaria, los extremos de los índices ordenados y el rectángulo
+        de los índices espaciales, y por último selectividades por defecto.
+        """
+        indice = self.indices[predicado['attr']]
+        column_stats = (self.statistics or {}).get('columns', {}).get(predicado['attr'])
+        
+        if predicado['kind'] == 'exact':
+            if predicado['attr'] == self.primary_key_attr:
+                return 1
+            if column_stats and column_stats.get('ndv'):
+                return max(1, total / column_stats['ndv'])
+            return max(1, total * self.DEFAULT_EQ_SELECTIVITY)
+        
+        if predicado['kind'] == 'range':
+            fraction = self.DEFAULT_RANGE_SELECTIVITY
+            low, high = predicado['min'], predicado['max']
+            numeric = isinstance(low, (int, float)) and isinstance(high, (int, float))
+            if column_stats and column_stats.get('histogram') and numeric:
+                fraction = histogram_range_fraction(column_stats['histogram'], low, high)
+            elif column_stats and column_stats.get('grid') and isinstance(low, Point) and isinstance(high, Point):
+                fraction = spatial_rect_fraction(column_stats['grid'], low.x, low.y, high.x, high.y)
+            elif isinstance(indice, AVLFile) and not indice.is_spatial and numeric:
+                bounds = indice.get_bounds()
+                if bounds is None:
+                    return 0
+                min_value, max_value = bounds
+                if isinstance(min_value, (int, float)) and isinstance(max_value, (int, float)):
+                    fraction = self._overlap_fraction(low, high, min_value, max_value)
+            return total * fraction
+        
+        # Espaciales
+        centers = predicado['center']
+        if not isinstance(centers, (list, tuple)):
+            centers = [centers]
+        if predicado['type'] == 'KNN':
+            return min(total, predicado['param'] * len(centers))
+        
+        metric = normalize_metric(predicado['metric'], getattr(indice, 'metric', EUCLIDEAN))
+        radius = predicado['param']
+        if metric == HAVERSINE:
+            radius = radius / self.KM_PER_DEGREE
+        
+        if column_stats and column_stats.get('grid'):
+            fraction = sum(spatial_radius_fraction(column_stats['grid'], c.x, c.y, radius) for c in centers)
+            return min(total, total * fraction)
+        
+        fraction = self.DEFAULT_SPATIAL_SELECTIVITY
+        if metric == EUCLIDEAN and hasattr(indice, 'get_bounds'):
+            bounds = indice.get_bounds()
+            if bounds is None:
+                return 0
+            min_x, min_y, max_x, max_y = bounds
+            area = (max_x - min_x) * (max_y - min_y)
+            if area > 0:
+                fraction = min(1.0, math.pi * radius ** 2 / area)
+        return min(total, total * fraction * len(centers))
+
+    def _overlap_fraction(self, low, high, min_value, max_value):
+        """Fracción de [min_value, max_value] cubierta por [low, high] (distribución uniforme)."""
+        if high < min_value or low > max_value or high < low:
+            return 0.0
+        if max_value == min_value:
+            return 1.0
+        return (min(high, max_value) - max(low, min_value)) / (max_value - min_value)
+
+    def _evaluate_with_index(self, predicado):
+        """
+        Resuelve un predicado con el índice de su atributo.
+        
+        Returns:
+            list: Números de registro, o dict de error
+        """
+        attr_name = predicado['attr']
+        
+        if predicado['kind'] == 'exact':
+            return self.indices[attr_name].search(predicado['value'])
+        
+        if predicado['kind'] == 'range':
+            return self.indices[attr_name].range_search(predicado['min'], predicado['max'])
+        
+        tipo = predicado['type']
+        center_point = predicado['center']
+        metric = predicado['metric']
+        # Varios centros en una misma condición: búsqueda en lote (unión)
+        es_lote = isinstance(center_point, (list, tuple))
+        try:
+            if tipo == 'RADIUS':
+                if es_lote:
+                    por_centro = self.spatial_radius_search_batch(attr_name, center_point, predicado['param'], metric)
+                    return sorted({r for grupo in por_centro for r in grupo})
+                return self.spatial_radius_search(attr_name, center_point, predicado['param'], metric)
+            
+            if es_lote:
+                por_centro = self.spatial_knn_search_batch(attr_name, center_point, predicado['param'], metric)
+                return sorted({r for grupo in por_centro for r in grupo})
+            return self.spatial_knn_search(attr_name, center_point, predicado['param'], metric)
+        except Exception as e:
+            error_msg = f"Error en búsqueda espacial {tipo} para {attr_name}: {str(e)}"
+            return {"error": True, "message": error_msg, "type": "spatial_error"}
+
+    def _record_matches(self, record_num, predicados):
+        """
+        Verifica varios predicados sobre un registro leyéndolo una sola vez.
+        Reproduce la semántica de los índices: igualdad exacta, rango
+        inclusivo (rectángulo para POINT) y distancia <= radio.
+        """
+        record = self._read_record(record_num)
+        if not record or record['next'] != self.RECORD_NORMAL:
+            return False
+        
+        for predicado in predicados:
+            value = record[predicado['attr']]
+            
+            if predicado['kind'] == 'exact':
+                if value != predicado['value']:
+                    return False
+            
+            elif predicado['kind'] == 'range':
+                low, high = predicado['min'], predicado['max']
+                if isinstance(value, Point):
+                    if not value.is_in_range(low, high):
+                        return False
+                else:
+                    try:
+                        if not (low <= value <= high):
+                            return False
+                    except TypeError:
+                        if not (str(low) <= str(value) <= str(high)):
+                            return False
+            
+            else:
+                indice = self.indices[predicado['attr']]
+                metric = normalize_metric(predicado['metric'], getattr(indice, 'metric', EUCLIDEAN))
+                centers = predicado['center']
+                if not isinstance(centers, (list, tuple)):
+                    centers = [centers]
+                if not any(distance(value, center, metric) <= predicado['param'] for center in centers):
+                    return False
+        
+        return True
+
     def _convert_search_value(self, attr_name, value):
         """
         Convierte un valor de búsqueda al tipo apropiado según el atributo.
@@ -801,6 +1610,7 @@ class TableStorageManager:
         #print(f"Encontrados {len(active_records)} registros activos: {active_records}")
         return active_records
 
+    @read_locked
     def get(self, id):
         """
         Obtiene un registro por su ID.
@@ -821,6 +1631,7 @@ class TableStorageManager:
         return record
  
     
+    @read_locked
     def get_all_records(self):
         """Obtiene todos los registros no eliminados."""
         record_count = self._get_record_count()
@@ -834,4 +1645,560 @@ class TableStorageManager:
                 result.append(record_copy)
         
         return result
-    
\ No newline at end of file
+    
+
+    def _column_layout(self):
+        """
+        Posición de cada atributo dentro de la tupla desempaquetada del registro.
+        
+        Returns:
+            list: (attr_name, data_type, posición) en orden de declaración
+        """
+        layout = []
+        position = 0
+        for attr in self.table_info['attributes']:
+            data_type = attr['data_type'].upper()
+            layout.append((attr['name'], data_type, position))
+            position += 2 if data_type == 'POINT' else 1
+        return layout
+
+    @write_locked
+    def analyze(self):
+        """
+        Recalcula las estadísticas de todas las columnas en una lectura secuencial:
+        cantidad de registros, NDV (HyperLogLog), mínimo/máximo, histograma de
+        igual profundidad para columnas numéricas y rejilla espacial para POINT.
+        Las estadísticas se guardan en tablas/{tabla}_stats.json.
+        
+        Returns:
+            dict: Estadísticas calculadas
+        """
+        layout = self._column_layout()
+        # Las columnas POINT se juntan en buffers float64 sin crear un Point por fila
+        collected = {name: PointArray() if data_type == 'POINT' else [] for name, data_type, _ in layout}
+        sketches = {name: HyperLogLog() for name, _, _ in layout}
+        row_count = 0
+        
+        with open(self.filename, 'rb') as f:
+            f.seek(self.header_size)
+            data = f.read()
+        
+        usable = len(data) - len(data) % self.record_size
+        for values in struct.iter_unpack(self.record_format, data[:usable]):
+            if values[-1] != self.RECORD_NORMAL:
+                continue
+            row_count += 1
+            for name, data_type, position in layout:
+                if data_type == 'POINT':
+                    x, y = values[position], values[position + 1]
+                    collected[name].append(x, y)
+                    sketches[name].add((x, y))
+                    continue
+                if isinstance(values[position], bytes):
+                    value = values[position].decode('utf-8', errors='ignore').rstrip('\x00')
+                else:
+                    value = values[position]
+                collected[name].append(value)
+                sketches[name].add(value)
+        
+        columns = {}
+        for name, data_type, _ in layout:
+            values = collected[name]
+            column = {
+                'type': data_type,
+                'ndv': sketches[name].count(),
+                'hll': sketches[name].to_dict()
+            }
+            if data_type == 'POINT':
+                column['grid'] = spatial_histogram(values.xs, values.ys)
+                bounds = values.bounds()
+                column['min'] = [bounds[0], bounds[1]] if bounds else None
+                column['max'] = [bounds[2], bounds[3]] if bounds else None
+            else:
+                values.sort()
+                column['min'] = values[0] if values else None
+                column['max'] = values[-1] if values else None
+                if data_type in self.NUMERIC_TYPES:
+                    column['histogram'] = equi_depth_histogram(values)
+            columns[name] = column
+        
+        self.statistics = {
+            'row_count': row_count,
+            'record_slots': usable // self.record_size,
+            'analyzed_at': time.time(),
+            'modifications': 0,
+            'columns': columns
+        }
+        self._sketches = sketches
+        self._save_statistics()
+        return self.statistics
+
+    def _load_statistics(self):
+        """Carga las estadísticas guardadas por analyze, o None si no existen."""
+        if not os.path.exists(self.stats_path):
+            return None
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _column_sketches(self):
+        """HyperLogLog de cada columna como objetos (se decodifican una sola vez)."""
+        if self._sketches is None:
+            self._sketches = {
+                name: HyperLogLog.from_dict(column['hll'])
+                for name, column in self.statistics['columns'].items()
+            }
+        return self._sketches
+
+    def _save_statistics(self):
+        """Guarda las estadísticas, serializando los sketches y recalculando el NDV."""
+        if not self.statistics:
+            return
+        for name, sketch in self._column_sketches().items():
+            column = self.statistics['columns'][name]
+            column['hll'] = sketch.to_dict()
+            column['ndv'] = sketch.count()
+        with open(self.stats_path, 'w', encoding='utf-8') as f:
+            json.dump(self.statistics, f)
+        self._stats_dirty = False
+
+    def flush_statistics(self):
+        """Guarda las estadísticas si hubo modificaciones desde la última escritura."""
+        if self._stats_dirty:
+            with self.lock.write():
+                if self._stats_dirty:
+                    self._save_statistics()
+
+    def _stats_modified(self):
+        self.statistics['modifications'] += 1
+        self._stats_dirty = True
+        if self.statistics['modifications'] % self.STATS_FLUSH_INTERVAL == 0:
+            self._save_statistics()
+
+    def _stats_on_insert(self, record):
+        """Actualiza las estadísticas con un registro recién insertado."""
+        if not self.statistics:
+            return
+        self.statistics['row_count'] += 1
+        self.statistics['record_slots'] = self._get_record_count()
+        sketches = self._column_sketches()
+        
+        for name, column in self.statistics['columns'].items():
+            value = record[name]
+            if isinstance(value, Point):
+                key = (value.x, value.y)
+                if column.get('grid'):
+                    spatial_histogram_add(column['grid'], value.x, value.y)
+                else:
+                    column['grid'] = spatial_histogram([value.x], [value.y])
+                column['min'] = [min(column['min'][0], value.x), min(column['min'][1], value.y)] if column['min'] else list(key)
+                column['max'] = [max(column['max'][0], value.x), max(column['max'][1], value.y)] if column['max'] else list(key)
+            else:
+                key = value
+                if column['min'] is None or value < column['min']:
+                    column['min'] = value
+                if column['max'] is None or value > column['max']:
+                    column['max'] = value
+                if column['type'] in self.NUMERIC_TYPES:
+                    if column.get('histogram'):
+                        histogram_add(column['histogram'], value)
+                    else:
+                        column['histogram'] = equi_depth_histogram([value])
+            
+            sketches[name].add(key)
+        
+        self._stats_modified()
+
+    def _stats_on_delete(self):
+        """Descuenta un registro eliminado (NDV, extremos e histogramas se corrigen con ANALYZE)."""
+        if not self.statistics:
+            return
+        self.statistics['row_count'] = max(0, self.statistics['row_count'] - 1)
+        self._stats_modified()
+
+    @read_locked
+    def get_statistics_summary(self):
+        """
+        Resumen de las estadísticas para reportes (sin sketches ni histogramas).
+        
+        Returns:
+            dict o None si la tabla no fue analizada
+        """
+        if not self.statistics:
+            return None
+        return {
+            'row_count': self.statistics['row_count'],
+            'analyzed_at': self.statistics['analyzed_at'],
+            'modifications': self.statistics['modifications'],
+            'columns': {
+                name: {
+                    'type': column['type'],
+                    'ndv': min(column['ndv'], self.statistics['row_count']),
+                    'min': column['min'],
+                    'max': column['max']
+                }
+                for name, column in self.statistics['columns'].items()
+            }
+        }
+
+    @read_locked
+    def count_live_records(self):
+        """
+        Cantidad de registros activos a partir de la lista libre: registros del
+        archivo menos los eliminados, sin leer los registros activos.
+        
+        Returns:
+            int: Registros activos
+        """
+        record_count = self._get_record_count()
+        deleted = 0
+        current = self._read_header()
+        while current != self.RECORD_END and 0 < current <= record_count and deleted < record_count:
+            deleted += 1
+            current = self._read_record(current)['next']
+        return record_count - deleted
+
+    def _column_decoder(self, attr_names):
+        """
+        Función que convierte la tupla desempaquetada de un registro en la
+        tupla de valores de attr_names (POINT como Point, strings sin relleno).
+        """
+        layout = {name: (data_type, position) for name, data_type, position in self._column_layout()}
+        columns = [layout[name] for name in attr_names]
+        
+        def decode(values):
+            row = []
+            for data_type, position in columns:
+                if data_type == 'POINT':
+                    row.append(Point(values[position], values[position + 1]))
+                elif isinstance(values[position], bytes):
+                    row.append(values[position].decode('utf-8', errors='ignore').rstrip('\x00'))
+                else:
+                    row.append(values[position])
+            return tuple(row)
+        
+        return decode
+
+    @read_locked
+    def get_many(self, record_numbers, columns=None, columnar=False):
+        """
+        Obtiene varios registros con pocas lecturas grandes: ordena los números
+        de registro, agrupa los cercanos (separados por menos de MAX_READ_GAP
+        registros) en una sola lectura secuencial de hasta MAX_READ_BYTES y
+        decodifica solo las columnas pedidas.
+        
+        Args:
+            record_numbers (list): Números de registro, en el orden deseado
+            columns (list, optional): Atributos a devolver (todos si es None)
+            columnar (bool): Si es True devuelve columnas en lugar de filas
+            
+        Returns:
+            list: Un dict por número de registro, en el orden recibido (None si
+                  el registro no existe o está eliminado), o si columnar es True
+            dict: {'numeros_registro': [...], 'columnas': {attr: [valores]}} solo
+                  con los registros activos
+        """
+        columns = list(columns) if columns else [attr['name'] for attr in self.table_info['attributes']]
+        decode = self._column_decoder(columns)
+        record_count = self._get_record_count()
+        wanted = sorted({n for n in record_numbers if 1 <= n <= record_count})
+        max_span = max(1, self.MAX_READ_BYTES // self.record_size)
+        
+        decoded = {}
+        with open(self.filename, 'rb') as f:
+            i = 0
+            while i < len(wanted):
+                start = wanted[i]
+                j = i
+                while (j + 1 < len(wanted) and wanted[j + 1] - wanted[j] <= self.MAX_READ_GAP
+                       and wanted[j + 1] - start < max_span):
+                    j += 1
+                
+                f.seek(self._get_record_position(start))
+                data = f.read((wanted[j] - start + 1) * self.record_size)
+                for record_num in wanted[i:j + 1]:
+                    values = struct.unpack_from(self.record_format, data, (record_num - start) * self.record_size)
+                    if values[-1] == self.RECORD_NORMAL:
+                        decoded[record_num] = decode(values)
+                i = j + 1
+        
+        if columnar:
+            found = [n for n in record_numbers if n in decoded]
+            return {
+                'numeros_registro': found,
+                'columnas': {name: [decoded[n][k] for n in found] for k, name in enumerate(columns)}
+            }
+        
+        return [dict(zip(columns, decoded[n])) if n in decoded else None for n in record_numbers]
+
+    def _scan_row_batches(self, attr_names, batch_records=None):
+        """
+        Recorrido secuencial de los registros activos por lotes: genera, por lote,
+        la lista de (número de registro, tupla de attr_names). El archivo se abre
+        y el lock de lectura se toma solo mientras se lee cada lote.
+        
+        Args:
+            attr_names (list): Atributos a leer
+            batch_records (int, optional): Registros por lote (JOIN_BATCH_SIZE)
+        """
+        batch_records = batch_records or self.JOIN_BATCH_SIZE
+        decode = self._column_decoder(attr_names)
+        unpacker = struct.Struct(self.record_format)
+        with self.lock.read():
+            total = self._get_record_count()
+        
+        for first in range(0, total, batch_records):
+            with self.lock.read(), open(self.filename, 'rb') as f:
+                f.seek(self.header_size + first * self.record_size)
+                data = f.read(min(batch_records, total - first) * self.record_size)
+            usable = len(data) - len(data) % self.record_size
+            rows = [
+                (first + offset + 1, decode(values))
+                for offset, values in enumerate(unpacker.iter_unpack(data[:usable]))
+                if values[-1] == self.RECORD_NORMAL
+            ]
+            if rows:
+                yield rows
+
+    @read_locked
+    def get_metadata(self):
+        """
+        Metadatos de la tabla sin leer registros: activos (contador mantenido
+        por insert/delete), espacios del archivo (incluye eliminados) y tamaño
+        en disco de cada índice.
+        
+        Returns:
+            dict: {'active_records', 'total_records', 'indexes': {attr: {'type', 'size_bytes'}}}
+        """
+        index_types = {attr['name']: attr.get('index') for attr in self.table_info['attributes']}
+        return {
+            'active_records': self.live_records,
+            'total_records': self._get_record_count(),
+            'indexes': {
+                attr_name: {
+                    'type': index_types.get(attr_name),
+                    'size_bytes': sum(os.path.getsize(path) for path in self._index_files(index) if os.path.exists(path))
+                }
+                for attr_name, index in self.indices.items()
+            }
+        }
+
+    @staticmethod
+    def _index_files(index):
+        """Archivos en disco de un índice."""
+        if isinstance(index, ExtendibleHashFile):
+            return [index.index_file, index.buckets_file]
+        if isinstance(index, RTreeFile):
+            return [index.index_file_dat, index.index_file_idx, index.metadata_file]
+        if isinstance(index, GridFile):
+            return [index.buckets_file, index.directory_file]
+        return [index.filename]
+
+    def sample_records(self, limit=5):
+        """
+        Primeros registros activos del archivo, leyendo solo los bloques necesarios.
+        
+        Args:
+            limit (int): Cantidad máxima de registros
+            
+        Returns:
+            list: Registros como diccionarios
+        """
+        names = [attr['name'] for attr in self.table_info['attributes']]
+        sample = []
+        for rows in self.iter_live_blocks(block_records=max(limit, 64)):
+            sample.extend(dict(zip(names, row)) for row in rows[:limit - len(sample)])
+            if len(sample) >= limit:
+                break
+        return sample
+
+    def iter_live_blocks(self, block_records=None, raw=False):
+        """
+        Recorre el archivo de la tabla con mmap en bloques de registros y genera,
+        por bloque, la lista de registros activos como tuplas (sin el campo next).
+        
+        El lock de lectura se toma por bloque, así una exportación larga solo
+        frena a las escrituras mientras se copia cada bloque. Se exportan los
+        registros que había al empezar el recorrido.
+        
+        Args:
+            block_records (int, optional): Registros por bloque (EXPORT_BLOCK_RECORDS)
+            raw (bool): Si es True, las tuplas son las de struct (strings como bytes
+                        con relleno, POINT como dos floats); si no, los valores
+                        decodificados en el orden de los atributos
+            
+        Returns:
+            generator: Listas de tuplas, una por bloque con registros activos
+        """
+        block_size = (block_records or self.EXPORT_BLOCK_RECORDS) * self.record_size
+        with self.lock.read():
+            end = self.header_size + self._get_record_count() * self.record_size
+        if end <= self.header_size:
+            return
+        
+        decode = None if raw else self._column_decoder([attr['name'] for attr in self.table_info['attributes']])
+        unpacker = struct.Struct(self.record_format)
+        
+        with open(self.filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            end = min(end, self.header_size + (len(data) - self.header_size) // self.record_size * self.record_size)
+            for start in range(self.header_size, end, block_size):
+                with self.lock.read():
+                    block = data[start:min(end, start + block_size)]
+                rows = [
+                    values[:-1] if raw else decode(values)
+                    for values in unpacker.iter_unpack(block)
+                    if values[-1] == self.RECORD_NORMAL
+                ]
+                if rows:
+                    yield rows
+
+    def _scan_columns(self, attr_names, record_numbers=None):
+        """
+        Recorre los registros activos devolviendo tuplas con los valores de
+        attr_names, sin construir el registro completo.
+        
+        Args:
+            attr_names (list): Atributos a leer (POINT se devuelve como Point)
+            record_numbers (iterable, optional): Registros a leer; si es None se
+                lee el archivo completo en una pasada secuencial
+        """
+        decode = self._column_decoder(attr_names)
+        
+        if record_numbers is None:
+            with open(self.filename, 'rb') as f:
+                f.seek(self.header_size)
+                data = f.read()
+            usable = len(data) - len(data) % self.record_size
+            for values in struct.iter_unpack(self.record_format, data[:usable]):
+                if values[-1] == self.RECORD_NORMAL:
+                    yield decode(values)
+            return
+        
+        with open(self.filename, 'rb') as f:
+            for record_num in record_numbers:
+                f.seek(self._get_record_position(record_num))
+                data = f.read(self.record_size)
+                if len(data) < self.record_size:
+                    continue
+                values = struct.unpack(self.record_format, data)
+                if values[-1] == self.RECORD_NORMAL:
+                    yield decode(values)
+
+    @read_locked
+    def aggregate(self, aggregates, group_by=None, record_numbers=None):
+        """
+        Calcula funciones de agregación (COUNT, SUM, AVG, MIN, MAX) agrupando
+        opcionalmente por uno o más atributos.
+        
+        Sin GROUP BY ni filtro usa atajos: COUNT(*) sale de la lista libre y
+        MIN/MAX de los extremos de un índice AVL/B-tree. En otro caso los
+        registros se recorren una sola vez con una tabla hash de grupos, sin
+        materializarlos.
+        
+        Args:
+            aggregates (list): Lista de [función, atributo] (atributo '*' para COUNT(*))
+            group_by (list, optional): Atributos de agrupación
+            record_numbers (iterable, optional): Registros que cumplen el WHERE
+            
+        Returns:
+            dict: {'error': False, 'group_by', 'aggregates', 'rows'} donde cada fila
+                  es [valores de group_by..., resultados de aggregates...]
+        """
+        group_by = list(group_by or [])
+        attr_types = {attr['name']: attr['data_type'].upper() for attr in self.table_info['attributes']}
+        
+        for func, attr_name in aggregates:
+            if attr_name == '*':
+                if func != 'COUNT':
+                    return {"error": True, "message": f"{func}(*) no es válido"}
+                continue
+            if attr_name not in attr_types:
+                return {"error": True, "message": f"El atributo '{attr_name}' no existe"}
+            if func in ('SUM', 'AVG') and attr_types[attr_name] not in self.NUMERIC_TYPES:
+                return {"error": True, "message": f"{func} requiere un atributo numérico: {attr_name}"}
+            if func in ('MIN', 'MAX') and attr_types[attr_name] == 'POINT':
+                return {"error": True, "message": f"{func} no soporta atributos POINT"}
+        for attr_name in group_by:
+            if attr_name not in attr_types:
+                return {"error": True, "message": f"El atributo '{attr_name}' no existe"}
+        
+        result = {"error": False, "group_by": group_by, "aggregates": aggregates}
+        
+        if not group_by and record_numbers is None:
+            fast = self._aggregate_fast_path(aggregates)
+            if fast is not None:
+                result['rows'] = [fast]
+                return result
+        
+        # Atributos a leer: los de agrupación y luego los agregados (sin repetir)
+        attr_names = list(group_by)
+        for _, attr_name in aggregates:
+            if attr_name != '*' and attr_name not in attr_names:
+                attr_names.append(attr_name)
+        positions = [attr_names.index(attr_name) if attr_name != '*' else None for _, attr_name in aggregates]
+        key_size = len(group_by)
+        
+        groups = {}
+        for row in self._scan_columns(attr_names, record_numbers):
+            key = row[:key_size]
+            states = groups.get(key)
+            if states is None:
+                states = groups[key] = [[0, None] for _ in aggregates]
+            for state, (func, _), position in zip(states, aggregates, positions):
+                state[0] += 1
+                if position is None:
+                    continue
+                value = row[position]
+                if func in ('SUM', 'AVG'):
+                    state[1] = value if state[1] is None else state[1] + value
+                elif func == 'MIN':
+                    if state[1] is None or value < state[1]:
+                        state[1] = value
+                elif func == 'MAX':
+                    if state[1] is None or value > state[1]:
+                        state[1] = value
+        
+        if not groups and not group_by:
+            # Sin filas: COUNT es 0 y el resto NULL
+            groups[()] = [[0, None] for _ in aggregates]
+        
+        rows = []
+        for key, states in groups.items():
+            values = []
+            for (func, _), (count, accumulated) in zip(aggregates, states):
+                if func == 'COUNT':
+                    values.append(count)
+                elif func == 'AVG':
+                    values.append(accumulated / count if count else None)
+                else:
+                    values.append(accumulated)
+            rows.append(list(key) + values)
+        
+        result['rows'] = rows
+        return result
+
+    def _aggregate_fast_path(self, aggregates):
+        """
+        Resuelve agregados sobre toda la tabla sin recorrerla: COUNT desde la
+        lista libre y MIN/MAX desde los extremos de un índice ordenado.
+        
+        Returns:
+            list: Valores de los agregados, o None si alguno requiere recorrer la tabla
+        """
+        values = []
+        count = None
+        for func, attr_name in aggregates:
+            if func == 'COUNT':
+                if count is None:
+                    count = self.count_live_records()
+                values.append(count)
+                continue
+            
+            index = self.indices.get(attr_name)
+            if func not in ('MIN', 'MAX') or not isinstance(index, AVLFile) or index.is_spatial:
+                return None
+            bounds = index.get_bounds()
+            values.append(None if bounds is None else bounds[0 if func == 'MIN' else 1])
+        return values
@@ -108,3 +108,56 @@ def test_delete_record_updates_avl(tmp_path, monkeypatch):
     deleted = t.delete_records([2])
     assert deleted == 1
     assert avl_name.search("y") == []   # ya no aparece
+
+
+def test_point_index_uses_zorder_ranges(tmp_path, monkeypatch):
+    make_dirs(tmp_path)
+    meta = write_meta(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    t = storage(tmp_path, meta)
+
+    pts = {}
+    i = 1
+    for x in range(-4, 5):
+        for y in range(-4, 5):
+            pts[i] = Point(x * 1.5, y * 2.5)
+            t.insert({"id": i, "name": f"p{i}", "price": float(i), "pos": pts[i]})
+            i += 1
+
+    avl_pos = t.indices["pos"]
+    assert avl_pos.is_spatial and avl_pos.filename.endswith("_zavl.dat")
+
+    # Puntos a la misma distancia del origen ya no se consideran iguales
+    assert avl_pos.search(Point(1.5, 2.5)) == [k for k, p in pts.items() if p == Point(1.5, 2.5)]
+
+    lo, hi = Point(-2, -3), Point(4.5, 5)
+    expected = sorted(k for k, p in pts.items() if p.is_in_range(lo, hi))
+    assert sorted(avl_pos.range_search(lo, hi)) == expected
+
+    # El rango espacial no recorre todo el árbol
+    visited = []
+    original = avl_pos._read_node
+    def counting_read(index):
+        visited.append(index)
+        return original(index)
+    avl_pos._read_node = counting_read
+    assert sorted(avl_pos.range_search(Point(0, 0), Point(0.1, 0.1))) == [k for k, p in pts.items() if p == Point(0, 0)]
+    assert len(visited) < len(pts) / 2
+
+    avl_pos._read_node = original
+    assert t.delete_records([1]) == 1
+    assert 1 not in avl_pos.range_search(Point(-10, -10), Point(10, 10))
+
+
+def test_point_index_built_from_existing_rows(tmp_path, monkeypatch):
+    make_dirs(tmp_path)
+    meta = write_meta(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    t = storage(tmp_path, meta)
+    for i in range(1, 6):
+        t.insert({"id": i, "name": f"p{i}", "price": float(i), "pos": Point(i, -i)})
+
+    # Si el archivo del índice no existe se reconstruye desde la tabla
+    os.remove(t.indices["pos"].filename)
+    reopened = storage(tmp_path, meta)
+    assert sorted(reopened.indices["pos"].range_search(Point(2, -4), Point(4, -2))) == [2, 3, 4]
@@ -0,0 +1,27 @@
+import random
+from estructuras.bitmap import RecordBitmap
+
+
+def test_bitmap_set_operations():
+    rng = random.Random(7)
+    a_values = {rng.randrange(1, 300000) for _ in range(5000)}
+    b_values = {rng.randrange(1, 300000) for _ in range(5000)} | {1, 65535, 65536, 65537}
+    a, b = RecordBitmap(a_values), RecordBitmap(b_values)
+
+    assert list(a) == sorted(a_values)
+    assert len(a) == len(a_values)
+    assert (a & b).to_list() == sorted(a_values & b_values)
+    assert (a | b).to_list() == sorted(a_values | b_values)
+    assert (a - b).to_list() == sorted(a_values - b_values)
+    assert 65536 in b and 0 not in b
+
+
+def test_bitmap_add_and_empty():
+    bitmap = RecordBitmap()
+    assert not bitmap and bitmap.to_list() == []
+    bitmap.add(70000)
+    bitmap.add(3)
+    bitmap |= RecordBitmap([3, 4])
+    assert bitmap.to_list() == [3, 4, 70000]
+    assert not (bitmap - RecordBitmap([3, 4, 70000]))
+    assert bitmap == RecordBitmap([70000, 4, 3])
@@ -0,0 +1,75 @@
+import multiprocessing
+import time
+import pytest
+from estructuras.catalog import SharedCatalog
+from sql import SQLTableManager
+from tabla import TableStorageManager
+
+
+@pytest.fixture
+def managers(tmp_path, monkeypatch):
+    """Dos gestores sobre el mismo directorio, como dos workers distintos."""
+    monkeypatch.chdir(tmp_path)
+    first = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas', multiprocess=True)
+    second = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas', multiprocess=True)
+    return first, second
+
+
+def test_catalog_versions(tmp_path):
+    catalog = SharedCatalog(str(tmp_path))
+    assert catalog.version() == 0 and catalog.table_version('t') == 0
+    assert catalog.bump_catalog() == 1
+    assert catalog.bump_table('t') == 1
+    assert catalog.bump_table('t') == 2
+    assert catalog.read() == {'version': 1, 'tables': {'t': 2}}
+
+
+def test_other_process_sees_tables_and_writes(managers):
+    first, second = managers
+    first.parse_sql_statement("""
+    CREATE TABLE productos (id INT KEY INDEX avl, precio DECIMAL INDEX btree);
+    INSERT INTO productos VALUES (1, 10.0), (2, 20.0);
+    """)
+    assert 'productos' in second.get_all_tables()
+
+    result = second.parse_sql_statement("SELECT * FROM productos WHERE precio BETWEEN 0 AND 100;")
+    assert sorted(result[0][1]['resultado']['numeros_registro']) == [1, 2]
+
+    # ANALYZE en un proceso: el otro recarga las estadísticas al notar la nueva versión
+    first.parse_sql_statement("ANALYZE productos;")
+    storage = second.get_storage_manager('productos')
+    assert storage.statistics is None
+    assert storage.count_live_records() == 2
+    assert storage.statistics['row_count'] == 2
+
+    second.parse_sql_statement("INSERT INTO productos VALUES (3, 30.0);")
+    result = first.parse_sql_statement("SELECT * FROM productos WHERE id = 3;")
+    assert result[0][1]['resultado']['numeros_registro'] == [3]
+    assert first.get_storage_manager('productos').statistics['row_count'] == 3
+
+
+def _hold_write_lock(base_dir, ready, seconds):
+    catalog = SharedCatalog(base_dir)
+    lock = catalog.table_lock('t', lambda: None, lambda: None)
+    with lock.write():
+        ready.set()
+        time.sleep(seconds)
+
+
+def test_write_lock_excludes_other_processes(tmp_path):
+    context = multiprocessing.get_context('fork')
+    ready = context.Event()
+    child = context.Process(target=_hold_write_lock, args=(str(tmp_path), ready, 0.3))
+    child.start()
+    assert ready.wait(5)
+
+    stale = []
+    lock = SharedCatalog(str(tmp_path)).table_lock('t', lambda: stale.append(True), lambda: None)
+    start = time.perf_counter()
+    with lock.read():
+        waited = time.perf_counter() - start
+    child.join(5)
+
+    assert waited >= 0.15
+    # La escritura del otro proceso subió la versión de la tabla
+    assert stale == [True]
@@ -0,0 +1,43 @@
+import math
+import pytest
+from estructuras.distance import (
+    haversine, geo_bounding_boxes, haversine_within, haversine_many, normalize_metric
+)
+from array import array
+
+
+def test_haversine_known_distances():
+    # Un grado de latitud ~ 111.19 km
+    assert abs(haversine(0, 0, 1, 0) - 111.195) < 0.01
+    # A 60° de latitud un grado de longitud mide la mitad
+    assert abs(haversine(60, 0, 60, 1) - 55.59) < 0.05
+    assert haversine(0, 179.9, 0, -179.9) < 23
+
+
+def test_geo_bounding_boxes_shrink_pole_and_antimeridian():
+    (lat_min, lon_min, lat_max, lon_max), = geo_bounding_boxes(60.0, 10.0, 100.0)
+    assert lon_max - 10.0 > 2 * (lat_max - 60.0) * 0.9
+
+    # Círculo que contiene el polo norte: toda la longitud
+    (_, lon_min, lat_max, lon_max), = geo_bounding_boxes(89.5, 0.0, 100.0)
+    assert (lon_min, lon_max, lat_max) == (-180.0, 180.0, 90.0)
+
+    boxes = geo_bounding_boxes(0.0, 179.95, 30.0)
+    assert len(boxes) == 2
+    assert all(-180.0 <= b[1] <= b[3] <= 180.0 for b in boxes)
+
+
+def test_haversine_within_matches_exact_distance():
+    lats = array('d', [60.0, 61.0, 60.0, 59.2])
+    lons = array('d', [10.0, 10.0, 11.6, 9.0])
+    exact = haversine_many(60.0, 10.0, lats, lons)
+    for radius in (50.0, 95.0, 115.0):
+        expected = [i for i, d in enumerate(exact) if d <= radius]
+        assert haversine_within(60.0, 10.0, lats, lons, radius) == expected
+
+
+def test_normalize_metric():
+    assert normalize_metric(None) == 'euclidean'
+    assert normalize_metric("'Haversine'") == 'haversine'
+    with pytest.raises(ValueError):
+        normalize_metric('manhattan')
@@ -0,0 +1,172 @@
+import os
+import math
+import random
+import pytest
+from tabla import TableStorageManager
+from estructuras.point_class import Point
+from estructuras.grid import GridFile, CellBucket, CELL_CAPACITY
+
+# --- helpers ---
+def mk_table_info(index="grid", metric=None):
+    location = {"name": "location", "data_type": "POINT", "index": index}
+    if metric:
+        location["metric"] = metric
+    return {
+        "attributes": [
+            {"name": "id", "data_type": "INT", "is_key": True, "index": "avl"},
+            location,
+            {"name": "name", "data_type": "VARCHAR[20]"},
+        ],
+        "primary_key": "id",
+    }
+
+def insert_random_points(storage, n, seed=3, spread=20.0):
+    rng = random.Random(seed)
+    points = {}
+    for i in range(1, n + 1):
+        p = Point(rng.uniform(-spread, spread), rng.uniform(-spread, spread))
+        storage.insert({"id": i, "location": p, "name": f"P{i}"})
+        points[i] = p
+    return points
+
+# --- tests ---
+def test_cell_bucket_roundtrip():
+    bucket = CellBucket()
+    for i in range(3):
+        bucket.records.append(i + 1)
+        bucket.xs.append(i * 0.5)
+        bucket.ys.append(-i * 1.5)
+    bucket.next = 7
+    restored = CellBucket.from_bytes(bucket.to_bytes())
+    assert list(restored.records) == [1, 2, 3]
+    assert list(restored.xs) == [0.0, 0.5, 1.0]
+    assert list(restored.ys) == [0.0, -1.5, -3.0]
+    assert restored.next == 7
+
+
+def test_grid_matches_brute_force(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = TableStorageManager("grid_tab", mk_table_info(), base_dir="tablas")
+    grid = storage.indices["location"]
+    assert isinstance(grid, GridFile)
+    points = insert_random_points(storage, 400)
+
+    # Celdas con más de CELL_CAPACITY puntos usan buckets de overflow
+    storage.insert({"id": 401, "location": Point(0.5, 0.5), "name": "dup"})
+    points[401] = Point(0.5, 0.5)
+    for i in range(402, 402 + CELL_CAPACITY):
+        storage.insert({"id": i, "location": Point(0.25, 0.75), "name": "dup"})
+        points[i] = Point(0.25, 0.75)
+
+    center = Point(1.0, -2.0)
+    for radius in (0.5, 3.0, 7.5):
+        expected = sorted(k for k, p in points.items() if p.distance_to(center) <= radius)
+        assert sorted(grid.range_search_radius(center, radius)) == expected
+
+    lo, hi = Point(-3, -4), Point(5, 1)
+    assert sorted(grid.range_search(lo, hi)) == sorted(k for k, p in points.items() if p.is_in_range(lo, hi))
+
+    by_distance = sorted(points, key=lambda k: points[k].distance_to(center))
+    knn = grid.range_search_knn(center, 10)
+    assert [d for _, d in knn] == sorted(d for _, d in knn)
+    assert abs(knn[-1][1] - points[by_distance[9]].distance_to(center)) < 1e-12
+
+    assert sorted(grid.search(Point(0.25, 0.75))) == list(range(402, 402 + CELL_CAPACITY))
+
+    # La tabla usa el grid para RADIUS/KNN igual que con un R-Tree
+    result = storage.select(lista_espaciales=[("RADIUS", "location", center, 3.0)])
+    assert sorted(result["numeros_registro"]) == sorted(
+        k for k, p in points.items() if p.distance_to(center) <= 3.0)
+
+
+def test_grid_delete_and_persist(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = TableStorageManager("grid_tab", mk_table_info(), base_dir="tablas")
+    points = insert_random_points(storage, 50)
+
+    assert storage.delete_records([5, 6]) == 2
+    grid = storage.indices["location"]
+    assert 5 not in grid.range_search_radius(points[5], 0.001)
+    assert grid.get_stats()["total_records"] == 48
+
+    # Reabrir: el directorio de celdas y los buckets persisten en disco
+    reopened = GridFile(storage.record_format, grid.index_attr, "grid_tab")
+    assert reopened.cells == grid.cells
+    assert sorted(reopened.range_search(Point(-30, -30), Point(30, 30))) == sorted(set(points) - {5, 6})
+
+    # Reconstrucción desde la tabla en una pasada
+    os.remove(grid.directory_file)
+    rebuilt = GridFile(storage.record_format, grid.index_attr, "grid_tab")
+    assert rebuilt.rebuild_index() is True
+    assert sorted(rebuilt.range_search_radius(Point(0, 0), 100.0)) == sorted(set(points) - {5, 6})
+
+
+def test_grid_haversine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = TableStorageManager("geo_grid", mk_table_info(metric="haversine"), base_dir="tablas")
+    rows = [Point(60.0, 10.0), Point(61.0, 10.0), Point(60.0, 11.6), Point(0.0, 179.9), Point(0.0, -179.9)]
+    for i, p in enumerate(rows, 1):
+        storage.insert({"id": i, "location": p, "name": f"G{i}"})
+
+    grid = storage.indices["location"]
+    assert sorted(grid.range_search_radius(Point(60.0, 10.0), 95.0)) == [1, 3]
+    assert sorted(grid.range_search_radius(Point(0.0, 179.95), 30.0)) == [4, 5]
+    assert grid.range_search_knn_simple(Point(60.0, 10.0), 2) == [1, 3]
+    assert grid.range_search_knn_simple(Point(60.0, 10.0), 2, metric="euclidean") == [1, 2]
+
+
+def test_grid_spatial_join_with_rtree(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    grid_tab = TableStorageManager("g", mk_table_info("grid"), base_dir="tablas")
+    rtree_tab = TableStorageManager("r", mk_table_info("rtree"), base_dir="tablas")
+    grid_points = insert_random_points(grid_tab, 30, seed=1, spread=5.0)
+    rtree_points = insert_random_points(rtree_tab, 30, seed=2, spread=5.0)
+
+    pairs = grid_tab.spatial_join("location", rtree_tab, "location", 1.0)
+    expected = sorted((a, b) for a, pa in grid_points.items() for b, pb in rtree_points.items()
+                      if pa.distance_to(pb) <= 1.0)
+    assert sorted((a, b) for a, b, _ in pairs) == expected
+
+    # El refinamiento usa los puntos ya cargados, sin releer la tabla por par
+    def fail(record_num):
+        raise AssertionError("lectura de la tabla por par")
+    monkeypatch.setattr(grid_tab.indices["location"], "get_attribute_from_record_num", fail)
+    monkeypatch.setattr(rtree_tab.indices["location"], "get_attribute_from_record_num", fail)
+    assert grid_tab.spatial_join("location", rtree_tab, "location", 1.0) == pairs
+
+    with pytest.raises(ValueError):
+        grid_tab.indices["location"].batch_range_search_radius([Point(0, 0), Point(1, 1)], [1.0])
+
+
+def test_grid_knn_far_points_and_cell_size(tmp_path, monkeypatch):
+    """KNN visita solo celdas ocupadas: el costo no depende de la extensión de las coordenadas."""
+    monkeypatch.chdir(tmp_path)
+    storage = TableStorageManager("far_grid", mk_table_info(), base_dir="tablas")
+    rows = [Point(0, 0), Point(1.5, 0.5), Point(3000, 3000)]
+    for i, p in enumerate(rows, 1):
+        storage.insert({"id": i, "location": p, "name": f"F{i}"})
+
+    grid = storage.indices["location"]
+    read_cells = []
+    read_cell = grid._read_cell
+    monkeypatch.setattr(grid, "_read_cell", lambda cell: read_cells.append(cell) or read_cell(cell))
+    assert grid.range_search_knn_simple(Point(0, 0), 3) == [1, 2, 3]
+    assert grid.range_search_knn_simple(Point(2990, 2990), 1) == [3]
+    assert len(read_cells) <= 4
+
+    # El lado de celda se elige por columna en CREATE TABLE
+    info = mk_table_info()
+    info["attributes"][1]["cell_size"] = 50.0
+    coarse = TableStorageManager("coarse_grid", info, base_dir="tablas")
+    assert coarse.indices["location"].cell_size == 50.0
+
+
+def test_grid_knn_matches_brute_force_sparse(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = TableStorageManager("sparse_grid", mk_table_info(), base_dir="tablas")
+    points = insert_random_points(storage, 60, seed=7, spread=500.0)
+    grid = storage.indices["location"]
+    for center in (Point(0, 0), Point(480, -480), Point(-900, 10)):
+        for k in (1, 5, 60, 80):
+            expected = sorted(p.distance_to(center) for p in points.values())[:k]
+            assert [d for _, d in grid.range_search_knn(center, k)] == pytest.approx(expected)
@@ -1,4 +1,4 @@
-import os, struct, json
+import os, sys, struct, json
 import pytest
 from pathlib import Path
 
@@ -140,3 +140,59 @@ def test_delete_paths_base_and_overflow_and_not_found(tmp_path, monkeypatch):
     assert h.delete_record(6) == 6
     # no encontrado
     assert h.delete_record(99) is None
+
+
+def test_point_hash_after_int_column(tmp_path, monkeypatch):
+    """Un INT seguido de un POINT no debe confundirse con un POINT."""
+    from tabla import TableStorageManager
+    make_dirs(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    info = {
+        "table_name": "Lugares",
+        "attributes": [
+            {"name": "id", "data_type": "INT", "is_key": True, "index": "hash"},
+            {"name": "pos", "data_type": "POINT", "is_key": False, "index": "hash"},
+        ],
+        "primary_key": "id",
+    }
+    t = TableStorageManager("Lugares", info, base_dir="tablas")
+    for i in range(1, 21):
+        t.insert({"id": i, "pos": Point(i % 5, i // 5)})
+
+    assert t.indices["id"].search(7) == [7]
+    assert t.indices["pos"].is_spatial
+    assert t.indices["pos"].search(Point(2, 1)) == [7]
+    # Puntos distintos a la misma distancia del origen
+    assert t.indices["pos"].search(Point(3, 0)) == [3]
+    assert t.indices["pos"].search(Point(0, 3)) == [15]
+
+def test_concurrent_searches_see_full_directory(tmp_path, monkeypatch):
+    """search recarga el directorio: lecturas concurrentes no deben verlo vacío o a medias."""
+    import threading
+    make_dirs(tmp_path); write_meta(tmp_path)
+    rows = [(i, f"N{i}", float(i), 0, 0) for i in range(1, 201)]
+    write_table(tmp_path, rows)
+    monkeypatch.chdir(tmp_path)
+    h = ExtendibleHashFile(index_attr=1, table_name="Productos", is_key=True)
+    for rid in range(1, 201):
+        h.insert_record(rid)
+
+    misses = []
+    def lookups(offset):
+        for i in range(400):
+            rid = (i * 7 + offset) % 200 + 1
+            if h.search(rid) != [rid]:
+                misses.append(rid)
+
+    # Cambios de hilo frecuentes para que la recarga del directorio se intercale
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=lookups, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert misses == []
@@ -48,16 +48,182 @@ class TestMainEndpoints:
         assert "execution_time" in data
         assert len(data["results"]) == 2
     
+    @patch('main.sql_manager')
+    def test_sql_endpoint_select_index_only(self, mock_sql_manager):
+        """Los valores de una consulta cubierta por índices no se vuelven a leer"""
+        mock_storage = MagicMock()
+        mock_sql_manager.get_storage_manager.return_value = mock_storage
+        mock_sql_manager.execute_sql.return_value = [
+            ("SELECT", {
+                'error': False,
+                'table_name': 'empleados',
+                'resultado': {
+                    'error': False,
+                    'numeros_registro': [4, 9],
+                    'registros': [{'id': 4}, {'id': 9}],
+                    'requested_attributes': ['id']
+                }
+            })
+        ]
+        
+        response = client.post("/sql", json={"sql": "SELECT id FROM empleados WHERE id BETWEEN 4 AND 9"})
+        
+        assert response.status_code == 200
+        assert response.json()["results"][0]["records"] == [{'id': 4}, {'id': 9}]
+        mock_storage.get.assert_not_called()
+    
+    @patch('main.sql_manager')
+    def test_sql_endpoint_columnar_format(self, mock_sql_manager):
+        """Formato columnar: nombres de columnas una vez y POINT como [x, y]"""
+        mock_storage = MagicMock()
+        mock_storage.get_many.return_value = [{'id': 1, 'location': Point(1.5, 2.0)}, None, {'id': 3, 'location': Point(0, 0)}]
+        mock_sql_manager.get_storage_manager.return_value = mock_storage
+        mock_sql_manager.execute_sql.return_value = [
+            ("SELECT", {
+                'error': False,
+                'table_name': 'lugares',
+                'resultado': {'error': False, 'numeros_registro': [1, 2, 3], 'requested_attributes': ['id', 'location']}
+            })
+        ]
+        
+        response = client.post("/sql", json={"sql": "SELECT id, location FROM lugares", "format": "columnar"})
+        
+        assert response.status_code == 200
+        select = response.json()["results"][0]
+        assert select["columns"] == ['id', 'location']
+        assert select["rows"] == [[1, [1.5, 2.0]], [3, [0, 0]]]
+        assert "records" not in select
+        
+        response = client.post("/sql", json={"sql": "SELECT * FROM lugares", "format": "arrow"})
+        assert response.status_code == 422
+    
+    @patch('main.sql_manager')
+    def test_sql_endpoint_statement_timing(self, mock_sql_manager):
+        """Cada resultado trae sus tiempos por fase en milisegundos"""
+        mock_storage = MagicMock()
+        mock_storage.get_many.return_value = [{'id': 1}]
+        mock_sql_manager.get_storage_manager.return_value = mock_storage
+
+        def execute_sql(sql, params=None, timings=None):
+            timings.append({'parse': 0.001, 'plan': 0.0, 'index': 0.002, 'fetch': 0.0, 'execute': 0.0})
+            return [("SELECT", {
+                'error': False,
+                'table_name': 'empleados',
+                'resultado': {'error': False, 'numeros_registro': [1], 'requested_attributes': ['id']}
+            })]
+
+        mock_sql_manager.execute_sql.side_effect = execute_sql
+        response = client.post("/sql", json={"sql": "SELECT id FROM empleados WHERE id = 1"})
+
+        timing = response.json()["results"][0]["timing"]
+        assert timing["parse_ms"] == 1.0
+        assert timing["index_ms"] == 2.0
+        assert set(timing) == {"parse_ms", "plan_ms", "index_ms", "fetch_ms", "execute_ms", "serialize_ms"}
+        assert timing["fetch_ms"] >= 0 and timing["serialize_ms"] >= 0
+    
+    @patch('main.STREAM_CHUNK_SIZE', 2)
+    @patch('main.sql_manager')
+    def test_sql_stream_endpoint(self, mock_sql_manager):
+        """/sql/stream envía una línea JSON por registro, leyendo por bloques"""
+        mock_storage = MagicMock()
+        mock_storage.get_many.side_effect = lambda numeros, attrs: [
+            {'id': n, 'location': Point(n, -n)} for n in numeros
+        ]
+        mock_sql_manager.get_storage_manager.return_value = mock_storage
+        mock_sql_manager.execute_sql.return_value = [
+            ("SELECT", {
+                'error': False,
+                'table_name': 'lugares',
+                'resultado': {'error': False, 'numeros_registro': [1, 2, 3], 'requested_attributes': ['id', 'location']}
+            })
+        ]
+        
+        response = client.post("/sql/stream", json={"sql": "SELECT * FROM lugares"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0] == {"operation": "SELECT", "table": "lugares", "records_found": 3}
+        assert [line["id"] for line in lines[1:4]] == [1, 2, 3]
+        assert lines[3]["location"]["x"] == pytest.approx(3.0)
+        assert lines[4] == {"operation_end": "SELECT", "records_sent": 3}
+        assert lines[5]["done"] is True
+        assert mock_storage.get_many.call_count == 2
+    
+    def test_engine_stream_client_disconnect(self):
+        """Si el cliente se va a mitad de la respuesta, el productor termina y no quedan hilos esperando"""
+        import asyncio
+        import threading
+        from main import engine_stream
+        closed = threading.Event()
+        resume = threading.Event()
+
+        def produce_chunks():
+            try:
+                yield b"x"
+                # El cliente se desconecta mientras espera el siguiente bloque
+                resume.wait(5)
+                for _ in range(1000):
+                    yield b"x"
+            finally:
+                closed.set()
+
+        async def disconnect_after_first_chunk():
+            body = engine_stream(produce_chunks, "text/plain").body_iterator
+            assert await body.__anext__() == b"x"
+            waiting = asyncio.ensure_future(body.__anext__())
+            await asyncio.sleep(0.05)
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+            await body.aclose()
+            resume.set()
+
+        runner = threading.Thread(target=lambda: asyncio.run(disconnect_after_first_chunk()))
+        runner.start()
+        runner.join(5)
+        assert not runner.is_alive()
+        assert closed.wait(5)
+    
+    def test_engine_stream_timeout(self):
+        """Un productor que no avanza se corta al vencer el tiempo límite con un bloque de error"""
+        import asyncio
+        import threading
+        from main import engine_stream
+        closed = threading.Event()
+        resume = threading.Event()
+
+        def produce_chunks():
+            try:
+                yield b"a"
+                # Consulta detenida: no llega ningún bloque antes del límite
+                resume.wait(5)
+                yield b"b"
+            finally:
+                closed.set()
+
+        async def read_all():
+            body = engine_stream(produce_chunks, "text/plain",
+                                 on_error=lambda e: f"error: {e}".encode(), timeout=0.2).body_iterator
+            return [chunk async for chunk in body]
+
+        received = asyncio.run(read_all())
+        resume.set()
+        assert received[0] == b"a"
+        assert len(received) == 2
+        assert b"tiempo l\xc3\xadmite" in received[1]
+        assert closed.wait(5)
+    
     @patch('main.sql_manager')
     def test_sql_endpoint_select_with_points(self, mock_sql_manager):
         """Test del endpoint /sql con datos Point"""
         # Mock del storage manager
         mock_storage = MagicMock()
-        mock_storage.get.return_value = {
+        mock_storage.get_many.return_value = [{
             'id': 1, 
             'location': Point(10.5, 20.3),
             'name': 'test_point'
-        }
+        }]
         
         mock_sql_manager.execute_sql.return_value = [
             ("SELECT", {
@@ -105,6 +271,26 @@ class TestMainEndpoints:
             assert response.status_code == 400
             assert "Error SQL" in response.json()["detail"]
     
+    def test_sql_endpoint_timeout(self):
+        """Una consulta que supera su tiempo límite responde 504 sin bloquear el servidor"""
+        import threading
+        done = threading.Event()
+        with patch('main.sql_manager') as mock_manager:
+            mock_manager.execute_sql.side_effect = lambda *a, **k: done.wait(2) and []
+            response = client.post("/sql", json={"sql": "SELECT * FROM test", "timeout": 0.05})
+            assert response.status_code == 504
+            assert client.get("/health").json() == {"status": "ok"}
+            done.set()
+    
+    def test_sql_endpoint_backpressure(self):
+        """Con la cola del motor llena se responde 503"""
+        import threading
+        with patch('main.sql_manager'), patch('main.engine_slots', threading.BoundedSemaphore(1)) as slots:
+            slots.acquire()
+            response = client.post("/sql", json={"sql": "SELECT * FROM test"})
+            assert response.status_code == 503
+            assert response.headers["retry-after"] == "1"
+    
     @patch('main.sql_manager')
     def test_get_tables_endpoint(self, mock_sql_manager):
         """Test del endpoint /tables"""
@@ -121,8 +307,7 @@ class TestMainEndpoints:
         
         # Mock del storage manager
         mock_storage = MagicMock()
-        mock_storage._get_record_count.return_value = 10
-        mock_storage._get_all_active_record_numbers.return_value = [1, 2, 3, 4, 5]
+        mock_storage.get_metadata.return_value = {'active_records': 5, 'total_records': 10, 'indexes': {}}
         mock_sql_manager.get_storage_manager.return_value = mock_storage
         
         response = client.get("/tables")
@@ -132,6 +317,9 @@ class TestMainEndpoints:
         assert data["success"] is True
         assert "users" in data["tables"]
         assert data["total_tables"] == 1
+        assert data["tables"]["users"]["active_records"] == 5
+        assert data["tables"]["users"]["total_records"] == 10
+        mock_storage._get_all_active_record_numbers.assert_not_called()
     
     def test_get_tables_without_manager(self):
         """Test del endpoint /tables sin manager"""
@@ -154,10 +342,11 @@ class TestMainEndpoints:
         
         # Mock storage manager
         mock_storage = MagicMock()
-        mock_storage.get_all_records.return_value = [
+        mock_storage.sample_records.return_value = [
             {'id': 1, 'name': 'user1'},
             {'id': 2, 'name': 'user2'}
         ]
+        mock_storage.get_metadata.return_value = {'active_records': 2, 'total_records': 2, 'indexes': {}}
         mock_sql_manager.get_storage_manager.return_value = mock_storage
         
         response = client.get("/tables/users")
@@ -176,6 +365,43 @@ class TestMainEndpoints:
         response = client.get("/tables/nonexistent")
         assert response.status_code == 404
         assert "no encontrada" in response.json()["detail"]
+    
+    @patch('main.sql_manager')
+    def test_register_and_login_run_in_engine_pool(self, mock_sql_manager):
+        """/register y /login leen y escriben la tabla de usuarios desde el pool del motor"""
+        import threading
+        import bcrypt
+        hilos = []
+        usuarios = {}
+
+        def select(lista_busquedas):
+            hilos.append(threading.current_thread().name)
+            user = lista_busquedas[0][1]
+            return {'numeros_registro': [usuarios[user]['id']] if user in usuarios else []}
+
+        def insert(record):
+            hilos.append(threading.current_thread().name)
+            usuarios[record['user']] = record
+
+        storage = MagicMock()
+        storage.select.side_effect = select
+        storage.insert.side_effect = insert
+        storage.get_all_records.return_value = []
+        storage.get.side_effect = lambda n: next(u for u in usuarios.values() if u['id'] == n)
+        mock_sql_manager.tables = {'auth_usuario_xa': {}}
+        mock_sql_manager.get_storage_manager.return_value = storage
+
+        response = client.post("/register", json={"user": "ana", "password": "secreta"})
+        assert response.status_code == 200
+        assert bcrypt.checkpw(b"secreta", usuarios["ana"]['password'].encode('utf-8'))
+        assert client.post("/register", json={"user": "ana", "password": "x"}).status_code == 400
+
+        response = client.post("/login", json={"user": "ana", "password": "secreta"})
+        assert response.status_code == 200
+        assert response.json()["user"]["username"] == "ana"
+        assert client.post("/login", json={"user": "ana", "password": "mal"}).status_code == 401
+
+        assert hilos and all(nombre.startswith('bd2-engine') for nombre in hilos)
 
 
 class TestSerializationFunctions:
@@ -291,4 +517,57 @@ class TestIntegrationWithFixtures:
         
         assert len(result) == 1
         assert result[0]['location']['type'] == 'POINT'
-        assert result[0]['location']['x'] == pytest.approx(10.0)
\ No newline at end of file
+        assert result[0]['location']['x'] == pytest.approx(10.0)
+
+class TestExportEndpoint:
+    """Exportación de tablas completas en CSV, NDJSON y binario columnar"""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        from sql import SQLTableManager
+        from tabla import TableStorageManager
+        monkeypatch.chdir(tmp_path)
+        manager = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas')
+        manager.parse_sql_statement("""
+        CREATE TABLE lugares (id INT KEY INDEX avl, nombre VARCHAR[8], ubicacion POINT);
+        INSERT INTO lugares VALUES (1, 'a', '(1, 2)'), (2, 'b', '(3, 4)'), (3, 'c', '(5, 6)');
+        DELETE FROM lugares WHERE id = 2;
+        """)
+        monkeypatch.setattr(TableStorageManager, 'EXPORT_BLOCK_RECORDS', 2)
+        with patch('main.sql_manager', manager):
+            yield manager
+
+    def test_export_csv_and_ndjson(self, manager):
+        response = client.get("/tables/lugares/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.text.splitlines() == ['id,nombre,ubicacion', '1,a,"(1.0, 2.0)"', '3,c,"(5.0, 6.0)"']
+
+        response = client.get("/tables/lugares/export", params={"format": "ndjson"})
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == [{"columns": ["id", "nombre", "ubicacion"]}, [1, "a", [1.0, 2.0]], [3, "c", [5.0, 6.0]]]
+
+        assert client.get("/tables/otra/export").status_code == 404
+
+    def test_export_columnar(self, manager):
+        import struct
+        data = client.get("/tables/lugares/export", params={"format": "columnar"}).content
+        assert data[:4] == b"BD2C"
+        header_length = struct.unpack_from("<I", data, 4)[0]
+        header = json.loads(data[8:8 + header_length])
+        assert [field["name"] for field in header["fields"]] == ["id", "nombre", "ubicacion.x", "ubicacion.y"]
+
+        # Bloques de 2 registros: el primero con 1 activo, el segundo con 1
+        offset = 8 + header_length
+        ids, xs = [], []
+        while True:
+            count = struct.unpack_from("<I", data, offset)[0]
+            offset += 4
+            if count == 0:
+                break
+            ids += struct.unpack_from(f"<{count}i", data, offset)
+            offset += 4 * count + 8 * count
+            xs += struct.unpack_from(f"<{count}d", data, offset)
+            offset += 16 * count
+        assert offset == len(data)
+        assert ids == [1, 3] and xs == [1.0, 5.0]
@@ -1,4 +1,4 @@
-from estructuras.point_class import Point
+from estructuras.point_class import Point, PointArray
 import math
 
 def test_point_basics():
@@ -264,3 +264,36 @@ def test_remaining_uncovered_lines():
     list_result = p.to_list()
     assert list_result == [3.0, 4.0]
 
+
+
+def test_point_slots_and_cached_norm():
+    p = Point(3, 4)
+    assert not hasattr(p, '__dict__')
+    assert p._norm is None
+    assert p.distance_to_origin() == 5
+    assert p._norm == 5
+    assert Point(1, 1) < p
+    assert sorted([Point(3, 4), Point(0, 1), Point(1, 1)]) == [Point(0, 1), Point(1, 1), Point(3, 4)]
+
+
+def test_point_array_bulk_operations():
+    arr = PointArray.from_points([Point(0, 0), Point(3, 4), Point(10, 10)])
+    arr.append(-2, 1)
+    arr.append(Point(1, 1))
+
+    assert len(arr) == 5
+    assert arr[1] == Point(3, 4)
+    assert arr.coords(3) == (-2.0, 1.0)
+    assert list(arr)[-1] == Point(1, 1)
+    assert arr.bounds() == (-2.0, 0.0, 10.0, 10.0)
+    assert PointArray().bounds() is None
+
+    assert list(arr.distances_to(Point(0, 0)))[:2] == [0.0, 5.0]
+    assert arr.within_radius(Point(0, 0), 5.0) == [0, 1, 3, 4]
+    assert arr.within_rect(Point(-3, -1), Point(3, 4)) == [0, 1, 3, 4]
+
+    try:
+        PointArray([1.0], [])
+        assert False, "Debería haber lanzado ValueError"
+    except ValueError:
+        pass
@@ -176,3 +176,112 @@ def test_rtree_rebuild_index_from_table(tmp_path, monkeypatch):
     assert new_rtree.search(Point(3, 4)) == [2]
     stats = new_rtree.get_stats()
     assert stats["total_records"] >= 3  # reconstruyó el cache y el índice
+
+
+def test_rtree_batch_radius_and_knn(tmp_path, monkeypatch):
+    """Búsquedas en lote: un resultado por punto, en el orden de consulta."""
+    monkeypatch.chdir(tmp_path)
+    storage = TableStorageManager("rt_tab", mk_table_info(), base_dir=str(tmp_path/"tablas"))
+    rtree = storage.indices["location"]
+    insert_demo_points(storage)  # (0,0), (3,4), (10,10), (-2,1)
+
+    centers = [Point(10, 10), Point(0, 0), Point(100, 100)]
+    by_center = rtree.batch_range_search_radius(centers, 5.0)
+    assert [sorted(r) for r in by_center] == [[3], [1, 2, 4], []]
+
+    # Un radio distinto por punto
+    by_center = rtree.batch_range_search_radius(centers, [1.0, 3.0, 1.0])
+    assert [sorted(r) for r in by_center] == [[3], [1, 4], []]
+    with pytest.raises(ValueError):
+        rtree.batch_range_search_radius(centers, [1.0, 3.0])
+
+    knn = rtree.batch_range_search_knn([Point(9, 9), Point(0, 0)], 2)
+    assert [n for n, _ in knn[0]] == [3, 2]
+    assert [n for n, _ in knn[1]][0] == 1
+    assert knn[1][0][1] == 0.0
+
+    ids = storage.spatial_knn_search_batch("location", [Point(9, 9)], 1)
+    assert ids == [[3]]
+
+    # Un fallo del índice se propaga en lugar de parecer un resultado vacío
+    assert rtree.batch_range_search_knn(centers, 0) == [[], [], []]
+    def broken(*args):
+        raise RuntimeError("índice dañado")
+    monkeypatch.setattr(rtree.rtree_index, "intersection", broken)
+    monkeypatch.setattr(rtree.rtree_index, "nearest", broken)
+    with pytest.raises(RuntimeError):
+        rtree.batch_range_search_radius(centers, 5.0)
+    with pytest.raises(RuntimeError):
+        rtree.batch_range_search_knn(centers, 2)
+
+
+def test_rtree_spatial_join_between_tables(tmp_path, monkeypatch):
+    """Join por distancia entre dos tablas con índice R-Tree."""
+    monkeypatch.chdir(tmp_path)
+    stores = TableStorageManager("stores", mk_table_info(), base_dir=str(tmp_path/"tablas"))
+    places = TableStorageManager("places", mk_table_info(), base_dir=str(tmp_path/"tablas"))
+
+    stores.insert({"id": 1, "location": Point(0, 0), "name": "S1"})
+    stores.insert({"id": 2, "location": Point(10, 10), "name": "S2"})
+    insert_demo_points(places)  # (0,0), (3,4), (10,10), (-2,1)
+
+    pairs = stores.spatial_join("location", places, "location", 3.0)
+    assert [(a, b) for a, b, _ in pairs] == [(1, 1), (1, 4), (2, 3)]
+    assert all(d <= 3.0 for _, _, d in pairs)
+
+    # El resultado no depende de qué lado dirige el join
+    reverse = places.spatial_join("location", stores, "location", 3.0)
+    assert sorted((b, a) for a, b, _ in reverse) == [(1, 1), (1, 4), (2, 3)]
+
+    # Los errores del índice llegan a quien llama en lugar de dar un join vacío
+    def fail(*args):
+        raise RuntimeError("índice dañado")
+    monkeypatch.setattr(places.indices["location"], "batch_range_search_radius", fail)
+    with pytest.raises(RuntimeError):
+        stores.spatial_join("location", places, "location", 3.0)
+
+
+def mk_geo_table_info():
+    info = mk_table_info()
+    info["attributes"][1]["metric"] = "haversine"
+    return info
+
+
+def insert_geo_points(storage):
+    rows = [
+        {"id": 1, "location": Point(60.0, 10.0), "name": "Oslo"},
+        {"id": 2, "location": Point(61.0, 10.0), "name": "N"},        # ~111 km al norte
+        {"id": 3, "location": Point(60.0, 11.6), "name": "E"},        # ~89 km al este
+        {"id": 4, "location": Point(0.0, 179.9), "name": "W180"},
+        {"id": 5, "location": Point(0.0, -179.9), "name": "E180"},
+    ]
+    for r in rows:
+        storage.insert(r)
+
+
+def test_rtree_haversine_radius_and_knn(tmp_path, monkeypatch):
+    """Métrica haversine por índice: radios en km y ensanche en longitud."""
+    monkeypatch.chdir(tmp_path)
+    storage = TableStorageManager("geo_tab", mk_geo_table_info(), base_dir=str(tmp_path/"tablas"))
+    rtree = storage.indices["location"]
+    assert rtree.metric == "haversine"
+    insert_geo_points(storage)
+
+    # A 60° de latitud 1.6° de longitud son ~89 km: el bbox debe ensancharse
+    assert sorted(rtree.range_search_radius(Point(60.0, 10.0), 95.0)) == [1, 3]
+    assert sorted(rtree.range_search_radius(Point(60.0, 10.0), 115.0)) == [1, 2, 3]
+
+    # Cruce del antimeridiano
+    assert sorted(rtree.range_search_radius(Point(0.0, 179.95), 30.0)) == [4, 5]
+
+    # KNN geodésico: el vecino este está más cerca aunque en grados esté más lejos
+    knn = rtree.range_search_knn(Point(60.0, 10.0), 2)
+    assert [n for n, _ in knn] == [1, 3]
+    assert 85.0 < knn[1][1] < 95.0
+
+    # La métrica por consulta tiene prioridad sobre la del índice
+    assert rtree.range_search_knn_simple(Point(60.0, 10.0), 2, metric="euclidean") == [1, 2]
+    assert storage.spatial_radius_search("location", Point(60.0, 10.0), 1.0, "euclidean") == [1, 2]
+
+    batch = rtree.batch_range_search_radius([Point(60.0, 10.0), Point(0.0, 179.95)], 95.0)
+    assert [sorted(r) for r in batch] == [[1, 3], [4, 5]]
@@ -0,0 +1,52 @@
+import threading
+import time
+import pytest
+from estructuras.rwlock import ReadWriteLock
+
+
+def test_readers_share_and_writer_excludes():
+    lock = ReadWriteLock()
+    inside = []
+    both_reading = threading.Barrier(2, timeout=2)
+
+    def reader():
+        with lock.read():
+            both_reading.wait()
+            inside.append('r')
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for t in readers:
+        t.start()
+    for t in readers:
+        t.join()
+    assert inside == ['r', 'r']
+
+    events = []
+
+    def writer_task():
+        with lock.write():
+            events.append('w')
+
+    lock.acquire_read()
+    writer = threading.Thread(target=writer_task)
+    writer.start()
+    time.sleep(0.05)
+    assert events == []
+    lock.release_read()
+    writer.join(1)
+    assert events == ['w']
+
+
+def test_reentrancy_and_upgrade():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    with lock.read():
+        with lock.read():
+            with pytest.raises(RuntimeError):
+                lock.acquire_write()
+    # El lock quedó libre
+    with lock.write():
+        pass
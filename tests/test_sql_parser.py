@@ -0,0 +1,85 @@
+import time
+import pytest
+from sql_parser import (
+    tokenize, parse_where, conjuncts, SQLSyntaxError, MAX_DEPTH,
+    Comparison, Between, InList, SpatialCall, And, Or, Not,
+    IDENT, NUMBER, STRING, PARAM, OP, KEYWORD, EOF
+)
+
+
+def test_tokenize_basic():
+    tokens = tokenize("precio >= -2.5 AND nombre = 'a AND b' AND id = ?1")
+    types = [t.type for t in tokens]
+    assert types == [IDENT, OP, NUMBER, KEYWORD, IDENT, OP, STRING, KEYWORD, IDENT, OP, PARAM, EOF]
+    assert tokens[2].value == '-2.5'
+    assert tokens[6].value == "'a AND b'"
+
+
+def test_tokenize_errors():
+    with pytest.raises(SQLSyntaxError):
+        tokenize("nombre = 'sin cerrar")
+    with pytest.raises(SQLSyntaxError):
+        tokenize("id = ?")
+    with pytest.raises(SQLSyntaxError):
+        tokenize("id = 1 ; DROP")
+
+
+def test_and_conditions_are_flat():
+    tree = parse_where("a = 1 AND (b > 2 AND c <= 3) AND d BETWEEN 1 AND 5")
+    assert isinstance(tree, And)
+    assert [type(c) for c in conjuncts(tree)] == [Comparison, Comparison, Comparison, Between]
+    between = tree.items[3]
+    assert (between.attr, between.low, between.high) == ('d', '1', '5')
+
+
+def test_precedence_or_and_not():
+    tree = parse_where("a = 1 OR b = 2 AND NOT c = 3")
+    assert isinstance(tree, Or)
+    assert isinstance(tree.items[1], And)
+    assert isinstance(tree.items[1].items[1], Not)
+
+    tree = parse_where("(a = 1 OR b = 2) AND c = 3")
+    assert isinstance(tree, And)
+    assert isinstance(tree.items[0], Or)
+
+
+def test_in_and_not_in():
+    tree = parse_where("id IN (1, 2, ?3) AND nombre NOT IN ('x')")
+    in_list, not_in = tree.items
+    assert isinstance(in_list, InList)
+    assert in_list.values == ['1', '2', '?3']
+    assert isinstance(not_in, Not) and not_in.item.values == ["'x'"]
+
+
+def test_spatial_functions():
+    tree = parse_where("RADIUS(ubicacion, '(1, 2)', 3.5) AND KNN(ubicacion, (0, 0), 2, 'haversine')")
+    radius, knn = tree.items
+    assert isinstance(radius, SpatialCall)
+    assert (radius.func, radius.attr, radius.center, radius.param) == ('RADIUS', 'ubicacion', "'(1, 2)'", '3.5')
+    assert knn.center == '(0, 0)' and knn.metric == "'haversine'"
+
+    tree = parse_where("radius(ubicacion, ('(0, 0)', '(5, 5)'), 1)")
+    assert tree.center == ["'(0, 0)'", "'(5, 5)'"]
+
+
+def test_syntax_errors():
+    for clause in ("", "a = ", "a = 1 AND", "a BETWEEN 1 5", "(a = 1", "a = 1)", "a IN ()", "= 1"):
+        with pytest.raises(SQLSyntaxError):
+            parse_where(clause)
+
+
+def test_nesting_limit():
+    parse_where("(" * (MAX_DEPTH - 1) + "a = 1" + ")" * (MAX_DEPTH - 1))
+    with pytest.raises(SQLSyntaxError):
+        parse_where("(" * (MAX_DEPTH + 1) + "a = 1" + ")" * (MAX_DEPTH + 1))
+    with pytest.raises(SQLSyntaxError):
+        parse_where("NOT " * 10000 + "a = 1")
+
+
+def test_long_clause_is_linear():
+    clause = " AND ".join(f"c{i} BETWEEN {i} AND {i + 1}" for i in range(20000))
+    start = time.perf_counter()
+    tree = parse_where(clause)
+    elapsed = time.perf_counter() - start
+    assert len(tree.items) == 20000
+    assert elapsed < 2.0
@@ -1,6 +1,7 @@
 import pytest
 import tempfile
 import os
+import threading
 from pathlib import Path
 from sql import SQLTableManager
 from tabla import TableStorageManager  # Asumiendo que existe
@@ -535,5 +536,486 @@ def test_integration_with_parse_where():
         assert len(rangos) == 2
 
 
+def test_parse_where_rejects_unsupported_conditions():
+    """Las listas de condiciones solo admiten AND; OR y != no se ignoran en silencio"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = SQLTableManager(base_dir=tmp_dir)
+        manager.tables['products'] = {
+            'table_name': 'products',
+            'attributes': [
+                {'name': 'id', 'data_type': 'INT', 'is_key': True, 'index': 'avl'},
+                {'name': 'price', 'data_type': 'DECIMAL', 'is_key': False, 'index': 'hash'}
+            ],
+            'primary_key': 'id'
+        }
+        
+        busquedas, rangos = manager._parse_where_with_ranges("(id = 1) AND price BETWEEN 10 AND 20", 'products')
+        assert busquedas == [['id', 1]]
+        assert rangos == [['price', 10.0, 20.0]]
+        
+        for clause in ("id = 1 OR id = 2", "id != 1", "id = 1 AND AND price = 2"):
+            with pytest.raises(ValueError):
+                manager._parse_where_with_ranges(clause, 'products')
+        
+        # SELECT las acepta como árbol de condición
+        result = manager.parse_sql_select("SELECT * FROM products WHERE id = 1 OR id != 2")
+        assert result['error'] is False
+        assert result['condicion'] == ['OR', [['EQ', 'id', 1], ['NOT', ['EQ', 'id', 2]]]]
+
+
+class TestSpatialBatchSql:
+    """RADIUS/KNN con varios centros y JOIN espacial desde SQL."""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        manager = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas')
+        manager.parse_sql_statement("""
+        CREATE TABLE tiendas (id INT PRIMARY KEY INDEX avl, ubicacion POINT INDEX rtree);
+        CREATE TABLE locales (id INT PRIMARY KEY INDEX avl, ubicacion POINT INDEX rtree);
+        INSERT INTO tiendas VALUES (1, '(0, 0)'), (2, '(10, 10)');
+        INSERT INTO locales VALUES (1, '(1, 1)'), (2, '(9, 9)'), (3, '(50, 50)');
+        """)
+        return manager
+
+    def test_radius_with_multiple_centers(self, manager):
+        result = manager.parse_sql_statement(
+            "SELECT * FROM locales WHERE RADIUS(ubicacion, ('(0, 0)', '(10, 10)'), 2.0);"
+        )
+        op_type, op_result = result[0]
+        assert op_type == "SELECT"
+        centers = op_result['lista_espaciales'][0][2]
+        assert centers == [Point(0, 0), Point(10, 10)]
+        assert sorted(op_result['resultado']['numeros_registro']) == [1, 2]
+
+    def test_spatial_join(self, manager):
+        result = manager.parse_sql_statement(
+            "SELECT tiendas.id, locales.id FROM tiendas JOIN locales "
+            "ON RADIUS(tiendas.ubicacion, locales.ubicacion, 2.0);"
+        )
+        op_type, op_result = result[0]
+        assert op_type == "JOIN"
+        assert op_result['error'] is False
+        assert [(a, b) for a, b, _ in op_result['pares']] == [(1, 1), (2, 2)]
+        assert op_result['requested_columns'] == [('tiendas', 'id'), ('locales', 'id')]
+
+    def test_join_requires_point_columns(self, manager):
+        result = manager.parse_sql_statement(
+            "SELECT * FROM tiendas JOIN locales ON RADIUS(tiendas.id, locales.ubicacion, 2.0);"
+        )
+        assert result[0][1]['error'] is True
+
+    def test_equi_join(self, manager):
+        result = manager.parse_sql_statement(
+            "SELECT locales.id, tiendas.ubicacion FROM tiendas JOIN locales ON locales.id = tiendas.id;"
+        )
+        op_type, op_result = result[0]
+        assert op_type == "JOIN"
+        assert op_result['condition'] == {'type': 'EQUI', 'left_attr': 'id', 'right_attr': 'id'}
+        assert list(op_result['filas']) == [
+            {'locales.id': 1, 'tiendas.ubicacion': Point(0, 0)},
+            {'locales.id': 2, 'tiendas.ubicacion': Point(10, 10)}
+        ]
+
+        result = manager.parse_sql_statement(
+            "SELECT * FROM tiendas JOIN locales ON tiendas.id = locales.ubicacion;"
+        )
+        assert result[0][1]['error'] is True
+
+
+class TestGeoMetricSql:
+    """Métrica haversine declarada en CREATE TABLE y por consulta."""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        manager = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas')
+        manager.parse_sql_statement("""
+        CREATE TABLE ciudades (id INT PRIMARY KEY INDEX avl, ubicacion POINT INDEX rtree METRIC haversine);
+        INSERT INTO ciudades VALUES (1, '(60, 10)'), (2, '(61, 10)'), (3, '(60, 11.6)');
+        """)
+        return manager
+
+    def test_create_table_metric(self, manager):
+        attr = manager.tables['ciudades']['attributes'][1]
+        assert attr['metric'] == 'haversine'
+        assert manager.get_storage_manager('ciudades').indices['ubicacion'].metric == 'haversine'
+
+    def test_radius_in_kilometres(self, manager):
+        result = manager.parse_sql_statement(
+            "SELECT * FROM ciudades WHERE RADIUS(ubicacion, '(60, 10)', 95);"
+        )
+        assert sorted(result[0][1]['resultado']['numeros_registro']) == [1, 3]
+
+    def test_metric_per_query(self, manager):
+        result = manager.parse_sql_statement(
+            "SELECT * FROM ciudades WHERE KNN(ubicacion, '(60, 10)', 2, 'euclidean');"
+        )
+        op_result = result[0][1]
+        assert op_result['lista_espaciales'][0][4] == 'euclidean'
+        assert sorted(op_result['resultado']['numeros_registro']) == [1, 2]
+
+    def test_unknown_metric(self, manager):
+        result = manager.parse_sql_statement(
+            "SELECT * FROM ciudades WHERE RADIUS(ubicacion, '(60, 10)', 95, 'manhattan');"
+        )
+        assert result[0][1]['error'] is True
+
+    def test_grid_cell_size(self, manager):
+        manager.parse_sql_statement(
+            "CREATE TABLE sensores (id INT PRIMARY KEY INDEX avl, lugar POINT INDEX grid METRIC haversine CELL 0.25);"
+        )
+        assert manager.tables['sensores']['attributes'][1]['cell_size'] == 0.25
+        assert manager.get_storage_manager('sensores').indices['lugar'].cell_size == 0.25
+
+
+class TestPreparedStatements:
+    """Parámetros '?', PREPARE/EXECUTE y caché de planes."""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        manager = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas')
+        manager.parse_sql_statement("""
+        CREATE TABLE productos (id INT PRIMARY KEY INDEX avl, nombre VARCHAR[20], precio DECIMAL INDEX btree, ubicacion POINT INDEX rtree);
+        INSERT INTO productos VALUES (1, 'mesa', 50.0, '(0, 0)'), (2, 'silla', 150.0, '(1, 1)'), (3, 'lampara', 250.0, '(10, 10)');
+        """)
+        return manager
+
+    def test_placeholders_bind_values(self, manager):
+        sql = "SELECT * FROM productos WHERE id = ?;"
+        first = manager.execute_sql(sql, [2])[0][1]
+        second = manager.execute_sql(sql, ['3'])[0][1]
+        assert first['resultado']['numeros_registro'] == [2]
+        assert second['lista_busquedas'] == [['id', 3]]
+        assert second['resultado']['numeros_registro'] == [3]
+        assert manager.plan_cache_hits == 1
+
+    def test_strict_comparison_and_spatial_params(self, manager):
+        result = manager.execute_sql(
+            "SELECT * FROM productos WHERE precio > ? AND RADIUS(ubicacion, ?, ?);",
+            [50.0, (0, 0), 2.0]
+        )[0][1]
+        assert result['lista_rangos'][0][1] == 50.01
+        assert result['lista_espaciales'][0][2] == Point(0, 0)
+        assert result['resultado']['numeros_registro'] == [2]
+
+    def test_wrong_param_count(self, manager):
+        result = manager.execute_sql("SELECT * FROM productos WHERE id = ?;")[0][1]
+        assert result['error'] is True
+
+    def test_question_mark_inside_string_is_literal(self, manager):
+        numbered, count = manager._number_placeholders("SELECT * FROM t WHERE a = '?' AND b = ?")
+        assert count == 1
+        assert numbered.endswith("'?' AND b = ?1")
+
+    def test_prepare_and_execute(self, manager):
+        prepared = manager.execute_sql("PREPARE por_precio AS SELECT * FROM productos WHERE precio BETWEEN ? AND ?;")
+        assert prepared[0][0] == "PREPARE"
+        assert prepared[0][1]['param_count'] == 2
+        
+        op_type, result = manager.execute_sql("EXECUTE por_precio (100, 300);")[0]
+        assert op_type == "SELECT"
+        assert sorted(result['resultado']['numeros_registro']) == [2, 3]
+        
+        op_type, result = manager.execute_sql("EXECUTE por_precio USING 0, 100;")[0]
+        assert result['resultado']['numeros_registro'] == [1]
+
+    def test_prepared_delete(self, manager):
+        manager.execute_sql("PREPARE borrar AS DELETE FROM productos WHERE id = ?;")
+        op_type, result = manager.execute_sql("EXECUTE borrar (1);")[0]
+        assert op_type == "DELETE"
+        assert result['count'] == 1
+        assert manager.execute_sql("SELECT * FROM productos WHERE id = 1;")[0][1]['resultado']['numeros_registro'] == []
+
+    def test_execute_unknown_statement(self, manager):
+        result = manager.execute_sql("EXECUTE nada (1);")[0][1]
+        assert result['error'] is True
+
+    def test_plan_cache_is_lru(self, manager):
+        manager.plan_cache_size = 2
+        for record_id in (1, 2, 3):
+            manager.execute_sql(f"SELECT * FROM productos WHERE id = {record_id};")
+        assert list(manager.plan_cache) == [
+            "SELECT * FROM productos WHERE id = 2",
+            "SELECT * FROM productos WHERE id = 3",
+        ]
+        manager.invalidate_plans('productos')
+        assert manager.get_plan_cache_stats()['size'] == 0
+
+
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
+
+
+def test_analyze_statement(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas')
+    manager.parse_sql_statement("""
+    CREATE TABLE productos (id INT PRIMARY KEY INDEX avl, precio DECIMAL INDEX btree);
+    INSERT INTO productos VALUES (1, 50.0), (2, 150.0), (3, 250.0);
+    """)
+
+    op_type, result = manager.execute_sql("ANALYZE productos;")[0]
+    assert op_type == "ANALYZE"
+    assert result['error'] is False
+    assert result['tables']['productos']['row_count'] == 3
+    assert result['tables']['productos']['columns']['precio']['max'] == 250.0
+
+    manager.execute_sql("INSERT INTO productos VALUES (4, 10.0);")
+    storage = manager.get_storage_manager('productos')
+    assert storage._load_statistics()['row_count'] == 4
+
+    assert set(manager.execute_sql("ANALYZE;")[0][1]['tables']) == {'productos'}
+    assert manager.execute_sql("ANALYZE TABLE inexistente;")[0][1]['error'] is True
+
+
+class TestBooleanConditions:
+    """OR, IN y NOT ejecutados con índices y bitmaps de registros."""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        manager = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas')
+        values = ", ".join(f"({i}, 'p{i}', {i * 10}.0, {i % 3})" for i in range(1, 31))
+        manager.parse_sql_statement(f"""
+        CREATE TABLE productos (id INT PRIMARY KEY INDEX avl, nombre VARCHAR[20], precio DECIMAL INDEX avl, tipo INT INDEX btree);
+        INSERT INTO productos VALUES {values};
+        """)
+        return manager
+
+    def _select(self, manager, where, params=None):
+        result = manager.execute_sql(f"SELECT * FROM productos WHERE {where};", params)[0][1]
+        assert result['error'] is False, result
+        return result['resultado']['numeros_registro']
+
+    def test_or_in_not(self, manager):
+        assert self._select(manager, "id = 3 OR precio BETWEEN 250 AND 270") == [3, 25, 26, 27]
+        assert self._select(manager, "id IN (5, 1, 5, 99)") == [1, 5]
+        assert self._select(manager, "tipo = 0 AND NOT id < 25") == [27, 30]
+        assert self._select(manager, "id NOT IN (1, 2) AND id <= 4") == [3, 4]
+        assert self._select(manager, "id != 1 AND (tipo = 1 OR tipo = 2) AND precio <= 50") == [2, 4, 5]
+        assert len(self._select(manager, "NOT tipo = 0")) == 20
+
+    def test_in_uses_one_lookup_per_value(self, manager, monkeypatch):
+        storage = manager.get_storage_manager('productos')
+        index = storage.indices['tipo']
+        calls = []
+        original = index.search
+        monkeypatch.setattr(index, 'search', lambda value: calls.append(value) or original(value))
+        assert len(self._select(manager, "tipo IN (?, ?, 1)", [1, 2])) == 20
+        assert sorted(calls) == [1, 2]
+
+    def test_delete_with_or(self, manager):
+        result = manager.execute_sql("DELETE FROM productos WHERE id IN (1, 2) OR precio >= 290;")[0][1]
+        assert result['count'] == 4
+        assert self._select(manager, "id <= 3 OR id >= 28") == [3, 28]
+
+
+def test_select_order_by_limit_offset(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas')
+    values = ", ".join(f"({i}, {(i * 7) % 10}.0)" for i in range(1, 11))
+    manager.parse_sql_statement(f"""
+    CREATE TABLE productos (id INT PRIMARY KEY INDEX avl, precio DECIMAL INDEX btree);
+    INSERT INTO productos VALUES {values};
+    """)
+
+    info = manager.parse_sql_select("SELECT * FROM productos WHERE id > 2 ORDER BY precio DESC LIMIT 3 OFFSET 1;")
+    assert (info['order_by'], info['descending'], info['limit'], info['offset']) == ('precio', True, 3, 1)
+    assert info['lista_rangos'][0][:2] == ['id', 3]
+
+    result = manager.execute_sql("SELECT * FROM productos ORDER BY precio LIMIT ? OFFSET ?;", [2, 1])[0][1]
+    assert result['resultado']['numeros_registro'] == [3, 6]
+
+    # LIMIT dentro de un string no es un modificador
+    info = manager.parse_sql_select("SELECT * FROM productos WHERE precio = 'x LIMIT 5'")
+    assert info['limit'] is None
+
+    # Valores mal formados o texto sobrante son errores, con o sin WHERE
+    for sql in ("SELECT * FROM productos LIMIT -1", "SELECT * FROM productos WHERE id > 2 LIMIT 1e3;",
+                "SELECT * FROM productos OFFSET -2"):
+        info = manager.parse_sql_select(sql)
+        assert info['error'] is True
+        assert "debe ser un entero no negativo" in info['message']
+    info = manager.parse_sql_select("SELECT * FROM productos WHERE id > 2 LIMIT 3 OFFSET 1 LIMIT 2")
+    assert info['error'] is True
+    result = manager.execute_sql("SELECT * FROM productos LIMIT ?;", [-1])[0][1]
+    assert result['error'] is True
+    assert "LIMIT debe ser un entero no negativo" in result['message']
+
+
+def test_select_aggregates_and_group_by(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas')
+    manager.parse_sql_statement("""
+    CREATE TABLE ventas (id INT PRIMARY KEY INDEX avl, tienda VARCHAR[10], monto DECIMAL INDEX btree);
+    INSERT INTO ventas VALUES (1, 'norte', 10.0), (2, 'sur', 20.0), (3, 'norte', 30.0), (4, 'sur', 5.0), (5, 'este', 1.0);
+    """)
+
+    result = manager.execute_sql("SELECT COUNT(*), MAX(monto) FROM ventas;")[0][1]
+    assert result['columns'] == ['COUNT(*)', 'MAX(monto)']
+    assert result['rows'] == [[5, 30.0]]
+
+    result = manager.execute_sql(
+        "SELECT tienda, SUM(monto), count(*) FROM ventas WHERE id <= 4 GROUP BY tienda ORDER BY tienda DESC LIMIT 2;"
+    )[0][1]
+    assert result['rows'] == [['sur', 25.0, 2], ['norte', 40.0, 2]]
+
+    result = manager.execute_sql("SELECT AVG(monto) FROM ventas WHERE tienda IN ('norte', 'este') OR id = ?;", [2])
+    assert result[0][1]['rows'] == [[61 / 4]]
+
+    assert manager.parse_sql_select("SELECT tienda, COUNT(*) FROM ventas")['error'] is True
+
+
+class TestResultCache:
+    """Caché de resultados invalidada por la versión de escritura de la tabla."""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        manager = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas', result_cache_rows=3)
+        manager.parse_sql_statement("""
+        CREATE TABLE productos (id INT PRIMARY KEY INDEX avl, nombre VARCHAR[20], precio DECIMAL INDEX btree);
+        INSERT INTO productos VALUES (1, 'mesa', 50.0), (2, 'silla', 150.0), (3, 'lampara', 250.0);
+        """)
+        return manager
+
+    def test_repeated_select_hits_cache(self, manager):
+        sql = "SELECT nombre FROM productos WHERE precio >= ?;"
+        first = manager.execute_sql(sql, [100])[0][1]
+        second = manager.execute_sql(sql, [100])[0][1]
+        assert second is first
+        assert sorted(row['nombre'] for row in second['resultado']['registros']) == ['lampara', 'silla']
+        assert manager.get_result_cache_stats()['hits'] == 1
+
+        # Otros parámetros son otra entrada
+        other = manager.execute_sql(sql, [200])[0][1]
+        assert other['resultado']['numeros_registro'] == [3]
+        assert manager.get_result_cache_stats() == {'size': 2, 'rows': 3, 'max_rows': 3, 'hits': 1, 'misses': 2}
+
+    def test_writes_invalidate_results(self, manager):
+        sql = "SELECT COUNT(*) FROM productos;"
+        assert manager.execute_sql(sql)[0][1]['rows'] == [[3]]
+        manager.execute_sql("INSERT INTO productos VALUES (4, 'sofa', 500.0);")
+        assert manager.execute_sql(sql)[0][1]['rows'] == [[4]]
+        manager.execute_sql("DELETE FROM productos WHERE id = 1;")
+        assert manager.execute_sql(sql)[0][1]['rows'] == [[3]]
+        assert manager.result_cache_hits == 0
+
+    def test_cache_is_lru_bounded_by_rows(self, manager):
+        for record_id in (1, 2, 3):
+            manager.execute_sql(f"SELECT * FROM productos WHERE id = {record_id};")
+        # Una entrada de 2 filas desaloja a las 2 más viejas
+        manager.execute_sql("SELECT * FROM productos WHERE precio >= 100;")
+        assert [key[0] for key in manager.result_cache] == [
+            "SELECT * FROM productos WHERE id = 3",
+            "SELECT * FROM productos WHERE precio >= 100",
+        ]
+        assert manager.get_result_cache_stats()['rows'] == 3
+
+        # Un resultado con más filas que toda la caché no se guarda ni se materializa
+        manager.execute_sql("INSERT INTO productos VALUES (4, 'sofa', 500.0);")
+        result = manager.execute_sql("SELECT * FROM productos;")[0][1]
+        assert 'registros' not in result['resultado']
+        assert "SELECT * FROM productos" not in [key[0] for key in manager.result_cache]
+
+        manager.invalidate_results('productos')
+        assert manager.get_result_cache_stats()['size'] == 0
+        assert manager.get_result_cache_stats()['rows'] == 0
+
+    def test_streaming_does_not_store_results(self, manager):
+        sql = "SELECT * FROM productos WHERE id = 1;"
+        result = manager.execute_sql(sql, cache_results=False)[0][1]
+        assert 'registros' not in result['resultado']
+        assert manager.get_result_cache_stats()['size'] == 0
+
+        # Una entrada ya guardada sí se puede servir
+        cached = manager.execute_sql(sql)[0][1]
+        assert manager.execute_sql(sql, cache_results=False)[0][1] is cached
+
+    def test_disabled_by_default(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        manager = SQLTableManager(storage_class=TableStorageManager, base_dir='otras')
+        manager.parse_sql_statement("CREATE TABLE t (id INT PRIMARY KEY INDEX btree); INSERT INTO t VALUES (1);")
+        manager.execute_sql("SELECT * FROM t WHERE id = 1;")
+        assert manager.get_result_cache_stats()['size'] == 0
+        assert manager.get_result_cache_stats()['max_rows'] == 0
+
+
+class TestStatementPipelining:
+    """SELECT consecutivos ejecutados a la vez y tiempos por sentencia."""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        manager = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas', statement_workers=4)
+        manager.parse_sql_statement("""
+        CREATE TABLE productos (id INT PRIMARY KEY INDEX avl, precio DECIMAL INDEX btree);
+        CREATE TABLE tiendas (id INT PRIMARY KEY INDEX avl, nombre VARCHAR[10]);
+        INSERT INTO productos VALUES (1, 50.0), (2, 150.0), (3, 250.0);
+        INSERT INTO tiendas VALUES (1, 'norte'), (2, 'sur');
+        """)
+        yield manager
+        manager.close()
+
+    def test_consecutive_selects_run_on_statement_pool(self, manager, monkeypatch):
+        threads = []
+        original = manager._execute_select
+
+        def recording_select(info):
+            threads.append(threading.current_thread().name)
+            return original(info)
+
+        monkeypatch.setattr(manager, '_execute_select', recording_select)
+        timings = []
+        operations = manager.execute_sql("""
+        SELECT * FROM productos WHERE precio > 100;
+        SELECT * FROM tiendas WHERE id = 2;
+        INSERT INTO tiendas VALUES (3, 'este');
+        SELECT * FROM tiendas WHERE id >= 2;
+        """, timings=timings)
+
+        assert [op_type for op_type, _ in operations] == ["SELECT", "SELECT", "INSERT", "SELECT"]
+        assert sorted(operations[0][1]['resultado']['numeros_registro']) == [2, 3]
+        assert operations[1][1]['resultado']['numeros_registro'] == [2]
+        # El INSERT separa los grupos: el último SELECT ya ve el registro nuevo
+        assert sorted(operations[3][1]['resultado']['numeros_registro']) == [2, 3]
+        assert all(name.startswith('bd2-statement') for name in threads[:2])
+        assert not threads[2].startswith('bd2-statement')
+
+        assert len(timings) == 4
+        assert set(timings[0]) == {'parse', 'plan', 'index', 'fetch', 'execute'}
+        assert timings[0]['index'] > 0 and timings[2]['execute'] > 0
+
+    def test_single_statement_timing_and_serial_mode(self, manager):
+        timings = []
+        manager.execute_sql("SELECT * FROM productos WHERE id = ?;", [1], timings=timings)
+        manager.execute_sql("SELECT * FROM productos WHERE id = ?;", [1], timings=timings)
+        assert len(timings) == 2
+        assert timings[0]['parse'] > 0
+        assert timings[1]['parse'] == 0  # plan tomado de la caché
+
+        manager.statement_workers = 1
+        operations = manager.execute_sql("SELECT * FROM productos WHERE id = 1; SELECT * FROM tiendas WHERE id = 1;")
+        assert [result['table_name'] for _, result in operations] == ['productos', 'tiendas']
+
+    @pytest.mark.parametrize('workers', [4, 1])
+    def test_params_are_split_between_statements(self, manager, workers):
+        manager.statement_workers = workers
+        operations = manager.execute_sql("""
+        SELECT * FROM productos WHERE precio > ?;
+        SELECT * FROM tiendas WHERE nombre = '?';
+        PREPARE por_id AS SELECT * FROM tiendas WHERE id = ?;
+        DELETE FROM productos WHERE id = ?;
+        EXECUTE por_id;
+        SELECT * FROM productos WHERE id BETWEEN ? AND ?;
+        """, [100, 3, 2, 1, 3])
+
+        assert [op_type for op_type, _ in operations] == ["SELECT", "SELECT", "PREPARE", "DELETE", "SELECT", "SELECT"]
+        assert sorted(operations[0][1]['resultado']['numeros_registro']) == [2, 3]
+        # Un '?' entre comillas no es un parámetro
+        assert operations[1][1]['resultado']['numeros_registro'] == []
+        assert operations[3][1]['count'] == 1
+        assert operations[4][1]['resultado']['numeros_registro'] == [2]
+        assert sorted(operations[5][1]['resultado']['numeros_registro']) == [1, 2]
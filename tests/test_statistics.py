@@ -0,0 +1,62 @@
+import random
+import pytest
+from estructuras.statistics import (
+    HyperLogLog, equi_depth_histogram, histogram_add, histogram_range_fraction,
+    spatial_histogram, spatial_histogram_add, spatial_rect_fraction, spatial_radius_fraction
+)
+
+
+def test_hyperloglog_estimates_distinct_values():
+    for n in (10, 1000, 50000):
+        sketch = HyperLogLog()
+        for i in range(n):
+            sketch.add(i)
+            sketch.add(i)
+        assert sketch.count() == pytest.approx(n, rel=0.05)
+
+
+def test_hyperloglog_merge_and_roundtrip():
+    a, b = HyperLogLog(), HyperLogLog()
+    for i in range(3000):
+        a.add(f"v{i}")
+    for i in range(2000, 5000):
+        b.add(f"v{i}")
+    a.merge(b)
+    assert a.count() == pytest.approx(5000, rel=0.05)
+
+    restored = HyperLogLog.from_dict(a.to_dict())
+    assert restored.count() == a.count()
+
+    with pytest.raises(ValueError):
+        a.merge(HyperLogLog(precision=8))
+
+
+def test_equi_depth_histogram_fractions():
+    values = sorted([1] * 900 + list(range(2, 102)))
+    histogram = equi_depth_histogram(values, buckets=10)
+    assert sum(histogram['counts']) == 1000
+    assert histogram['bounds'][0] == 1 and histogram['bounds'][-1] == 101
+    # El valor repetido ocupa la mayoría de los buckets
+    assert histogram_range_fraction(histogram, 1, 1) == pytest.approx(0.9, abs=0.1)
+    assert histogram_range_fraction(histogram, 200, 300) == 0.0
+    assert equi_depth_histogram([]) is None
+
+    histogram_add(histogram, 500)
+    assert histogram['bounds'][-1] == 500
+    assert sum(histogram['counts']) == 1001
+
+
+def test_spatial_histogram_fractions():
+    rng = random.Random(1)
+    xs = [rng.uniform(0, 100) for _ in range(5000)]
+    ys = [rng.uniform(0, 100) for _ in range(5000)]
+    histogram = spatial_histogram(xs, ys)
+    assert sum(histogram['counts']) == 5000
+
+    assert spatial_rect_fraction(histogram, 0, 0, 50, 50) == pytest.approx(0.25, abs=0.03)
+    assert spatial_rect_fraction(histogram, 200, 200, 300, 300) == 0.0
+    assert spatial_radius_fraction(histogram, 50, 50, 10) == pytest.approx(0.0314, abs=0.01)
+
+    spatial_histogram_add(histogram, 1000, 1000)
+    assert sum(histogram['counts']) == 5001
+    assert spatial_histogram([], []) is None
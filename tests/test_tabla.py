@@ -331,4 +331,467 @@ class TestTableStorageManagerAdditional:
         assert result['error'] == False
         assert len(result['numeros_registro']) == 2
         assert 1 in result['numeros_registro']
-        assert 2 in result['numeros_registro']
\ No newline at end of file
+        assert 2 in result['numeros_registro']
+
+class TestQueryPlanner:
+    """Planificador de select: orden por selectividad y verificación por candidato."""
+
+    @pytest.fixture
+    def storage(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        table_info = {
+            'attributes': [
+                {'name': 'id', 'data_type': 'INT', 'is_key': True, 'index': 'avl'},
+                {'name': 'salario', 'data_type': 'DECIMAL', 'index': 'avl'},
+                {'name': 'ubicacion', 'data_type': 'POINT', 'index': 'rtree'}
+            ],
+            'primary_key': 'id'
+        }
+        storage = TableStorageManager("empleados", table_info, 'tablas')
+        for i in range(1, 41):
+            storage.insert({'id': i, 'salario': float(i * 100), 'ubicacion': Point(i, i)})
+        return storage
+
+    def test_selective_predicate_first_and_probe_rest(self, storage, monkeypatch):
+        def no_range(*args):
+            raise AssertionError("el rango poco selectivo no debe recorrer el índice")
+        monkeypatch.setattr(storage.indices['salario'], 'range_search', no_range)
+
+        result = storage.select(lista_busquedas=[['id', 7]],
+                                lista_rangos=[['salario', 0.0, 999999.0]])
+        assert result['numeros_registro'] == [7]
+
+        result = storage.select(lista_busquedas=[['id', 7]],
+                                lista_rangos=[['salario', 800.0, 999999.0]])
+        assert result['numeros_registro'] == []
+
+    def test_plan_uses_index_bounds(self, storage):
+        plan = storage.plan_predicates([
+            {'kind': 'range', 'attr': 'salario', 'min': 0.0, 'max': 999999.0},
+            {'kind': 'range', 'attr': 'id', 'min': 10, 'max': 13},
+        ])
+        assert [p['attr'] for p in plan] == ['id', 'salario']
+        assert plan[0]['access'] == 'index'
+        assert plan[1]['access'] == 'probe'
+        assert plan[1]['estimate'] == pytest.approx(40)
+
+    def test_empty_range_skips_other_predicates(self, storage, monkeypatch):
+        def no_search(*args):
+            raise AssertionError("no debe evaluarse tras un resultado vacío")
+        monkeypatch.setattr(storage.indices['id'], 'search', no_search)
+
+        result = storage.select(lista_busquedas=[['id', 3]],
+                                lista_rangos=[['salario', 10000.0, 20000.0]])
+        assert result['error'] is False
+        assert result['numeros_registro'] == []
+
+    def test_probe_matches_spatial_index(self, storage):
+        espacial = [['RADIUS', 'ubicacion', Point(0, 0), 6.0]]
+        por_indice = storage.select(lista_espaciales=espacial)['numeros_registro']
+        combinado = storage.select(lista_busquedas=[['id', 4]], lista_espaciales=espacial)
+        assert por_indice == [1, 2, 3, 4]
+        assert combinado['numeros_registro'] == [4]
+
+        fuera = storage.select(lista_busquedas=[['id', 5]], lista_espaciales=espacial)
+        assert fuera['numeros_registro'] == []
+
+
+class TestStatistics:
+    """Estadísticas por columna (ANALYZE) y su uso en el planificador."""
+
+    @pytest.fixture
+    def storage(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        table_info = {
+            'attributes': [
+                {'name': 'id', 'data_type': 'INT', 'is_key': True, 'index': 'avl'},
+                {'name': 'depto', 'data_type': 'INT', 'index': 'hash'},
+                {'name': 'salario', 'data_type': 'DECIMAL', 'index': 'avl'},
+                {'name': 'ubicacion', 'data_type': 'POINT', 'index': 'rtree'},
+                {'name': 'nombre', 'data_type': 'VARCHAR[20]'}
+            ],
+            'primary_key': 'id'
+        }
+        storage = TableStorageManager("empleados", table_info, 'tablas')
+        for i in range(1, 201):
+            storage.insert({'id': i, 'depto': i % 4, 'salario': float(i * 10),
+                            'ubicacion': Point(i % 20, i // 20), 'nombre': f"emp{i}"})
+        return storage
+
+    def test_analyze_and_persist(self, storage):
+        assert storage.statistics is None
+        storage.analyze()
+        summary = storage.get_statistics_summary()
+        assert summary['row_count'] == 200
+        assert summary['columns']['depto']['ndv'] == 4
+        assert summary['columns']['id']['ndv'] == pytest.approx(200, rel=0.05)
+        assert summary['columns']['salario']['min'] == 10.0
+        assert summary['columns']['nombre']['max'] == 'emp99'
+        assert summary['columns']['ubicacion']['max'] == [19.0, 10.0]
+        assert summary['columns']['ubicacion']['min'] == [0.0, 0.0]
+        assert sum(storage.statistics['columns']['ubicacion']['grid']['counts']) == 200
+
+        assert os.path.exists(storage.stats_path)
+        assert storage._load_statistics()['row_count'] == 200
+
+    def test_incremental_maintenance(self, storage):
+        storage.analyze()
+        storage.insert({'id': 500, 'depto': 9, 'salario': 99999.0,
+                        'ubicacion': Point(50, 50), 'nombre': 'nuevo'})
+        storage.delete(1)
+        stats = storage.statistics
+        assert stats['row_count'] == 200
+        assert stats['modifications'] == 2
+        assert stats['columns']['salario']['max'] == 99999.0
+        assert stats['columns']['ubicacion']['max'] == [50, 50]
+        # Los sketches se actualizan en memoria y se serializan al guardar
+        assert storage._column_sketches()['depto'].count() == 5
+
+        storage.flush_statistics()
+        persisted = storage._load_statistics()
+        assert persisted['row_count'] == 200
+        assert persisted['columns']['depto']['ndv'] == 5
+
+    def test_planner_uses_statistics(self, storage):
+        predicados = [
+            {'kind': 'exact', 'attr': 'depto', 'value': 1},
+            {'kind': 'range', 'attr': 'salario', 'min': 10.0, 'max': 100.0},
+        ]
+        storage.analyze()
+        plan = storage.plan_predicates(predicados)
+        assert [p['attr'] for p in plan] == ['salario', 'depto']
+        assert plan[0]['estimate'] == pytest.approx(10, abs=3)
+        assert plan[1]['estimate'] == pytest.approx(50)
+
+        result = storage.select(lista_busquedas=[['depto', 1]], lista_rangos=[['salario', 10.0, 100.0]])
+        assert result['numeros_registro'] == [1, 5, 9]
+
+
+class TestOrderAndLimit:
+    """ORDER BY/LIMIT/OFFSET: recorrido del índice en orden o heap acotado."""
+
+    @pytest.fixture
+    def storage(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        table_info = {
+            'attributes': [
+                {'name': 'id', 'data_type': 'INT', 'is_key': True, 'index': 'avl'},
+                {'name': 'precio', 'data_type': 'DECIMAL', 'index': 'btree'},
+                {'name': 'nombre', 'data_type': 'VARCHAR[20]'}
+            ],
+            'primary_key': 'id'
+        }
+        storage = TableStorageManager("productos", table_info, 'tablas')
+        for i in range(1, 51):
+            storage.insert({'id': i, 'precio': float((i * 37) % 50), 'nombre': f"p{i:02d}"})
+        return storage
+
+    def test_limit_without_order(self, storage):
+        result = storage.select(limit=3, offset=2)
+        assert result['numeros_registro'] == [3, 4, 5]
+
+    def test_order_by_index_stops_early(self, storage, monkeypatch):
+        def no_read(*args):
+            raise AssertionError("el recorrido del índice no debe leer registros")
+        monkeypatch.setattr(storage, '_read_record', no_read)
+
+        result = storage.select(order_by='precio', descending=True, limit=3)
+        assert result['numeros_registro'] == [27, 4, 31]
+
+    def test_order_by_without_index_uses_heap(self, storage):
+        result = storage.select(lista_rangos=[['id', 10, 20]], order_by='nombre',
+                                descending=True, limit=4, offset=1)
+        assert result['numeros_registro'] == [19, 18, 17, 16]
+
+        todos = storage.select(lista_rangos=[['precio', 0.0, 4.0]], order_by='precio')
+        assert todos['numeros_registro'] == [50, 23, 46, 19, 42]
+
+    def test_heap_reads_keys_in_batch(self, storage, monkeypatch):
+        def no_read(*args):
+            raise AssertionError("las claves de orden se leen con get_many")
+        monkeypatch.setattr(storage, '_read_record', no_read)
+
+        result = storage.select(lista_rangos=[['id', 10, 20]], order_by='nombre', limit=2)
+        assert result['numeros_registro'] == [10, 11]
+
+    def test_invalid_order(self, storage):
+        assert storage.select(order_by='inexistente')['error'] is True
+        assert storage.select(limit=-1)['error'] is True
+
+
+class TestAggregate:
+    """Agregaciones con hash-aggregate y atajos por metadatos/índices."""
+
+    @pytest.fixture
+    def storage(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        table_info = {
+            'attributes': [
+                {'name': 'id', 'data_type': 'INT', 'is_key': True, 'index': 'avl'},
+                {'name': 'depto', 'data_type': 'VARCHAR[10]'},
+                {'name': 'salario', 'data_type': 'DECIMAL', 'index': 'btree'}
+            ],
+            'primary_key': 'id'
+        }
+        storage = TableStorageManager("empleados", table_info, 'tablas')
+        for i in range(1, 11):
+            storage.insert({'id': i, 'depto': 'a' if i % 2 else 'b', 'salario': float(i * 100)})
+        return storage
+
+    def test_fast_paths(self, storage, monkeypatch):
+        storage.delete_records([3, 10])
+        monkeypatch.setattr(storage, '_scan_columns', None)
+        result = storage.aggregate([['COUNT', '*'], ['MIN', 'salario'], ['MAX', 'salario']])
+        assert result['rows'] == [[8, 100.0, 900.0]]
+
+    def test_group_by(self, storage):
+        result = storage.aggregate([['COUNT', '*'], ['SUM', 'salario'], ['AVG', 'salario'], ['MAX', 'id']],
+                                   group_by=['depto'])
+        assert sorted(result['rows']) == [['a', 5, 2500.0, 500.0, 9], ['b', 5, 3000.0, 600.0, 10]]
+
+    def test_filtered_and_empty(self, storage):
+        result = storage.aggregate([['COUNT', 'id'], ['AVG', 'salario']], record_numbers=[1, 2, 3])
+        assert result['rows'] == [[3, 200.0]]
+        vacio = storage.aggregate([['COUNT', '*'], ['MIN', 'salario']], record_numbers=[])
+        assert vacio['rows'] == [[0, None]]
+        assert storage.aggregate([['SUM', 'depto']])['error'] is True
+
+
+class TestIndexOnlyScan:
+    """Consultas cubiertas por índices: no se leen los registros de la tabla."""
+
+    @pytest.fixture
+    def storage(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        table_info = {
+            'attributes': [
+                {'name': 'id', 'data_type': 'INT', 'is_key': True, 'index': 'avl'},
+                {'name': 'depto', 'data_type': 'INT', 'index': 'hash'},
+                {'name': 'salario', 'data_type': 'DECIMAL', 'index': 'btree'},
+                {'name': 'nombre', 'data_type': 'VARCHAR[20]'}
+            ],
+            'primary_key': 'id'
+        }
+        storage = TableStorageManager("empleados", table_info, 'tablas')
+        for i in range(1, 21):
+            storage.insert({'id': i, 'depto': i % 2, 'salario': float(i * 10), 'nombre': f"e{i}"})
+
+        def no_read(*args):
+            raise AssertionError("la consulta cubierta no debe leer registros")
+        monkeypatch.setattr(storage, '_read_record', no_read)
+        return storage
+
+    def test_equality_covers_columns(self, storage):
+        result = storage.select(lista_busquedas=[['id', 7]], requested_attributes=['id'])
+        assert result['numeros_registro'] == [7]
+        assert result['registros'] == [{'id': 7}]
+
+    def test_range_values_come_from_index(self, storage):
+        result = storage.select(lista_busquedas=[['depto', 1]], lista_rangos=[['salario', 50.0, 90.0]],
+                                requested_attributes=['salario', 'depto'])
+        assert result['numeros_registro'] == [5, 7, 9]
+        assert result['registros'] == [{'salario': 50.0, 'depto': 1}, {'salario': 70.0, 'depto': 1},
+                                       {'salario': 90.0, 'depto': 1}]
+
+    def test_uncovered_column_is_not_index_only(self, storage):
+        assert storage._select_index_only([['id', 3]], [], ['id', 'nombre']) is None
+        assert storage._select_index_only([], [['id', 1, 3], ['salario', 1.0, 50.0]], ['id', 'salario']) is None
+
+
+class TestGetMany:
+    """Lectura en bloque de registros con lecturas secuenciales agrupadas."""
+
+    @pytest.fixture
+    def storage(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        table_info = {
+            'attributes': [
+                {'name': 'id', 'data_type': 'INT', 'is_key': True, 'index': 'avl'},
+                {'name': 'nombre', 'data_type': 'VARCHAR[10]'},
+                {'name': 'ubicacion', 'data_type': 'POINT'}
+            ],
+            'primary_key': 'id'
+        }
+        storage = TableStorageManager("lugares", table_info, 'tablas')
+        for i in range(1, 101):
+            storage.insert({'id': i, 'nombre': f"l{i}", 'ubicacion': Point(i, -i)})
+        storage.delete(50)
+        return storage
+
+    def test_rows_keep_order_and_match_get(self, storage):
+        numeros = [90, 3, 50, 4, 1000, 2]
+        rows = storage.get_many(numeros)
+        assert rows[2] is None and rows[4] is None
+        for record_num, row in zip(numeros, rows):
+            if row is not None:
+                assert row == storage.get(record_num)
+
+        assert storage.get_many([7, 5], ['nombre']) == [{'nombre': 'l7'}, {'nombre': 'l5'}]
+
+    def test_columnar_and_coalesced_reads(self, storage, monkeypatch):
+        monkeypatch.setattr(TableStorageManager, 'MAX_READ_GAP', 2)
+        reads = []
+        original_open = open
+
+        def counting_open(path, mode='r', *args, **kwargs):
+            handle = original_open(path, mode, *args, **kwargs)
+            if str(path).endswith('lugares.bin'):
+                original_read = handle.read
+                handle.read = lambda *a: reads.append(a) or original_read(*a)
+            return handle
+        monkeypatch.setattr('builtins.open', counting_open)
+
+        result = storage.get_many(list(range(1, 41)) + [45, 46, 80], ['id', 'ubicacion'], columnar=True)
+        assert result['numeros_registro'][-3:] == [45, 46, 80]
+        assert result['columnas']['ubicacion'][0] == Point(1, -1)
+        assert len(reads) == 3
+
+
+class TestEquiJoin:
+    """JOIN por igualdad: hash join e index nested-loop join."""
+
+    @pytest.fixture
+    def storages(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        clientes = TableStorageManager("clientes", {
+            'attributes': [
+                {'name': 'id', 'data_type': 'INT', 'is_key': True, 'index': 'avl'},
+                {'name': 'nombre', 'data_type': 'VARCHAR[10]'}
+            ],
+            'primary_key': 'id'
+        }, 'tablas')
+        pedidos = TableStorageManager("pedidos", {
+            'attributes': [
+                {'name': 'id', 'data_type': 'INT', 'is_key': True},
+                {'name': 'cliente', 'data_type': 'INT', 'index': 'btree'},
+                {'name': 'total', 'data_type': 'DECIMAL'}
+            ],
+            'primary_key': 'id'
+        }, 'tablas')
+        for i in range(1, 6):
+            clientes.insert({'id': i, 'nombre': f"c{i}"})
+        for i in range(1, 61):
+            pedidos.insert({'id': i, 'cliente': i % 7, 'total': float(i)})
+        return clientes, pedidos
+
+    @staticmethod
+    def _expected(clientes, pedidos):
+        return sorted((c, p) for c in range(1, 6) for p in range(1, 61) if p % 7 == c)
+
+    def test_index_nested_loop_join(self, storages):
+        clientes, pedidos = storages
+        strategy, pares = clientes.equi_join('id', pedidos, 'cliente', ['nombre'], ['total'])
+        assert strategy == 'index_nested_loop'
+        pares = list(pares)
+        assert sorted((a, b) for a, b, _, _ in pares) == self._expected(clientes, pedidos)
+        for left_num, right_num, left_row, right_row in pares:
+            assert left_row == {'nombre': f"c{left_num}"}
+            assert right_row == {'total': float(right_num)}
+
+        # El lado con índice puede ser el izquierdo
+        strategy, pares = pedidos.equi_join('cliente', clientes, 'id')
+        assert strategy == 'index_nested_loop'
+        assert sorted((b, a) for a, b, _, _ in pares) == self._expected(clientes, pedidos)
+
+    def test_hash_join_builds_on_smaller_side(self, storages, monkeypatch):
+        clientes, pedidos = storages
+        monkeypatch.setattr(TableStorageManager, 'INDEX_LOOKUP_COST', 1000)
+        pedidos.delete(8)
+        strategy, pares = pedidos.equi_join('cliente', clientes, 'id', ['id'], ['nombre'])
+        assert strategy == 'hash'
+        pares = list(pares)
+        expected = sorted((p, c) for c, p in self._expected(clientes, pedidos) if p != 8)
+        assert sorted((a, b) for a, b, _, _ in pares) == expected
+        assert all(left['id'] % 7 == int(right['nombre'][1:]) for _, _, left, right in pares)
+
+    @pytest.mark.parametrize('lookup_cost', [8, 1000])
+    def test_suspended_join_does_not_hold_locks(self, storages, monkeypatch, lookup_cost):
+        import threading
+        clientes, pedidos = storages
+        monkeypatch.setattr(TableStorageManager, 'INDEX_LOOKUP_COST', lookup_cost)
+        _, pares = clientes.equi_join('id', pedidos, 'cliente')
+        next(pares)
+
+        # Con el join a medio consumir, otro hilo puede escribir en ambas tablas
+        writer = threading.Thread(target=lambda: (clientes.insert({'id': 9, 'nombre': 'c9'}),
+                                                  pedidos.insert({'id': 99, 'cliente': 9, 'total': 1.0})))
+        writer.start()
+        writer.join(5)
+        assert not writer.is_alive()
+        pares.close()
+
+
+class TestConcurrency:
+    """Lecturas y escrituras concurrentes sobre la misma tabla."""
+
+    def test_concurrent_inserts_and_selects(self, tmp_path, monkeypatch):
+        import threading
+        monkeypatch.chdir(tmp_path)
+        storage = TableStorageManager("items", {
+            'attributes': [
+                {'name': 'id', 'data_type': 'INT', 'is_key': True, 'index': 'avl'},
+                {'name': 'grupo', 'data_type': 'INT', 'index': 'btree'}
+            ],
+            'primary_key': 'id'
+        }, 'tablas')
+        errors = []
+
+        def writer(start):
+            try:
+                for i in range(start, start + 50):
+                    storage.insert({'id': i, 'grupo': i % 5})
+            except Exception as e:
+                errors.append(e)
+
+        def reader():
+            try:
+                for _ in range(30):
+                    result = storage.select(lista_rangos=[['grupo', 0, 4]])
+                    assert not result.get('error')
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(start,)) for start in (1, 101, 201)]
+        threads += [threading.Thread(target=reader) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert storage.count_live_records() == 150
+        assert len(storage.select(lista_rangos=[['id', 1, 300]])['numeros_registro']) == 150
+        assert len(storage.select(lista_busquedas=[['grupo', 3]])['numeros_registro']) == 30
+
+
+class TestTableMetadata:
+    """Contadores de registros y muestras sin recorrer la tabla."""
+
+    def test_counters_and_sample(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        table_info = {
+            'attributes': [
+                {'name': 'id', 'data_type': 'INT', 'is_key': True, 'index': 'avl'},
+                {'name': 'nombre', 'data_type': 'VARCHAR[10]', 'index': 'hash'}
+            ],
+            'primary_key': 'id'
+        }
+        storage = TableStorageManager("personas", table_info, 'tablas')
+        for i in range(1, 21):
+            storage.insert({'id': i, 'nombre': f"p{i}"})
+        storage.delete_records([1, 2, 5])
+        storage.insert({'id': 21, 'nombre': 'p21'})
+
+        metadata = storage.get_metadata()
+        assert metadata['active_records'] == 18 == storage.count_live_records()
+        assert metadata['total_records'] == 20
+        assert metadata['indexes']['id']['type'] == 'avl'
+        assert metadata['indexes']['nombre']['size_bytes'] > 0
+
+        # Al reabrir la tabla el contador se reconstruye desde la lista libre
+        assert TableStorageManager("personas", table_info, 'tablas').live_records == 18
+
+        # El id 21 reutiliza el último espacio liberado (el del id 5)
+        assert storage.sample_records(3) == [
+            {'id': 3, 'nombre': 'p3'}, {'id': 4, 'nombre': 'p4'}, {'id': 21, 'nombre': 'p21'}
+        ]
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import pytest
+import wire_server
+from sql import SQLTableManager
+from tabla import TableStorageManager
+from wire_server import WireServer, WireClient, WireError, FRAME_HEADER, FRAME_ERROR
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = SQLTableManager(storage_class=TableStorageManager, base_dir='tablas', result_cache_rows=64)
+    manager.parse_sql_statement("""
+    CREATE TABLE productos (id INT PRIMARY KEY INDEX hash, nombre VARCHAR[20], precio DECIMAL INDEX btree, ubicacion POINT);
+    INSERT INTO productos VALUES (1, 'mesa', 50.0, '(0, 0)'), (2, 'silla', 150.0, '(1, 1)'), (3, 'lampara', 250.0, '(2, 3)');
+    """)
+    return manager
+
+
+@pytest.fixture
+def server(manager, tmp_path):
+    """Servidor en un event loop propio; retorna un constructor de clientes (TCP o Unix)."""
+    loop = asyncio.new_event_loop()
+    tcp = WireServer(manager, workers=2)
+    unix = WireServer(manager, workers=2)
+    socket_path = str(tmp_path / 'bd2.sock')
+    port = loop.run_until_complete(tcp.start('127.0.0.1', 0)).sockets[0].getsockname()[1]
+    loop.run_until_complete(unix.start(path=socket_path))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    def connect(unix_socket=False):
+        if unix_socket:
+            return WireClient(path=socket_path, timeout=5)
+        return WireClient('127.0.0.1', port, timeout=5)
+
+    yield connect
+    for wire in (tcp, unix):
+        asyncio.run_coroutine_threadsafe(wire.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def test_prepared_point_lookups_pipelined(server):
+    with server() as client:
+        statement_id = client.prepare("SELECT nombre, ubicacion FROM productos WHERE id = ?")
+        assert client.execute(statement_id, [2]) == {
+            'operation': 'SELECT', 'columns': ['nombre', 'ubicacion'], 'rows': [['silla', [1.0, 1.0]]]
+        }
+
+        results = client.execute_many(statement_id, [[record_id % 4] for record_id in range(600)])
+        assert len(results) == 600
+        assert [result['rows'] for result in results[:4]] == [[], [['mesa', [0.0, 0.0]]], [['silla', [1.0, 1.0]]],
+                                                               [['lampara', [2.0, 3.0]]]]
+
+        # Una ejecución con parámetros de más falla sola, sin cortar el resto del lote
+        results = client.execute_many(statement_id, [[1], [1, 2], [3]])
+        assert isinstance(results[1], WireError)
+        assert results[2]['rows'] == [['lampara', [2.0, 3.0]]]
+
+        client.close_statement(statement_id)
+        with pytest.raises(WireError):
+            client.execute(statement_id, [1])
+
+
+def test_prepared_delete_and_query(server, manager):
+    with server(unix_socket=True) as client:
+        statement_id = client.prepare("DELETE FROM productos WHERE precio >= ?;")
+        assert client.execute(statement_id, [200]) == {'operation': 'DELETE', 'records_deleted': 1}
+
+        results = client.query("""
+        INSERT INTO productos VALUES (4, 'sofa', 500.0, '(5, 5)');
+        SELECT * FROM productos WHERE precio > 100;
+        SELECT COUNT(*) FROM productos;
+        """)
+        # El registro nuevo reutiliza el espacio que dejó el DELETE
+        assert results[0] == {'operation': 'INSERT', 'records_inserted': 1, 'inserted_ids': [3]}
+        assert results[1]['columns'] == ['id', 'nombre', 'precio', 'ubicacion']
+        assert sorted(results[1]['rows']) == [[2, 'silla', 150.0, [1.0, 1.0]], [4, 'sofa', 500.0, [5.0, 5.0]]]
+        assert results[2]['rows'] == [[3]]
+
+        with pytest.raises(WireError):
+            client.prepare("INSERT INTO productos VALUES (5, 'x', 1.0, '(0, 0)')")
+        assert client.query("SELECT * FROM otra;")[0]['error'] is True
+
+    assert manager.get_storage_manager('productos').live_records == 3
+
+
+def test_invalid_frames(server, monkeypatch):
+    with server() as client:
+        with pytest.raises(WireError, match="desconocido"):
+            client._call(ord('Z'), b'')
+
+    monkeypatch.setattr(wire_server, 'MAX_FRAME_SIZE', 8)
+    with server() as client:
+        client.sock.sendall(FRAME_HEADER.pack(1024, ord('Q'), 9))
+        length, frame_type, request_id = FRAME_HEADER.unpack(client.file.read(FRAME_HEADER.size))
+        assert (frame_type, request_id) == (FRAME_ERROR, 9)
+        client.file.read(length)
+        # Después de un frame inválido el servidor cierra la conexión
+        assert client.file.read(1) == b''
+
+
+def test_joins_are_encoded_as_rows(server):
+    with server() as client:
+        client.query("""
+        CREATE TABLE tiendas (id INT PRIMARY KEY INDEX btree, producto INT INDEX btree, ubicacion POINT INDEX rtree);
+        CREATE TABLE zonas (id INT PRIMARY KEY INDEX btree, centro POINT INDEX rtree);
+        INSERT INTO tiendas VALUES (10, 1, '(0, 0)'), (20, 3, '(2, 2)');
+        INSERT INTO zonas VALUES (1, '(0, 1)'), (2, '(5, 5)');
+        """)
+        equi, spatial = client.query("""
+        SELECT tiendas.id, productos.nombre FROM tiendas JOIN productos ON tiendas.producto = productos.id;
+        SELECT tiendas.id, zonas.id FROM tiendas JOIN zonas ON RADIUS(tiendas.ubicacion, zonas.centro, 1.5);
+        """)
+        assert equi['columns'] == ['tiendas.id', 'productos.nombre']
+        assert sorted(equi['rows']) == [[10, 'mesa'], [20, 'lampara']]
+        assert spatial['columns'] == ['tiendas.id', 'zonas.id', 'distance']
+        assert spatial['rows'] == [[10, 1, 1.0]]
+
+
+def test_prepared_statement_follows_schema_changes(server, manager, monkeypatch):
+    prepared = []
+    prepare_statement = manager.prepare_statement
+    monkeypatch.setattr(manager, 'prepare_statement', lambda sql: prepared.append(sql) or prepare_statement(sql))
+
+    with server() as client:
+        statement_id = client.prepare("SELECT nombre FROM productos WHERE id = ?")
+        assert client.execute(statement_id, [1])['rows'] == [['mesa']]
+        assert len(prepared) == 1
+
+        # Un CREATE TABLE cambia el catálogo: el plan viejo se descarta y se vuelve a preparar
+        client.query("CREATE TABLE otra (id INT PRIMARY KEY INDEX btree);")
+        assert client.execute(statement_id, [1])['rows'] == [['mesa']]
+        assert client.execute(statement_id, [2])['rows'] == [['silla']]
+        assert len(prepared) == 2
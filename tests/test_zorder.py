@@ -0,0 +1,44 @@
+import random
+from estructuras.point_class import Point
+from estructuras.zorder import (
+    ordered_bits, cell, morton, spatial_key, spatial_hash, zorder_ranges
+)
+
+
+def test_ordered_bits_preserves_order():
+    values = [-1e300, -10.5, -1.0, -1e-300, 0.0, -0.0, 1e-300, 0.5, 1.0, 3.25, 1e300]
+    ordered = sorted(values)
+    assert [ordered_bits(v) for v in ordered] == sorted(ordered_bits(v) for v in values)
+    assert ordered_bits(-0.0) == ordered_bits(0.0)
+    assert cell(1.0) <= cell(1.5) <= cell(2.0)
+
+
+def test_morton_groups_neighbours():
+    assert morton(Point(0, 0)) < morton(Point(1, 1)) < morton(Point(2, 2))
+    # Puntos muy cercanos comparten celda; la clave desempata por (x, y)
+    a, b = Point(1.0, 2.0), Point(1.0, 2.0 + 1e-12)
+    assert morton(a) == morton(b)
+    assert spatial_key(a) < spatial_key(b)
+
+
+def test_zorder_ranges_cover_rectangle():
+    rng = random.Random(7)
+    points = [Point(rng.uniform(-50, 50), rng.uniform(-50, 50)) for _ in range(2000)]
+    for min_p, max_p in [(Point(-5, -5), Point(5, 5)), (Point(10, -40), Point(12, 40)),
+                         (Point(-50, 0), Point(50, 0.5))]:
+        ranges = zorder_ranges(min_p, max_p)
+        assert 0 < len(ranges) <= 32
+        assert all(lo <= hi for lo, hi in ranges)
+        assert all(a[1] < b[0] for a, b in zip(ranges, ranges[1:]))
+        for p in points:
+            if p.is_in_range(min_p, max_p):
+                z = morton(p)
+                assert any(lo <= z <= hi for lo, hi in ranges)
+
+    assert zorder_ranges(Point(5, 5), Point(0, 0)) == []
+
+
+def test_spatial_hash_spreads_integer_points():
+    buckets = {spatial_hash(Point(x, y), 5) for x in range(8) for y in range(8)}
+    assert len(buckets) > 16
+    assert all(0 <= b < 32 for b in buckets)
@@ -0,0 +1,456 @@
+import os
+import json
+import struct
+import socket
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from estructuras.point_class import Point
+from sql import SQLTableManager
+from tabla import TableStorageManager
+
+# orjson es opcional: si no está instalado se usa json de la biblioteca estándar
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Frame: largo del payload (uint32), tipo (1 byte), id de la petición (uint32) y payload
+FRAME_HEADER = struct.Struct('>IBI')
+STATEMENT_ID = struct.Struct('>I')
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+# Frames del cliente
+FRAME_QUERY = ord('Q')      # JSON {"sql": ..., "params": [...]}
+FRAME_PREPARE = ord('P')    # SQL en UTF-8
+FRAME_EXECUTE = ord('E')    # id de la sentencia (uint32) + JSON con la lista de parámetros
+FRAME_CLOSE = ord('C')      # id de la sentencia (uint32)
+# Frames del servidor
+FRAME_RESULT = ord('R')     # JSON con el resultado
+FRAME_ERROR = ord('X')      # JSON {"message": ...}
+
+# Peticiones de una conexión que se ejecutan juntas en un solo paso por el pool,
+# y peticiones leídas que pueden esperar antes de dejar de leer el socket
+PIPELINE_BATCH = 256
+PIPELINE_QUEUE_SIZE = 1024
+
+WIRE_HOST = os.environ.get('BD2_WIRE_HOST', '127.0.0.1')
+WIRE_PORT = int(os.environ.get('BD2_WIRE_PORT', '5480'))
+# Si se define, se escucha en este socket Unix en lugar de TCP
+WIRE_SOCKET = os.environ.get('BD2_WIRE_SOCKET')
+WIRE_WORKERS = int(os.environ.get('BD2_WIRE_WORKERS', '4'))
+
+
+def _default(obj):
+    """POINT como [x, y]; el resto de los tipos no JSON como texto."""
+    if isinstance(obj, Point):
+        return [obj.x, obj.y]
+    return str(obj)
+
+
+def dumps(obj):
+    """Codifica a JSON (bytes) con orjson si está disponible."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    """Decodifica un payload JSON."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_frame(frame_type, request_id, payload=b''):
+    """Arma un frame con su encabezado."""
+    return FRAME_HEADER.pack(len(payload), frame_type, request_id) + payload
+
+
+class WireError(Exception):
+    """Error informado por el servidor en un frame de error."""
+
+
+class WireSession:
+    """Estado de una conexión: (SQL, plan) de cada sentencia preparada por id."""
+
+    def __init__(self):
+        self.statements = {}
+        self.next_statement_id = 1
+
+
+class WireServer:
+    """
+    Servidor binario persistente sobre SQLTableManager.
+
+    Cada conexión manda frames con un id de petición y puede mandar varios sin
+    esperar las respuestas (pipelining). Las peticiones de una conexión se
+    ejecutan en orden, pero las que ya llegaron se agrupan y pasan juntas por el
+    pool de hilos, así una ráfaga de consultas puntuales no paga un salto de
+    hilo por consulta. Las respuestas salen en el mismo orden que las peticiones.
+    """
+
+    def __init__(self, sql_manager, workers=WIRE_WORKERS):
+        self.sql_manager = sql_manager
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bd2-wire')
+        self.server = None
+
+    async def start(self, host=WIRE_HOST, port=WIRE_PORT, path=None):
+        """
+        Empieza a aceptar conexiones.
+
+        Args:
+            host (str): Dirección TCP
+            port (int): Puerto TCP (0 elige uno libre)
+            path (str, optional): Socket Unix; si se indica no se usa TCP
+
+        Returns:
+            asyncio.Server: El servidor en escucha
+        """
+        if path:
+            self.server = await asyncio.start_unix_server(self._handle_connection, path=path)
+        else:
+            self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server
+
+    async def close(self):
+        """Deja de aceptar conexiones y espera a las peticiones en curso."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        self.executor.shutdown(wait=True)
+
+    async def _handle_connection(self, reader, writer):
+        session = WireSession()
+        queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        processor = asyncio.create_task(self._process_frames(session, queue, writer))
+        try:
+            while True:
+                frame = await self._read_frame(reader)
+                if frame is None:
+                    break
+                await queue.put(frame)
+                if frame[0] is None:
+                    # Frame inválido: no se puede seguir leyendo el stream
+                    break
+        finally:
+            await queue.put(None)
+            await processor
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_frame(self, reader):
+        """
+        Lee un frame del cliente.
+
+        Returns:
+            tuple: (tipo, id de la petición, payload), (None, id, mensaje) si el
+                   frame no es válido, o None si el cliente cerró la conexión
+        """
+        try:
+            header = await reader.readexactly(FRAME_HEADER.size)
+            length, frame_type, request_id = FRAME_HEADER.unpack(header)
+            if length > MAX_FRAME_SIZE:
+                return None, request_id, f"El frame de {length} bytes supera el máximo ({MAX_FRAME_SIZE})"
+            return frame_type, request_id, await reader.readexactly(length)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+
+    async def _process_frames(self, session, queue, writer):
+        loop = asyncio.get_running_loop()
+        connected = True
+        finished = False
+        while not finished:
+            batch = []
+            item = await queue.get()
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= PIPELINE_BATCH or queue.empty():
+                    break
+                item = queue.get_nowait()
+            finished = item is None
+
+            if not batch or not connected:
+                continue
+            replies = await loop.run_in_executor(self.executor, self.handle_batch, session, batch)
+            try:
+                writer.write(b''.join(replies))
+                await writer.drain()
+            except ConnectionError:
+                # El cliente se fue: se siguen consumiendo los frames ya leídos sin ejecutarlos
+                connected = False
+
+    def handle_batch(self, session, frames):
+        """Ejecuta en orden los frames de un lote (en un hilo del pool) y retorna las respuestas."""
+        return [self.handle_frame(session, *frame) for frame in frames]
+
+    def handle_frame(self, session, frame_type, request_id, payload):
+        """
+        Ejecuta un frame y arma su respuesta.
+
+        Returns:
+            bytes: Frame de resultado o de error con el mismo id de petición
+        """
+        try:
+            if frame_type == FRAME_EXECUTE:
+                result = self._execute(session, payload)
+            elif frame_type == FRAME_QUERY:
+                result = self._query(payload)
+            elif frame_type == FRAME_PREPARE:
+                result = self._prepare(session, payload)
+            elif frame_type == FRAME_CLOSE:
+                result = self._close_statement(session, payload)
+            elif frame_type is None:
+                result = {'error': True, 'message': payload}
+            else:
+                result = {'error': True, 'message': f"Tipo de frame desconocido: {frame_type}"}
+        except (ValueError, TypeError, struct.error) as e:
+            result = {'error': True, 'message': f"Petición inválida: {str(e)}"}
+        except Exception as e:
+            print(f"Error en el servidor binario: {str(e)}")
+            result = {'error': True, 'message': f"Error interno: {str(e)}"}
+
+        if result.get('error', False):
+            return encode_frame(FRAME_ERROR, request_id, dumps({'message': result.get('message', '')}))
+        return encode_frame(FRAME_RESULT, request_id, dumps(result))
+
+    def _statement_id(self, payload):
+        if len(payload) < STATEMENT_ID.size:
+            raise ValueError("Falta el id de la sentencia")
+        return STATEMENT_ID.unpack_from(payload)[0]
+
+    def _prepare(self, session, payload):
+        sql = payload.decode('utf-8')
+        plan = self.sql_manager.prepare_statement(sql)
+        if plan.get('error', False):
+            return plan
+
+        statement_id = session.next_statement_id
+        session.next_statement_id += 1
+        session.statements[statement_id] = (sql, plan)
+        return {
+            'statement_id': statement_id,
+            'operation': plan['op_type'],
+            'param_count': plan['param_count']
+        }
+
+    def _execute(self, session, payload):
+        statement_id = self._statement_id(payload)
+        statement = session.statements.get(statement_id)
+        if statement is None:
+            return {'error': True, 'message': f"La sentencia {statement_id} no existe"}
+
+        sql, plan = statement
+        if not self.sql_manager.is_plan_current(plan):
+            # Una tabla cambió de esquema desde el PREPARE: se vuelve a preparar
+            plan = self.sql_manager.prepare_statement(sql)
+            if plan.get('error', False):
+                return plan
+            session.statements[statement_id] = (sql, plan)
+
+        params = loads(payload[STATEMENT_ID.size:]) if len(payload) > STATEMENT_ID.size else []
+        if not isinstance(params, list):
+            raise ValueError("Los parámetros deben ser una lista JSON")
+        return self.encode_operation(plan['op_type'], self.sql_manager.execute_prepared(plan, params))
+
+    def _close_statement(self, session, payload):
+        statement_id = self._statement_id(payload)
+        if session.statements.pop(statement_id, None) is None:
+            return {'error': True, 'message': f"La sentencia {statement_id} no existe"}
+        return {'closed': statement_id}
+
+    def _query(self, payload):
+        request = loads(payload)
+        if not isinstance(request, dict) or not isinstance(request.get('sql'), str):
+            raise ValueError("Se esperaba {\"sql\": ..., \"params\": [...]}")
+
+        operations = self.sql_manager.execute_sql(request['sql'], request.get('params'))
+        return {'results': [self.encode_operation(op_type, result) for op_type, result in operations]}
+
+    def encode_operation(self, op_type, result):
+        """
+        Resultado de una operación en forma compacta: los SELECT como columnas
+        y filas (listas de valores), el resto como un resumen.
+        """
+        if not isinstance(result, dict):
+            # CREATE retorna el nombre de la tabla
+            return {'operation': op_type, 'table': result}
+        if result.get('error', False):
+            return {'operation': op_type, 'error': True, 'message': result.get('message', '')}
+
+        if op_type == "SELECT":
+            if result.get('aggregate'):
+                return {'operation': "SELECT", 'columns': result['columns'], 'rows': result['rows']}
+            return self._encode_select(result)
+        if op_type == "DELETE":
+            return {'operation': "DELETE", 'records_deleted': result.get('count', 0)}
+        if op_type == "INSERT":
+            return {
+                'operation': "INSERT",
+                'records_inserted': len(result.get('records', [])),
+                'inserted_ids': result.get('inserted_ids', [])
+            }
+        if op_type == "JOIN":
+            return self._encode_join(result)
+        return {'operation': op_type, 'message': result.get('message', '')}
+
+    def _encode_select(self, result):
+        resultado = result['resultado']
+        if resultado.get('error', False):
+            return {'operation': "SELECT", 'error': True, 'message': resultado.get('message', '')}
+
+        storage_manager = self.sql_manager.get_storage_manager(result['table_name'])
+        requested_attributes = resultado.get('requested_attributes')
+        columns = requested_attributes or [attr['name'] for attr in storage_manager.table_info['attributes']]
+
+        registros = resultado.get('registros')
+        if registros is None:
+            # Lectura en bloque solo de las columnas pedidas
+            registros = [
+                record for record in storage_manager.get_many(resultado['numeros_registro'], requested_attributes)
+                if record
+            ]
+        return {
+            'operation': "SELECT",
+            'columns': columns,
+            'rows': [[record.get(column) for column in columns] for record in registros]
+        }
+
+
+    def _encode_join(self, result):
+        columns = [f"{table_name}.{attr_name}" for table_name, attr_name in result['requested_columns']]
+        if 'pares' in result:
+            columns.append('distance')
+        try:
+            records = self.sql_manager.join_records(result)
+        finally:
+            if 'filas' in result:
+                # Libera el generador del join aunque falle la lectura
+                result['filas'].close()
+        return {
+            'operation': "JOIN",
+            'columns': columns,
+            'rows': [[record.get(column) for column in columns] for record in records]
+        }
+
+
+class WireClient:
+    """
+    Cliente síncrono del protocolo binario.
+
+    execute_many manda las ejecuciones en lotes sin esperar cada respuesta
+    (pipelining); los demás métodos esperan la respuesta de su petición.
+    """
+
+    def __init__(self, host=WIRE_HOST, port=WIRE_PORT, path=None, timeout=None):
+        if path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(path)
+        else:
+            self.sock = socket.create_connection((host, port))
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(timeout)
+        self.file = self.sock.makefile('rb')
+        self.next_request_id = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def _frame(self, frame_type, payload):
+        request_id = self.next_request_id
+        self.next_request_id = (request_id + 1) & 0xFFFFFFFF
+        return request_id, encode_frame(frame_type, request_id, payload)
+
+    def _receive(self, request_id):
+        """Lee la respuesta a request_id; retorna el resultado o un WireError."""
+        header = self.file.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            raise ConnectionError("El servidor cerró la conexión")
+        length, frame_type, reply_id = FRAME_HEADER.unpack(header)
+        body = loads(self.file.read(length))
+        if reply_id != request_id:
+            raise ConnectionError(f"Se esperaba la respuesta {request_id} y llegó la {reply_id}")
+        if frame_type == FRAME_ERROR:
+            return WireError(body['message'])
+        return body
+
+    def _call(self, frame_type, payload):
+        request_id, frame = self._frame(frame_type, payload)
+        self.sock.sendall(frame)
+        result = self._receive(request_id)
+        if isinstance(result, WireError):
+            raise result
+        return result
+
+    def query(self, sql, params=None):
+        """Ejecuta una o más sentencias SQL. Retorna la lista de resultados por operación."""
+        return self._call(FRAME_QUERY, dumps({'sql': sql, 'params': list(params or [])}))['results']
+
+    def prepare(self, sql):
+        """Prepara un SELECT o DELETE con parámetros '?'. Retorna el id de la sentencia."""
+        return self._call(FRAME_PREPARE, sql.encode('utf-8'))['statement_id']
+
+    def execute(self, statement_id, params=()):
+        """Ejecuta una sentencia preparada."""
+        return self._call(FRAME_EXECUTE, STATEMENT_ID.pack(statement_id) + dumps(list(params)))
+
+    def execute_many(self, statement_id, params_list):
+        """
+        Ejecuta una sentencia preparada con cada lista de parámetros.
+
+        Returns:
+            list: Resultados en el mismo orden; las ejecuciones fallidas quedan como WireError
+        """
+        results = []
+        params_list = list(params_list)
+        for start in range(0, len(params_list), PIPELINE_BATCH):
+            request_ids = []
+            frames = []
+            for params in params_list[start:start + PIPELINE_BATCH]:
+                request_id, frame = self._frame(FRAME_EXECUTE, STATEMENT_ID.pack(statement_id) + dumps(list(params)))
+                request_ids.append(request_id)
+                frames.append(frame)
+            self.sock.sendall(b''.join(frames))
+            results.extend(self._receive(request_id) for request_id in request_ids)
+        return results
+
+    def close_statement(self, statement_id):
+        """Libera una sentencia preparada en el servidor."""
+        self._call(FRAME_CLOSE, STATEMENT_ID.pack(statement_id))
+
+
+async def serve(host=WIRE_HOST, port=WIRE_PORT, path=WIRE_SOCKET):
+    """Levanta el servidor binario sobre las tablas del directorio actual."""
+    os.makedirs('tablas', exist_ok=True)
+    os.makedirs('indices', exist_ok=True)
+    # Junto a main.py sobre las mismas tablas se debe usar BD2_MULTIPROCESS=1
+    sql_manager = SQLTableManager(
+        storage_class=TableStorageManager, base_dir='tablas',
+        multiprocess=os.environ.get('BD2_MULTIPROCESS', '0') == '1',
+        result_cache_rows=int(os.environ.get('BD2_RESULT_CACHE_ROWS', '0'))
+    )
+    wire_server = WireServer(sql_manager)
+    server = await wire_server.start(host, port, path)
+    print(f"Servidor binario escuchando en {path or f'{host}:{port}'}")
+    try:
+        await server.serve_forever()
+    finally:
+        await wire_server.close()
+        sql_manager.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass